@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+SNPQIM - Benchmark do Micro-batching da Engine Rápida
+
+Simula --clients requisições concorrentes contínuas no MicroBatcher (mesmo
+código do backend, sem HTTP) e compara throughput, latência e tamanho médio
+dos batches para cada --max-batch. max_batch=1 equivale a um forward por
+requisição.
+
+Sem --model, usa uma CNN com pesos aleatórios (a latência não depende dos pesos).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backend.batching import BatchingConfig, MicroBatcher
+from ml.models.quality_cnn import create_snpqim_model, save_scorer
+from ml.scoring.fast_engine import FastQualityScorer
+
+
+async def run_load(engine, config: BatchingConfig, clients: int, requests: int, image: np.ndarray):
+    """Cada cliente manda uma requisição após a outra até o total de requisições"""
+    batcher = MicroBatcher(engine, config)
+    batcher.start()
+    latencies = []
+    remaining = [requests]
+
+    async def client():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.perf_counter()
+            await batcher.submit(image)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    await batcher.stop()
+    return elapsed, np.array(latencies), batcher.metrics.snapshot()
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Benchmark do micro-batching da engine rápida")
+    parser.add_argument('--model', default=None, help="Modelo destilado (padrão: CNN aleatória)")
+    parser.add_argument('--image-size', type=int, default=224, help="Entrada da CNN aleatória")
+    parser.add_argument('--clients', type=int, default=16, help="Requisições concorrentes")
+    parser.add_argument('--requests', type=int, default=256, help="Total de requisições")
+    parser.add_argument('--max-batch', type=int, nargs='+', default=[1, 4, 16], help="Tamanhos máximos de batch")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help="Espera máxima pelo batch")
+    args = parser.parse_args()
+
+    model_path = args.model
+    if model_path is None:
+        config = {'type': 'fast', 'params': {'width': 16}}
+        model_path = os.path.join(tempfile.mkdtemp(), 'fast.pt')
+        save_scorer(model_path, create_snpqim_model(config), config, args.image_size)
+    engine = FastQualityScorer(model_path, max_batch_size=max(args.max_batch))
+    # Imagem já no tamanho da entrada: mede o forward, não o resize
+    image = np.random.default_rng(0).integers(0, 255, (engine.image_size, engine.image_size, 3), dtype=np.uint8)
+
+    print(f"⚙️  {args.clients} clientes, {args.requests} requisições, entrada {engine.image_size}px, "
+          f"espera máx. {args.max_wait_ms} ms, threads torch {torch.get_num_threads()}")
+    print(f"\n{'max_batch':>9} {'img/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch médio':>12} {'fila p50 ms':>12}")
+    print("-" * 62)
+    for max_batch in args.max_batch:
+        config = BatchingConfig(max_batch_size=max_batch, max_wait_ms=args.max_wait_ms)
+        asyncio.run(run_load(engine, config, args.clients, args.clients, image))  # aquecimento
+        elapsed, latencies, snapshot = asyncio.run(
+            run_load(engine, config, args.clients, args.requests, image)
+        )
+        print(f"{max_batch:>9} {args.requests / elapsed:>8.1f} "
+              f"{np.percentile(latencies, 50) * 1e3:>8.1f} {np.percentile(latencies, 95) * 1e3:>8.1f} "
+              f"{snapshot['mean_batch_size']:>12.1f} {snapshot['queue_delay']['p50_seconds'] * 1e3:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+SNPQIM - Microbenchmark de Época do Data Loader
+
+Gera um dataset sintético de JPEGs do tamanho de retinografias, e mede o
+tempo de uma época (só leitura dos batches, sem modelo) com:
+
+- antes: SnpqimImageDataset (decode + resize + normalização a cada época)
+- depois: ShardedDataset sobre shards compilados uma vez (np.memmap)
+
+O tempo de compilação dos shards também é reportado (pago uma vez).
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from torch.utils.data import DataLoader
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.data.dataset import TARGET_COLUMNS, SnpqimImageDataset
+from ml.data.shards import ShardedDataset, compile_shards
+
+
+def build_dataset(data_dir: str, count: int, width: int, height: int):
+    """JPEGs sintéticos (disco iluminado com ruído) + labels.csv"""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[:height, :width]
+    disc = ((xx - width / 2) ** 2 + (yy - height / 2) ** 2) < (min(width, height) * 0.45) ** 2
+    with open(os.path.join(data_dir, 'labels.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['path', *TARGET_COLUMNS])
+        for i in range(count):
+            image = (disc[..., None] * rng.integers(60, 200, 3)).astype(np.uint8)
+            image = cv2.add(image, rng.integers(0, 30, image.shape, dtype=np.uint8))
+            name = f'img_{i:05d}.jpg'
+            cv2.imwrite(os.path.join(data_dir, name), image, [cv2.IMWRITE_JPEG_QUALITY, 92])
+            writer.writerow([name, *np.round(rng.random(len(TARGET_COLUMNS)) * 100, 2)])
+
+
+def epoch_seconds(dataset, batch_size: int, num_workers: int) -> float:
+    loader = DataLoader(dataset, batch_size=batch_size, shuffle=True, num_workers=num_workers)
+    start = time.perf_counter()
+    for batch in loader:
+        batch['image'].sum()  # toca os pixels, como o forward faria
+    return time.perf_counter() - start
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Microbenchmark de época do data loader SNPQIM")
+    parser.add_argument('--images', type=int, default=256, help="Imagens no dataset sintético")
+    parser.add_argument('--width', type=int, default=1600, help="Largura dos JPEGs")
+    parser.add_argument('--height', type=int, default=1200, help="Altura dos JPEGs")
+    parser.add_argument('--image-size', type=int, default=224, help="Lado da entrada do modelo")
+    parser.add_argument('--batch-size', type=int, default=32, help="Tamanho do batch")
+    parser.add_argument('--num-workers', type=int, default=0, help="Workers do DataLoader")
+    parser.add_argument('--epochs', type=int, default=3, help="Épocas medidas por variante")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        print(f"⚙️  Gerando {args.images} JPEGs {args.width}x{args.height}...")
+        build_dataset(data_dir, args.images, args.width, args.height)
+
+        start = time.perf_counter()
+        compile_shards(data_dir, image_size=args.image_size)
+        compile_time = time.perf_counter() - start
+
+        decoded = SnpqimImageDataset.from_directory(data_dir, args.image_size)
+        sharded = ShardedDataset(os.path.join(data_dir, 'shards'))
+
+        before = min(epoch_seconds(decoded, args.batch_size, args.num_workers) for _ in range(args.epochs))
+        after = min(epoch_seconds(sharded, args.batch_size, args.num_workers) for _ in range(args.epochs))
+
+    print(f"\ncompilação dos shards (uma vez): {compile_time:.2f} s")
+    print(f"época antes (decode):            {before:.2f} s ({args.images / before:.0f} img/s)")
+    print(f"época depois (shards):           {after:.3f} s ({args.images / after:.0f} img/s)")
+    print(f"ganho por época:                 {before / after:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+SNPQIM - Microbenchmark das Engines de Scoring
+
+Latência por imagem (melhor tempo) do analyzer de referência contra a engine
+rápida (CNN destilada), em imagens sintéticas do tamanho de retinografias.
+A engine rápida é medida com batch 1 e com as --images em um único forward.
+
+Sem --model, usa uma CNN com pesos aleatórios (a latência não depende dos
+pesos); com --model, também reporta a concordância nas imagens geradas.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.models.quality_cnn import create_snpqim_model, save_scorer
+from ml.scoring.fast_engine import AgreementTracker, FastQualityScorer
+from ml.scoring.wingsai_core import WingsAIQualityAnalyzer
+
+
+def fundus_images(count: int, width: int, height: int):
+    """Disco iluminado com ruído (RGB uint8), como em benchmark_dataset.py"""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[:height, :width]
+    disc = ((xx - width / 2) ** 2 + (yy - height / 2) ** 2) < (min(width, height) * 0.45) ** 2
+    images = []
+    for _ in range(count):
+        image = (disc[..., None] * rng.integers(60, 200, 3)).astype(np.uint8)
+        images.append(np.clip(image + rng.integers(0, 30, image.shape), 0, 255).astype(np.uint8))
+    return images
+
+
+def best_seconds(fn, repeat: int) -> float:
+    fn()  # aquecimento
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Microbenchmark das engines de scoring SNPQIM")
+    parser.add_argument('--model', default=None, help="Modelo destilado (padrão: CNN aleatória)")
+    parser.add_argument('--images', type=int, default=8, help="Imagens sintéticas")
+    parser.add_argument('--width', type=int, default=1600, help="Largura das imagens")
+    parser.add_argument('--height', type=int, default=1200, help="Altura das imagens")
+    parser.add_argument('--image-size', type=int, default=224, help="Entrada da CNN aleatória")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições (melhor tempo)")
+    args = parser.parse_args()
+
+    images = fundus_images(args.images, args.width, args.height)
+    model_path = args.model
+    if model_path is None:
+        config = {'type': 'fast', 'params': {'width': 16}}
+        model_path = os.path.join(tempfile.mkdtemp(), 'fast.pt')
+        save_scorer(model_path, create_snpqim_model(config), config, args.image_size)
+
+    analyzer = WingsAIQualityAnalyzer()
+    engine = FastQualityScorer(model_path, max_batch_size=args.images)
+    print(f"⚙️  {args.images} imagens {args.width}x{args.height}, entrada CNN {engine.image_size}px, "
+          f"{engine.info()['parameters']:,} parâmetros, threads torch {torch.get_num_threads()}")
+
+    reference = best_seconds(lambda: [analyzer.analyze_image(image) for image in images], args.repeat)
+    fast_single = best_seconds(lambda: [engine.score_image(image) for image in images], args.repeat)
+    fast_batch = best_seconds(lambda: engine.score_images(images), args.repeat)
+
+    print(f"\n{'engine':<22} {'ms/imagem':>10} {'speedup':>9}")
+    print("-" * 43)
+    per_image = reference / len(images) * 1e3
+    for name, seconds in (('reference', reference), ('fast (batch 1)', fast_single),
+                          (f'fast (batch {args.images})', fast_batch)):
+        ms = seconds / len(images) * 1e3
+        print(f"{name:<22} {ms:>10.1f} {per_image / ms:>8.1f}x")
+
+    if args.model:
+        tracker = AgreementTracker()
+        for image, fast_score in zip(images, engine.score_images(images)):
+            tracker.update(fast_score, analyzer.analyze_image(image))
+        print(f"\n🎯 Concordância nas imagens sintéticas: {tracker.summary()}")
+
+
+if __name__ == "__main__":
+    main()
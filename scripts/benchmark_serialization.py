@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+WingsAI - Microbenchmark de Serialização das Respostas da API
+
+Compara, por resposta, o caminho antigo (dict com round() por campo ->
+jsonable_encoder -> json da stdlib) com o atual (score_to_response com
+floats Python -> FastJSONResponse/orjson) para:
+
+- resposta de /api/v1/analyze (uma imagem, campos completos + metadata)
+- resposta de /api/v1/analyze/batch com 100 imagens (resumo padrão e
+  campos completos)
+
+Os scores são calculados uma vez; só a serialização é medida.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.main import score_to_response
+from backend.serialization import ORJSON_AVAILABLE, FastJSONResponse
+from ml.scoring.wingsai_core import analyze_image_quality
+
+BATCH_DEFAULT_FIELDS = ['global_score', 'ml_readiness', 'clinical_adequacy', 'confidence']
+
+
+def legacy_score_to_response(score, full: bool) -> Dict:
+    """Montagem anterior: round() direto nos valores (floats NumPy continuam NumPy)"""
+    result = {
+        "global_score": round(score.global_score, 2),
+        "confidence": round(score.confidence, 2),
+        "ml_readiness": score.ml_readiness,
+        "clinical_adequacy": score.clinical_adequacy,
+    }
+    if full:
+        result["dimension_scores"] = {k: round(v, 2) for k, v in score.dimension_scores.items()}
+        result["recommendations"] = score.render_recommendations()
+    return result
+
+
+def legacy_render(content: Dict) -> bytes:
+    """Caminho padrão do FastAPI para endpoints que retornam dict"""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def fast_render(content: Dict) -> bytes:
+    return FastJSONResponse(content).body
+
+
+def build_scores(count: int) -> List:
+    """Scores reais de imagens sintéticas variadas (inclui um do cascade)"""
+    rng = np.random.default_rng(0)
+    scores = []
+    for i in range(count):
+        image = np.clip(0.3 + 0.05 * (i % 8) + 0.1 * rng.standard_normal((96, 96, 3)), 0, 1)
+        metadata = {
+            "filename": f"image_{i}.png",
+            "content_type": "image/png",
+            "shape": (96, 96, 3),
+            "exam_type": "fundoscopy",
+            "analysis_timestamp": datetime.now().isoformat()
+        }
+        scores.append(analyze_image_quality(image, 'fundoscopy', metadata))
+    return scores
+
+
+def single_payloads(score, legacy: bool) -> Dict:
+    if legacy:
+        result = legacy_score_to_response(score, full=True)
+    else:
+        result = score_to_response(score, None)
+    return {
+        "success": True,
+        "result": {**result, "skipped_dimensions": score.skipped_dimensions,
+                   "metadata": score.metadata}
+    }
+
+
+def batch_payload(scores: List, legacy: bool, full: bool) -> Dict:
+    results = []
+    for score in scores:
+        if legacy:
+            body = legacy_score_to_response(score, full)
+        else:
+            body = score_to_response(score, None if full else BATCH_DEFAULT_FIELDS)
+        results.append({"filename": score.metadata["filename"], **body,
+                        "skipped_dimensions": score.skipped_dimensions})
+    global_scores = [r["global_score"] for r in results]
+    return {
+        "success": True,
+        "statistics": {"total_images": len(scores), "successful": len(scores), "failed": 0,
+                       "mean_score": round(np.mean(global_scores), 2)},
+        "results": results,
+        "errors": None
+    }
+
+
+def measure(build: Callable[[], Dict], render: Callable[[Dict], bytes], repeat: int) -> Dict:
+    """Mediana do tempo (montagem + serialização) por resposta"""
+    for _ in range(3):
+        render(build())
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = render(build())
+        times.append(time.perf_counter() - start)
+    return {"median_us": float(np.median(times)) * 1e6, "bytes": len(body)}
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Microbenchmark de serialização da API WingsAI")
+    parser.add_argument('--repeat', type=int, default=200, help="Repetições por caso")
+    parser.add_argument('--batch-size', type=int, default=100, help="Imagens na resposta de batch")
+    args = parser.parse_args()
+
+    print(f"⚙️  Calculando {args.batch_size} scores (orjson: {ORJSON_AVAILABLE})...")
+    scores = build_scores(args.batch_size)
+
+    cases = {
+        "single": lambda legacy: (lambda: single_payloads(scores[0], legacy)),
+        f"batch_{args.batch_size}_summary": lambda legacy: (lambda: batch_payload(scores, legacy, False)),
+        f"batch_{args.batch_size}_full": lambda legacy: (lambda: batch_payload(scores, legacy, True)),
+    }
+
+    print(f"\n{'caso':<22} {'antes (µs)':>12} {'depois (µs)':>12} {'ganho':>7} {'bytes':>8}")
+    print("-" * 66)
+    for name, make in cases.items():
+        before = measure(make(True), legacy_render, args.repeat)
+        after = measure(make(False), fast_render, args.repeat)
+        speedup = before["median_us"] / after["median_us"]
+        print(f"{name:<22} {before['median_us']:>12.1f} {after['median_us']:>12.1f} "
+              f"{speedup:>6.1f}x {after['bytes']:>8}")
+
+
+if __name__ == "__main__":
+    main()
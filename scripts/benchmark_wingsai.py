@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+WingsAI - Benchmark de Performance do Algoritmo de Scoring
+Mede tempo por dimensão, tempo end-to-end, throughput e pico de memória
+(RSS, em subprocesso) sobre as imagens sintéticas de scripts/create_test_images.py
+
+Roda offline, apenas em CPU. Resultados são gravados em JSON e podem ser
+comparados com um baseline salvo anteriormente (gate de regressão).
+
+Com --thread-sweep, mede o throughput de combinações workers x threads
+(process pool, orçamento de threads aplicado em cada worker) e indica a
+melhor divisão para a máquina.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import gc
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Adiciona src/ e scripts/ ao path
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..', 'src'))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from ml.scoring.wingsai_core import WingsAIQualityAnalyzer
+from ml.scoring.thread_budget import apply_thread_budget, available_cpus
+from create_test_images import TestImageGenerator
+
+
+DEFAULT_SIZES = [256, 512, 1024, 2048, 4096]
+DEFAULT_EXAM_TYPES = ['fundoscopy', 'oct', 'angiography']
+DEFAULT_BASELINE = Path(SCRIPTS_DIR).parent / 'benchmarks' / 'baseline.json'
+
+# Diferenças absolutas abaixo destes valores são tratadas como ruído de medição
+MIN_REGRESSION_SECONDS = 0.005
+MIN_REGRESSION_MB = 2.0
+
+
+def generate_image(
+    generator: TestImageGenerator,
+    exam_type: str,
+    size: int,
+    seed: int = 42
+) -> np.ndarray:
+    """
+    Gera imagem sintética determinística para o benchmark
+
+    Angiografia não tem gerador próprio: usa a imagem de fundo de olho,
+    que contém a árvore vascular relevante para esse exame.
+    """
+    np.random.seed(seed)
+    if exam_type == 'oct':
+        image = generator.create_oct_image((size, size), quality='medium')
+    else:
+        image = generator.create_fundus_image((size, size), quality='medium')
+
+    # Mesmo formato que chega pela API: uint8 RGB
+    return (image * 255).astype(np.uint8)
+
+
+def _time_call(fn: Callable, *args, **kwargs) -> Tuple[float, object]:
+    """Executa fn e retorna (segundos, resultado)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def profile_stages(
+    analyzer: WingsAIQualityAnalyzer,
+    image: np.ndarray,
+    exam_type: str
+) -> Dict[str, float]:
+    """
+    Mede o tempo de cada etapa do pipeline, na mesma ordem de analyze_image
+    """
+    timings = {}
+
+    timings['preprocess'], processed = _time_call(analyzer._preprocess_image, image)
+    timings['cascade'], _ = _time_call(analyzer._check_cascade, processed)
+    timings['edges'], edges = _time_call(analyzer._compute_edges, processed)
+
+    dimension_scores = {}
+    timings['sharpness'], dimension_scores['sharpness'] = _time_call(
+        analyzer._analyze_sharpness, processed, edges
+    )
+    timings['exposure'], dimension_scores['exposure'] = _time_call(
+        analyzer._analyze_exposure, processed
+    )
+    timings['contrast'], dimension_scores['contrast'] = _time_call(
+        analyzer._analyze_contrast, processed, edges
+    )
+    timings['noise_level'], dimension_scores['noise_level'] = _time_call(
+        analyzer._analyze_noise, processed
+    )
+    timings['artifacts'], dimension_scores['artifacts'] = _time_call(
+        analyzer._detect_artifacts, processed
+    )
+    timings['clinical_adequacy'], dimension_scores['clinical_adequacy'] = _time_call(
+        analyzer._assess_clinical_adequacy, processed, dict(dimension_scores), exam_type
+    )
+
+    start = time.perf_counter()
+    global_score = analyzer._calculate_global_score(dimension_scores, exam_type)
+    analyzer._calculate_confidence(dimension_scores, processed)
+    analyzer._assess_ml_readiness(global_score, dimension_scores)
+    analyzer._classify_clinical_adequacy(global_score, dimension_scores)
+    analyzer._generate_recommendation_codes(dimension_scores, exam_type)
+    timings['aggregation'] = time.perf_counter() - start
+
+    return timings
+
+
+def benchmark_case(
+    analyzer: WingsAIQualityAnalyzer,
+    image: np.ndarray,
+    exam_type: str,
+    repeat: int = 3,
+    warmup: int = 1
+) -> Dict:
+    """
+    Benchmark de uma combinação (tipo de exame, tamanho)
+
+    Returns:
+        Dict com medianas por etapa, end-to-end e throughput
+    """
+    for _ in range(warmup):
+        analyzer.analyze_image(image, exam_type=exam_type)
+
+    end_to_end = []
+    stages: Dict[str, List[float]] = {}
+
+    for _ in range(repeat):
+        elapsed, _ = _time_call(analyzer.analyze_image, image, exam_type=exam_type)
+        end_to_end.append(elapsed)
+
+        for stage, seconds in profile_stages(analyzer, image, exam_type).items():
+            stages.setdefault(stage, []).append(seconds)
+
+    median_e2e = float(np.median(end_to_end))
+    megapixels = image.shape[0] * image.shape[1] / 1e6
+
+    return {
+        'exam_type': exam_type,
+        'shape': list(image.shape),
+        'end_to_end_seconds': median_e2e,
+        'end_to_end_min_seconds': float(np.min(end_to_end)),
+        'stage_seconds': {k: float(np.median(v)) for k, v in stages.items()},
+        'images_per_second': 1.0 / median_e2e if median_e2e > 0 else None,
+        'megapixels_per_second': megapixels / median_e2e if median_e2e > 0 else None
+    }
+
+
+def _proc_status_bytes(field: str) -> Optional[int]:
+    """Campo em kB de /proc/self/status (VmRSS, VmHWM) em bytes; None fora do Linux"""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _max_rss_bytes() -> int:
+    """ru_maxrss em bytes (kB no Linux, bytes no macOS)"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _peak_rss_worker(exam_type: str, size: int) -> float:
+    """
+    Roda em um processo novo: pico de RSS (MB) de uma análise acima do RSS
+    anterior a ela
+
+    RSS inclui as alocações nativas (buffers do OpenCV, BLAS) que o
+    tracemalloc não vê. No Linux o pico é zerado via /proc/self/clear_refs
+    antes da análise; sem ele, ru_maxrss antes/depois dá um limite inferior.
+    Um warmup pequeno antes carrega skimage/scipy, para o pico medir a
+    análise e não os imports preguiçosos.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image = generate_image(TestImageGenerator(output_dir=tmp_dir), exam_type, size)
+    analyzer = WingsAIQualityAnalyzer()
+    analyzer.warmup(size=128)
+    gc.collect()
+
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='ascii') as f:
+            f.write('5')  # zera o VmHWM
+        before = _proc_status_bytes('VmRSS')
+    except OSError:
+        before = None
+
+    if before is None:
+        before = _max_rss_bytes()
+        analyzer.analyze_image(image, exam_type=exam_type)
+        peak = _max_rss_bytes()
+    else:
+        analyzer.analyze_image(image, exam_type=exam_type)
+        peak = _proc_status_bytes('VmHWM')
+
+    return max(peak - before, 0) / (1024 ** 2)
+
+
+def measure_peak_memory(exam_type: str, size: int) -> float:
+    """
+    Pico de memória (MB) de uma análise, medido em subprocesso
+
+    Processo novo (spawn) para que o allocator não reaproveite memória já
+    liberada pelas repetições anteriores e esconda o pico.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_peak_rss_worker, exam_type, size).result()
+
+
+def run_benchmarks(
+    sizes: List[int],
+    exam_types: List[str],
+    repeat: int = 3,
+    warmup: int = 1
+) -> Dict:
+    """Executa o benchmark completo e retorna o relatório"""
+    analyzer = WingsAIQualityAnalyzer()
+    cases = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generator = TestImageGenerator(output_dir=tmp_dir)
+
+        for exam_type in exam_types:
+            for size in sizes:
+                case_id = f"{exam_type}_{size}"
+                print(f"  ⏱️  {case_id}...", end=' ', flush=True)
+
+                image = generate_image(generator, exam_type, size)
+                result = benchmark_case(analyzer, image, exam_type, repeat, warmup)
+                result['peak_memory_mb'] = measure_peak_memory(exam_type, size)
+                cases[case_id] = result
+
+                print(f"{result['end_to_end_seconds'] * 1000:.1f} ms | "
+                      f"{result['images_per_second']:.2f} img/s | "
+                      f"{result['peak_memory_mb']:.1f} MB")
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {'repeat': repeat, 'warmup': warmup, 'memory_metric': 'rss'},
+        'cases': cases
+    }
+
+
+# Estado de cada worker do thread sweep (definido no initializer)
+_sweep_state: Dict = {}
+
+
+def _sweep_worker_init(threads: int, image: np.ndarray, exam_type: str):
+    """Initializer do process pool: aplica o orçamento e cria o analyzer"""
+    apply_thread_budget(threads)
+    _sweep_state['analyzer'] = WingsAIQualityAnalyzer()
+    _sweep_state['image'] = image
+    _sweep_state['exam_type'] = exam_type
+
+
+def _sweep_score(_: int) -> None:
+    _sweep_state['analyzer'].analyze_image(
+        _sweep_state['image'], exam_type=_sweep_state['exam_type']
+    )
+
+
+def thread_sweep_candidates(cpus: int, max_workers: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Combinações (workers, threads) a medir
+
+    Inclui todas as divisões com workers x threads <= CPUs e, para cada
+    número de workers, o padrão das bibliotecas (threads = CPUs), que
+    mostra o custo da sobre-inscrição.
+    """
+    powers = (1, 2, 4, 8, 16, 32, 64)
+    max_workers = max_workers or cpus
+    thread_steps = sorted({n for n in powers if n <= cpus} | {cpus})
+    worker_steps = sorted({n for n in powers if n <= max_workers} | {max_workers})
+
+    candidates = set()
+    for workers in worker_steps:
+        for threads in thread_steps:
+            if workers * threads <= cpus:
+                candidates.add((workers, threads))
+        candidates.add((workers, cpus))
+    return sorted(candidates)
+
+
+def run_thread_sweep(
+    size: int = 512,
+    exam_type: str = 'fundoscopy',
+    images_per_run: int = 16,
+    max_workers: Optional[int] = None
+) -> Dict:
+    """
+    Mede throughput (imagens/s) de cada combinação workers x threads
+
+    Returns:
+        Relatório com resultados por combinação e a melhor delas
+    """
+    cpus = available_cpus()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image = generate_image(TestImageGenerator(output_dir=tmp_dir), exam_type, size)
+
+    context = multiprocessing.get_context('fork')
+    results = []
+
+    for workers, threads in thread_sweep_candidates(cpus, max_workers):
+        print(f"  ⏱️  {workers} workers x {threads} threads...", end=' ', flush=True)
+
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context,
+            initializer=_sweep_worker_init, initargs=(threads, image, exam_type)
+        ) as pool:
+            # Aquecimento: uma imagem por worker
+            list(pool.map(_sweep_score, range(workers)))
+
+            start = time.perf_counter()
+            list(pool.map(_sweep_score, range(images_per_run)))
+            elapsed = time.perf_counter() - start
+
+        result = {
+            'workers': workers,
+            'threads': threads,
+            'oversubscribed': workers * threads > cpus,
+            'seconds': elapsed,
+            'images_per_second': images_per_run / elapsed
+        }
+        results.append(result)
+        print(f"{result['images_per_second']:.2f} img/s")
+
+    best = max(results, key=lambda r: r['images_per_second'])
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'cpus': cpus,
+        'config': {
+            'size': size, 'exam_type': exam_type, 'images_per_run': images_per_run
+        },
+        'results': results,
+        'best': best
+    }
+
+
+def compare_with_baseline(
+    report: Dict,
+    baseline: Dict,
+    threshold: float = 0.15,
+    memory_threshold: float = 0.25
+) -> List[str]:
+    """
+    Compara relatório atual com baseline
+
+    Args:
+        report: Resultado de run_benchmarks
+        baseline: Relatório salvo anteriormente
+        threshold: Aumento relativo tolerado nos tempos (0.15 = 15%)
+        memory_threshold: Aumento relativo tolerado no pico de memória
+
+    Returns:
+        Lista de regressões encontradas (vazia se nenhuma)
+    """
+    regressions = []
+    # Baselines antigos mediam o pico com tracemalloc: não comparáveis com RSS
+    compare_memory = baseline.get('config', {}).get('memory_metric') == 'rss'
+
+    def check(label: str, current: float, reference: float):
+        if reference is None or current is None:
+            return
+        if current - reference < MIN_REGRESSION_SECONDS:
+            return
+        if current > reference * (1 + threshold):
+            regressions.append(
+                f"{label}: {reference * 1000:.1f} ms -> {current * 1000:.1f} ms "
+                f"(+{(current / reference - 1) * 100:.0f}%)"
+            )
+
+    for case_id, current in report['cases'].items():
+        reference = baseline.get('cases', {}).get(case_id)
+        if reference is None:
+            continue
+
+        check(f"{case_id} end_to_end",
+              current['end_to_end_seconds'], reference.get('end_to_end_seconds'))
+
+        for stage, seconds in current['stage_seconds'].items():
+            check(f"{case_id} {stage}",
+                  seconds, reference.get('stage_seconds', {}).get(stage))
+
+        memory, reference_memory = current.get('peak_memory_mb'), reference.get('peak_memory_mb')
+        if not compare_memory or memory is None or reference_memory is None:
+            continue
+        if (memory - reference_memory >= MIN_REGRESSION_MB
+                and memory > reference_memory * (1 + memory_threshold)):
+            regressions.append(
+                f"{case_id} peak_memory: {reference_memory:.1f} MB -> {memory:.1f} MB "
+                f"(+{(memory / reference_memory - 1) * 100:.0f}%)"
+            )
+
+    return regressions
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark de performance do algoritmo WingsAI"
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Tamanhos (px) das imagens quadradas")
+    parser.add_argument('--exam-types', nargs='+', default=DEFAULT_EXAM_TYPES,
+                        choices=DEFAULT_EXAM_TYPES, help="Tipos de exame")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Repetições medidas por caso (mediana)")
+    parser.add_argument('--warmup', type=int, default=1,
+                        help="Execuções de aquecimento por caso")
+    parser.add_argument('--output', type=str, default=None,
+                        help="Arquivo JSON para salvar o relatório")
+    parser.add_argument('--baseline', type=str, default=str(DEFAULT_BASELINE),
+                        help="Arquivo JSON de baseline para comparação")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Salva o relatório atual como novo baseline")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Regressão relativa máxima tolerada nos tempos (0.15 = 15%%)")
+    parser.add_argument('--memory-threshold', type=float, default=0.25,
+                        help="Regressão relativa máxima tolerada no pico de memória (0.25 = 25%%)")
+    parser.add_argument('--thread-sweep', action='store_true',
+                        help="Mede combinações workers x threads e indica a melhor")
+    parser.add_argument('--sweep-size', type=int, default=512,
+                        help="Tamanho (px) da imagem usada no thread sweep")
+    parser.add_argument('--sweep-images', type=int, default=16,
+                        help="Imagens processadas por combinação no thread sweep")
+    parser.add_argument('--max-workers', type=int, default=None,
+                        help="Máximo de workers no thread sweep (padrão: CPUs)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⚡ WingsAI - Benchmark de Performance")
+    print("=" * 60)
+
+    if args.thread_sweep:
+        report = run_thread_sweep(
+            args.sweep_size, args.exam_types[0], args.sweep_images, args.max_workers
+        )
+        best = report['best']
+        print(f"\n🏆 Melhor divisão em {report['cpus']} CPUs: "
+              f"{best['workers']} workers x {best['threads']} threads "
+              f"({best['images_per_second']:.2f} img/s)")
+        print(f"    Use: WINGSAI_WORKERS={best['workers']} WINGSAI_THREADS={best['threads']}")
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"\n💾 Relatório salvo em: {args.output}")
+        return 0
+
+    report = run_benchmarks(args.sizes, args.exam_types, args.repeat, args.warmup)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Relatório salvo em: {args.output}")
+
+    baseline_path = Path(args.baseline)
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline salvo em: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        # Sem baseline não há gate: falha em vez de passar em silêncio
+        print(f"\n❌ Baseline não encontrado em {baseline_path}")
+        print("    Execute com --save-baseline na máquina de referência para criar um")
+        return 2
+
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare_with_baseline(report, baseline, args.threshold, args.memory_threshold)
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressões acima de {args.threshold * 100:.0f}% "
+              f"(tempo) / {args.memory_threshold * 100:.0f}% (memória):")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+
+    print(f"\n✅ Nenhuma regressão acima de {args.threshold * 100:.0f}% em relação ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
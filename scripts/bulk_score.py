@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+WingsAI - Scoring em Massa
+Pontua um diretório, glob ou manifesto de imagens em vários processos e
+grava os resultados em um dataset Parquet (retomável)
+
+Exemplos:
+    python scripts/bulk_score.py /dados/retinas --output results/bulk
+    python scripts/bulk_score.py "/dados/**/*.jpg" --workers 8
+    python scripts/bulk_score.py manifest.csv --compact results/scores.parquet
+"""
+
+import sys
+import os
+import json
+import argparse
+import logging
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.scoring.bulk import BulkScorer, iter_inputs, compact_parts
+from ml.scoring.thread_budget import available_cpus
+from ml.scoring.wingsai_core import resolve_fields
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Scoring em massa WingsAI (Parquet)")
+    parser.add_argument('source',
+                        help="Diretório, padrão glob ou manifesto (.txt / .csv com coluna path)")
+    parser.add_argument('--output', default='results/bulk',
+                        help="Diretório do dataset Parquet de saída")
+    parser.add_argument('--pattern', default=None,
+                        help="Padrão glob dentro do diretório (padrão: extensões de imagem)")
+    parser.add_argument('--exam-type', default='fundoscopy',
+                        choices=['fundoscopy', 'oct', 'angiography'])
+    parser.add_argument('--workers', type=int, default=available_cpus(),
+                        help="Processos de scoring")
+    parser.add_argument('--threads', type=int, default=1,
+                        help="Threads OpenCV/BLAS por processo")
+    parser.add_argument('--read-threads', type=int, default=4,
+                        help="Threads de leitura de arquivos")
+    parser.add_argument('--prefetch', type=int, default=4,
+                        help="Imagens em voo por worker")
+    parser.add_argument('--row-group-size', type=int, default=1024,
+                        help="Linhas por row group commitado")
+    parser.add_argument('--fields', default=None,
+                        help="Campos separados por vírgula (ex: dimension_scores.sharpness)")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="Recomeça do zero: apaga as partes já commitadas no output")
+    parser.add_argument('--compact', default=None,
+                        help="Ao final, junta as partes neste arquivo .parquet")
+    args = parser.parse_args()
+
+    fields = [f.strip() for f in args.fields.split(',')] if args.fields else None
+    try:
+        resolve_fields(fields)
+    except ValueError as e:
+        parser.error(f"--fields: {e}")
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    print("=" * 60)
+    print("🏥 WingsAI - Scoring em Massa")
+    print("=" * 60)
+    print(f"📂 Entrada: {args.source}")
+    print(f"💾 Saída: {args.output}")
+    print(f"⚙️  {args.workers} workers x {args.threads} threads, "
+          f"prefetch {args.prefetch}, row group {args.row_group_size}")
+
+    scorer = BulkScorer(
+        args.output,
+        workers=args.workers,
+        threads_per_worker=args.threads,
+        read_threads=args.read_threads,
+        prefetch=args.prefetch,
+        row_group_size=args.row_group_size,
+        fields=fields,
+        resume=not args.no_resume
+    )
+    stats = scorer.run(iter_inputs(args.source, args.exam_type, args.pattern))
+
+    print(f"\n✅ Concluído: {stats['scored']} pontuadas, {stats['errors']} erros, "
+          f"{stats['skipped']} já existentes")
+    if stats['images_per_second']:
+        print(f"⚡ {stats['images_per_second']:.1f} imagens/s em {stats['seconds']:.1f}s")
+
+    if args.compact:
+        rows = compact_parts(args.output, args.compact)
+        print(f"📦 {rows} linhas compactadas em {args.compact}")
+
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+SNPQIM - Compilação do Dataset de Treino em Shards
+Decodifica, redimensiona e normaliza as imagens do índice de rótulos uma
+única vez, em shards memory-mapped lidos por get_data_loaders
+
+Exemplos:
+    python scripts/compile_shards.py data/
+    python scripts/compile_shards.py data/ --image-size 384 --shard-size 512
+    python scripts/compile_shards.py data/ --exam-type fundoscopy
+"""
+
+import sys
+import os
+import argparse
+import logging
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.data.dataset import DEFAULT_IMAGE_SIZE
+from ml.data.shards import DEFAULT_SHARD_SIZE, compile_shards
+from ml.scoring.thread_budget import available_cpus
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Compila o dataset SNPQIM em shards .npy")
+    parser.add_argument('data_dir', help="Diretório com labels.csv ou labels.parquet")
+    parser.add_argument('--output', default=None, help="Destino dos shards (padrão: data_dir/shards)")
+    parser.add_argument('--image-size', type=int, default=DEFAULT_IMAGE_SIZE,
+                        help="Lado da imagem quadrada de entrada do modelo")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help="Amostras por shard")
+    parser.add_argument('--workers', type=int, default=available_cpus(),
+                        help="Threads de decode")
+    parser.add_argument('--exam-type', default=None,
+                        help="Só as linhas desse tipo de exame (padrão: todas)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    index = compile_shards(
+        args.data_dir,
+        output_dir=args.output,
+        image_size=args.image_size,
+        shard_size=args.shard_size,
+        workers=args.workers,
+        exam_type=args.exam_type
+    )
+
+    size_mb = index['samples'] * 3 * args.image_size ** 2 * 4 / 1e6
+    print(f"✅ {index['samples']} amostras, {len(index['shards'])} shards (~{size_mb:.0f} MB)")
+    for error in index['errors'][:10]:
+        print(f"  ❌ {error['path']}: {error['error']}")
+    if len(index['errors']) > 10:
+        print(f"  ... e mais {len(index['errors']) - 10} falhas")
+
+
+if __name__ == "__main__":
+    main()
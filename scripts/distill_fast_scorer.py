@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+SNPQIM - Destilação do Modelo Rápido
+Rotula o corpus com o analyzer WingsAI, treina a CNN pequena (SnpqimFastScorer)
+e grava o modelo servido pela engine rápida do backend (WINGSAI_FAST_MODEL)
+
+Exemplos:
+    python scripts/distill_fast_scorer.py data/images --data-dir data --output models/fast_fundoscopy.pt
+    python scripts/distill_fast_scorer.py manifest.csv --data-dir data --epochs 50 --image-size 256
+
+    # Só treina com os rótulos já existentes em data/
+    python scripts/distill_fast_scorer.py --data-dir data --output models/fast.pt
+"""
+
+import sys
+import os
+import json
+import argparse
+import logging
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.data.dataset import DEFAULT_IMAGE_SIZE
+from ml.scoring.thread_budget import available_cpus
+from ml.training.distillation import distill_fast_scorer
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Destila o analyzer WingsAI em uma CNN rápida")
+    parser.add_argument('corpus', nargs='?', default=None,
+                        help="Diretório, glob ou manifesto a rotular (omitido: usa rótulos existentes)")
+    parser.add_argument('--data-dir', required=True, help="Diretório do dataset de treino")
+    parser.add_argument('--output', default='models/fast_scorer.pt', help="Arquivo do modelo exportado")
+    parser.add_argument('--exam-type', default='fundoscopy',
+                        choices=['fundoscopy', 'oct', 'angiography'])
+    parser.add_argument('--pattern', default=None,
+                        help="Padrão glob dentro do diretório (padrão: extensões de imagem)")
+    parser.add_argument('--image-size', type=int, default=DEFAULT_IMAGE_SIZE,
+                        help="Lado da entrada do modelo")
+    parser.add_argument('--width', type=int, default=16, help="Canais do primeiro estágio da CNN")
+    parser.add_argument('--epochs', type=int, default=30, help="Épocas de treino")
+    parser.add_argument('--batch-size', type=int, default=32, help="Tamanho do batch")
+    parser.add_argument('--lr', type=float, default=1e-3, help="Learning rate")
+    parser.add_argument('--label-workers', type=int, default=available_cpus(),
+                        help="Processos da rotulagem")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    metadata = distill_fast_scorer(
+        args.corpus,
+        args.data_dir,
+        args.output,
+        exam_type=args.exam_type,
+        pattern=args.pattern,
+        image_size=args.image_size,
+        num_epochs=args.epochs,
+        batch_size=args.batch_size,
+        learning_rate=args.lr,
+        label_workers=args.label_workers,
+        model_config={'type': 'fast', 'params': {'width': args.width, 'dropout_rate': 0.1}}
+    )
+
+    print(f"\n✅ Modelo em {args.output}")
+    print(f"🚀 Sirva com: WINGSAI_FAST_MODEL={args.output} python src/backend/server.py")
+    print(json.dumps(metadata['agreement'], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+SNPQIM - Exportação do Scorer para CPU
+Converte um scorer (save_scorer) ou checkpoint do SnpqimTrainer em um
+artefato TorchScript/ONNX com a normalização embutida, opcionalmente int8,
+servido pela engine rápida (WINGSAI_FAST_MODEL) sem o stack de treino
+
+Exemplos:
+    python scripts/export_scorer.py models/fast_fundoscopy.pt --output models/fast_fundoscopy.ts.pt
+    python scripts/export_scorer.py models/fast_fundoscopy.pt --output models/fast_int8.ts.pt \\
+        --quantize static --calibration data/images --compare data/images
+
+    # ONNX (requer onnx; quantização e runtime requerem onnxruntime)
+    python scripts/export_scorer.py data/distillation/checkpoints/best_model.pt \\
+        --output models/fast.onnx --format onnx --quantize dynamic
+"""
+
+import sys
+import os
+import json
+import argparse
+import logging
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.models.export import (
+    EXPORT_FORMATS,
+    QUANTIZATION_MODES,
+    calibration_images,
+    compare_with_eager,
+    export_scorer,
+    sample_images
+)
+from ml.models.quality_cnn import load_scorer
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Exporta um scorer SNPQIM para inferência em CPU")
+    parser.add_argument('model', help="Scorer (save_scorer) ou checkpoint do SnpqimTrainer")
+    parser.add_argument('--output', required=True, help="Artefato (.pt TorchScript ou .onnx)")
+    parser.add_argument('--format', default='torchscript', choices=EXPORT_FORMATS)
+    parser.add_argument('--quantize', default=None, choices=QUANTIZATION_MODES,
+                        help="Quantização int8 (padrão: fp32)")
+    parser.add_argument('--calibration', default=None,
+                        help="Diretório, glob ou manifesto com a amostra de calibração (--quantize static)")
+    parser.add_argument('--calibration-samples', type=int, default=128, help="Imagens de calibração")
+    parser.add_argument('--compare', default=None,
+                        help="Corpus para comparar latência e concordância com o fp32 eager")
+    parser.add_argument('--compare-samples', type=int, default=32, help="Imagens da comparação")
+    parser.add_argument('--exam-type', default='fundoscopy',
+                        choices=['fundoscopy', 'oct', 'angiography'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.quantize == 'static' and not args.calibration:
+        parser.error("--quantize static requer --calibration")
+
+    image_size = load_scorer(args.model)[1]['image_size']
+    calibration = None
+    if args.calibration:
+        calibration = calibration_images(args.calibration, image_size, args.calibration_samples,
+                                         args.exam_type, seed=0)
+
+    export_scorer(args.model, args.output, args.format, args.quantize, calibration)
+    print(f"\n✅ Artefato em {args.output}")
+    print(f"🚀 Sirva com: WINGSAI_FAST_MODEL={args.output} python src/backend/server.py")
+
+    if args.compare:
+        # Amostra diferente da calibração, no tamanho original (o resize entra na latência)
+        images = sample_images(args.compare, args.compare_samples, args.exam_type, seed=1)
+        print(json.dumps(compare_with_eager(args.model, args.output, images, args.exam_type), indent=2))
+
+
+if __name__ == "__main__":
+    main()
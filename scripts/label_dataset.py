@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+SNPQIM - Rotulagem do Dataset de Treino
+Roda o WingsAIQualityAnalyzer (professor) sobre um corpus de imagens e grava
+o índice de rótulos (data_dir/labels.parquet) lido por SnpqimTrainer
+
+Incremental: imagens cujo hash de conteúdo já foi rotulado com o
+ANALYZER_VERSION atual são puladas.
+
+Exemplos:
+    python scripts/label_dataset.py data/images --data-dir data
+    python scripts/label_dataset.py manifest.csv --data-dir data --workers 8
+
+    # 4 jobs independentes (ex: 4 máquinas com o mesmo data_dir compartilhado)
+    python scripts/label_dataset.py data/images --data-dir data --shard 0/4 --no-index
+    ...
+    python scripts/label_dataset.py --data-dir data --index-only
+"""
+
+import sys
+import os
+import json
+import argparse
+import logging
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.data.labeling import LabelingPipeline, build_label_index
+from ml.scoring.bulk import iter_inputs
+from ml.scoring.thread_budget import available_cpus
+from ml.scoring.wingsai_core import ANALYZER_VERSION
+
+
+def parse_shard(value: str):
+    index, count = (int(part) for part in value.split('/'))
+    return index, count
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Rotulagem do dataset SNPQIM com o analyzer WingsAI")
+    parser.add_argument('source', nargs='?',
+                        help="Diretório, padrão glob ou manifesto (.txt / .csv com coluna path)")
+    parser.add_argument('--data-dir', required=True,
+                        help="Diretório do dataset de treino (recebe labels.parquet)")
+    parser.add_argument('--pattern', default=None,
+                        help="Padrão glob dentro do diretório (padrão: extensões de imagem)")
+    parser.add_argument('--exam-type', default='fundoscopy',
+                        choices=['fundoscopy', 'oct', 'angiography'])
+    parser.add_argument('--workers', type=int, default=available_cpus(),
+                        help="Processos de scoring")
+    parser.add_argument('--threads', type=int, default=1,
+                        help="Threads OpenCV/BLAS por processo")
+    parser.add_argument('--read-threads', type=int, default=4,
+                        help="Threads de leitura + hash")
+    parser.add_argument('--prefetch', type=int, default=4,
+                        help="Imagens em voo por worker")
+    parser.add_argument('--row-group-size', type=int, default=1024,
+                        help="Linhas por parte commitada")
+    parser.add_argument('--shard', type=parse_shard, default=(0, 1),
+                        help="Shard deste job como i/N (padrão: 0/1)")
+    parser.add_argument('--no-index', action='store_true',
+                        help="Não consolida labels.parquet ao final (jobs em shards)")
+    parser.add_argument('--index-only', action='store_true',
+                        help="Só consolida labels.parquet a partir das partes existentes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.index_only:
+        rows = build_label_index(args.data_dir)
+        print(f"✅ labels.parquet com {rows} imagens")
+        return
+    if not args.source:
+        parser.error("source é obrigatório (exceto com --index-only)")
+
+    shard_index, num_shards = args.shard
+    print("=" * 60)
+    print("🏷️  SNPQIM - Rotulagem do Dataset")
+    print("=" * 60)
+    print(f"📂 Entrada: {args.source}")
+    print(f"💾 Dataset: {args.data_dir}")
+    print(f"🔖 Analyzer {ANALYZER_VERSION}, shard {shard_index}/{num_shards}")
+    print(f"⚙️  {args.workers} workers x {args.threads} threads, prefetch {args.prefetch}")
+
+    pipeline = LabelingPipeline(
+        args.data_dir,
+        workers=args.workers,
+        threads_per_worker=args.threads,
+        read_threads=args.read_threads,
+        prefetch=args.prefetch,
+        row_group_size=args.row_group_size,
+        shard_index=shard_index,
+        num_shards=num_shards,
+        build_index=not args.no_index
+    )
+    stats = pipeline.run(iter_inputs(args.source, args.exam_type, args.pattern))
+
+    print(f"\n✅ Concluído: {stats['labeled']} rotuladas, {stats['reused']} reaproveitadas, "
+          f"{stats['unchanged']} sem mudança, {stats['errors']} erros")
+    if stats['images_per_second']:
+        print(f"⚡ {stats['images_per_second']:.1f} imagens/s em {stats['seconds']:.1f}s")
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+WingsAI - Gerador de Carga HTTP para a API
+Dispara /api/v1/analyze e /api/v1/analyze/batch com concorrência e taxa de
+chegada configuráveis e reporta percentis de latência, throughput, taxa de
+erros e snapshots de /api/v1/metrics do servidor.
+
+Exemplos:
+    # Sobe uvicorn local e roda 60s com 8 clientes simultâneos
+    python scripts/load_test_api.py --start-server --concurrency 8 --duration 60
+
+    # Carga em malha aberta: 5 req/s (chegadas Poisson), até 32 em voo
+    python scripts/load_test_api.py --rate 5 --concurrency 32 --duration 120
+
+    # Endpoint de batch com 10 imagens por requisição
+    python scripts/load_test_api.py --endpoint batch --batch-size 10
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import cv2
+import httpx
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = Path(SCRIPTS_DIR).parent
+sys.path.insert(0, SCRIPTS_DIR)
+
+from create_test_images import TestImageGenerator
+
+
+class LoadTestResult:
+    """Acumula resultados das requisições da carga"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.status_codes: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.images_ok = 0
+        self.health_latencies: List[float] = []
+        self.metrics_snapshots: List[Dict] = []
+
+    def record(self, latency: float, status: Optional[int], images: int, error: str = None):
+        self.latencies.append(latency)
+        key = str(status) if status is not None else 'connection_error'
+        self.status_codes[key] = self.status_codes.get(key, 0) + 1
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        elif status is not None and status < 400:
+            self.images_ok += images
+
+    @property
+    def total(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def failed(self) -> int:
+        return sum(
+            count for code, count in self.status_codes.items()
+            if code == 'connection_error' or int(code) >= 400
+        )
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Percentis em milissegundos"""
+    if not values:
+        return {k: None for k in ['p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms', 'mean_ms']}
+    array = np.array(values) * 1000
+    return {
+        'p50_ms': float(np.percentile(array, 50)),
+        'p90_ms': float(np.percentile(array, 90)),
+        'p95_ms': float(np.percentile(array, 95)),
+        'p99_ms': float(np.percentile(array, 99)),
+        'max_ms': float(array.max()),
+        'mean_ms': float(array.mean())
+    }
+
+
+def build_payload_images(size: int, exam_type: str, count: int = 4) -> List[bytes]:
+    """Gera algumas imagens PNG sintéticas para alternar entre requisições"""
+    images = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generator = TestImageGenerator(output_dir=tmp_dir)
+        for seed in range(count):
+            np.random.seed(seed)
+            if exam_type == 'oct':
+                image = generator.create_oct_image((size, size), quality='medium')
+            else:
+                image = generator.create_fundus_image((size, size), quality='medium')
+            image_bgr = cv2.cvtColor((image * 255).astype(np.uint8), cv2.COLOR_RGB2BGR)
+            ok, encoded = cv2.imencode('.png', image_bgr)
+            if ok:
+                images.append(encoded.tobytes())
+    return images
+
+
+def start_local_server(port: int, workers: int = 1) -> subprocess.Popen:
+    """Sobe uvicorn local apontando para src/backend/main.py"""
+    cmd = [
+        sys.executable, '-m', 'uvicorn', 'main:app',
+        '--app-dir', str(PROJECT_ROOT / 'src' / 'backend'),
+        '--host', '127.0.0.1', '--port', str(port),
+        '--log-level', 'warning'
+    ]
+    if workers > 1:
+        cmd += ['--workers', str(workers)]
+    return subprocess.Popen(cmd, cwd=str(PROJECT_ROOT))
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, base_url: str, timeout: float = 60):
+    """Aguarda /health responder"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get(f"{base_url}/health", timeout=2)
+            if response.status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"API não respondeu em {base_url} após {timeout:.0f}s")
+
+
+async def fetch_metrics(client: httpx.AsyncClient, base_url: str) -> Optional[Dict]:
+    """Snapshot de /api/v1/metrics (None se indisponível)"""
+    try:
+        response = await client.get(f"{base_url}/api/v1/metrics", timeout=10)
+        if response.status_code == 200:
+            return response.json()
+    except httpx.HTTPError:
+        pass
+    return None
+
+
+class LoadGenerator:
+    """Dispara requisições em malha fechada (concorrência) ou aberta (taxa)"""
+
+    def __init__(self, args: argparse.Namespace, images: List[bytes]):
+        self.args = args
+        self.images = images
+        self.base_url = args.url.rstrip('/')
+        self.result = LoadTestResult()
+        self._counter = 0
+
+    def _next_images(self) -> List[bytes]:
+        count = self.args.batch_size if self.args.endpoint == 'batch' else 1
+        selected = []
+        for _ in range(count):
+            selected.append(self.images[self._counter % len(self.images)])
+            self._counter += 1
+        return selected
+
+    async def send_one(self, client: httpx.AsyncClient, arrival: Optional[float] = None):
+        """
+        Envia uma requisição e registra latência/status
+
+        Args:
+            arrival: Chegada agendada (perf_counter) na malha aberta; a latência
+                conta a partir dela, incluindo a espera por --concurrency
+        """
+        images = self._next_images()
+        data = {'exam_type': self.args.exam_type}
+
+        if self.args.endpoint == 'batch':
+            url = f"{self.base_url}/api/v1/analyze/batch"
+            files = [('files', (f'img_{i}.png', img, 'image/png')) for i, img in enumerate(images)]
+        else:
+            url = f"{self.base_url}/api/v1/analyze"
+            files = {'file': ('img.png', images[0], 'image/png')}
+
+        start = arrival if arrival is not None else time.perf_counter()
+        try:
+            response = await client.post(url, files=files, data=data, timeout=self.args.timeout)
+            self.result.record(time.perf_counter() - start, response.status_code, len(images))
+        except httpx.HTTPError as e:
+            self.result.record(time.perf_counter() - start, None, len(images), type(e).__name__)
+
+    async def closed_loop(self, client: httpx.AsyncClient, deadline: float, budget: List[int]):
+        """Um cliente que envia a próxima requisição assim que a anterior termina"""
+        while time.monotonic() < deadline and budget[0] > 0:
+            budget[0] -= 1
+            await self.send_one(client)
+
+    async def open_loop(self, client: httpx.AsyncClient, deadline: float, budget: List[int]):
+        """
+        Chegadas Poisson com taxa fixa, limitadas por --concurrency em voo
+
+        A latência é medida a partir da chegada agendada, não de quando a
+        requisição sai: a fila atrás de --concurrency entra nos percentis
+        (sem coordinated omission).
+        """
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        tasks = []
+
+        async def guarded(arrival: float):
+            async with semaphore:
+                await self.send_one(client, arrival)
+
+        # Agenda absoluto: atrasos do próprio loop não empurram as chegadas seguintes
+        arrival = time.perf_counter()
+        while time.monotonic() < deadline and budget[0] > 0:
+            budget[0] -= 1
+            tasks.append(asyncio.create_task(guarded(arrival)))
+            arrival += random.expovariate(self.args.rate)
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+
+        await asyncio.gather(*tasks)
+
+    async def health_probe(self, client: httpx.AsyncClient, stop: asyncio.Event):
+        """
+        Latência de /health durante a carga: se subir junto com a carga,
+        o event loop do servidor está sendo bloqueado por trabalho síncrono
+        """
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                response = await client.get(f"{self.base_url}/health", timeout=self.args.timeout)
+                if response.status_code == 200:
+                    self.result.health_latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                pass
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.args.probe_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def metrics_poller(self, client: httpx.AsyncClient, stop: asyncio.Event):
+        """Coleta snapshots periódicos de /api/v1/metrics"""
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.args.metrics_interval)
+            except asyncio.TimeoutError:
+                snapshot = await fetch_metrics(client, self.base_url)
+                if snapshot:
+                    self.result.metrics_snapshots.append(snapshot)
+
+    async def run(self) -> Dict:
+        limits = httpx.Limits(max_connections=self.args.concurrency + 4)
+        async with httpx.AsyncClient(limits=limits) as client:
+            await wait_until_healthy(client, self.base_url, self.args.startup_timeout)
+
+            before = await fetch_metrics(client, self.base_url)
+            budget = [self.args.requests if self.args.requests else float('inf')]
+            stop = asyncio.Event()
+            background = [
+                asyncio.create_task(self.health_probe(client, stop)),
+                asyncio.create_task(self.metrics_poller(client, stop))
+            ]
+
+            start = time.perf_counter()
+            deadline = time.monotonic() + self.args.duration
+
+            if self.args.rate:
+                await self.open_loop(client, deadline, budget)
+            else:
+                await asyncio.gather(*[
+                    self.closed_loop(client, deadline, budget)
+                    for _ in range(self.args.concurrency)
+                ])
+
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await asyncio.gather(*background)
+            after = await fetch_metrics(client, self.base_url)
+
+        return self._report(elapsed, before, after)
+
+    def _report(self, elapsed: float, before: Optional[Dict], after: Optional[Dict]) -> Dict:
+        result = self.result
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'config': {
+                'url': self.base_url,
+                'endpoint': self.args.endpoint,
+                'mode': 'open_loop' if self.args.rate else 'closed_loop',
+                'concurrency': self.args.concurrency,
+                'rate': self.args.rate,
+                'batch_size': self.args.batch_size if self.args.endpoint == 'batch' else 1,
+                'image_size': self.args.image_size,
+                'exam_type': self.args.exam_type
+            },
+            'duration_seconds': elapsed,
+            'requests': {
+                'total': result.total,
+                'failed': result.failed,
+                'error_rate': result.failed / result.total if result.total else 0.0,
+                'status_codes': result.status_codes,
+                'client_errors': result.errors
+            },
+            'throughput': {
+                'requests_per_second': result.total / elapsed if elapsed else 0.0,
+                'images_per_second': result.images_ok / elapsed if elapsed else 0.0
+            },
+            'latency': percentiles(result.latencies),
+            'health_probe_latency': percentiles(result.health_latencies),
+            'server_metrics': {
+                'before': before,
+                'after': after,
+                'timeline': result.metrics_snapshots
+            }
+        }
+
+
+def print_report(report: Dict):
+    """Imprime resumo legível do relatório"""
+    latency = report['latency']
+    health = report['health_probe_latency']
+    requests = report['requests']
+
+    print(f"\n📊 RESULTADOS ({report['config']['mode']}, {report['duration_seconds']:.1f}s)")
+    print(f"{'─' * 60}")
+    print(f"  Requisições: {requests['total']} | Falhas: {requests['failed']} "
+          f"({requests['error_rate'] * 100:.1f}%)")
+    print(f"  Status: {requests['status_codes']}")
+    print(f"  Throughput: {report['throughput']['requests_per_second']:.2f} req/s | "
+          f"{report['throughput']['images_per_second']:.2f} img/s")
+    if latency['p50_ms'] is not None:
+        print(f"  Latência: p50={latency['p50_ms']:.0f}ms p95={latency['p95_ms']:.0f}ms "
+              f"p99={latency['p99_ms']:.0f}ms max={latency['max_ms']:.0f}ms")
+    if health['p50_ms'] is not None:
+        print(f"  /health durante carga: p50={health['p50_ms']:.0f}ms "
+              f"p99={health['p99_ms']:.0f}ms max={health['max_ms']:.0f}ms")
+
+    after = report['server_metrics']['after']
+    if after:
+        lag = after.get('event_loop_lag', {})
+        if lag.get('max_seconds') is not None:
+            print(f"  Lag do event loop (servidor): max={lag['max_seconds'] * 1000:.0f}ms "
+                  f"p99≈{(lag.get('p99_seconds') or 0) * 1000:.0f}ms")
+    print(f"{'─' * 60}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Gerador de carga HTTP para a API WingsAI")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="URL base da API")
+    parser.add_argument('--start-server', action='store_true',
+                        help="Sobe uvicorn local (src/backend/main.py) durante o teste")
+    parser.add_argument('--server-workers', type=int, default=1,
+                        help="Workers do uvicorn quando --start-server")
+    parser.add_argument('--endpoint', choices=['analyze', 'batch'], default='analyze')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Clientes simultâneos (ou máximo em voo com --rate)")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="Taxa de chegada em req/s (malha aberta, Poisson)")
+    parser.add_argument('--duration', type=float, default=30.0, help="Duração em segundos")
+    parser.add_argument('--requests', type=int, default=None,
+                        help="Número máximo de requisições (opcional)")
+    parser.add_argument('--batch-size', type=int, default=10,
+                        help="Imagens por requisição no endpoint batch")
+    parser.add_argument('--image-size', type=int, default=512, help="Lado das imagens (px)")
+    parser.add_argument('--exam-type', default='fundoscopy',
+                        choices=['fundoscopy', 'oct', 'angiography'])
+    parser.add_argument('--timeout', type=float, default=120.0, help="Timeout por requisição")
+    parser.add_argument('--probe-interval', type=float, default=0.5,
+                        help="Intervalo entre probes de /health")
+    parser.add_argument('--metrics-interval', type=float, default=5.0,
+                        help="Intervalo entre snapshots de /api/v1/metrics")
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    parser.add_argument('--output', default=None, help="Arquivo JSON para o relatório")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 60)
+    print("🚦 WingsAI - Teste de Carga da API")
+    print("=" * 60)
+
+    print(f"\n🖼️  Gerando imagens sintéticas ({args.image_size}px)...")
+    images = build_payload_images(args.image_size, args.exam_type)
+
+    server = None
+    if args.start_server:
+        port = httpx.URL(args.url).port or 8000
+        print(f"🚀 Iniciando uvicorn local na porta {port}...")
+        server = start_local_server(port, args.server_workers)
+
+    try:
+        report = asyncio.run(LoadGenerator(args, images).run())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Relatório salvo em: {args.output}")
+
+    return 0 if report['requests']['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,7 @@ Testa o algoritmo de scoring de qualidade sem necessidade de infraestrutura
 import sys
 import os
 import json
+import time
 from pathlib import Path
 import numpy as np
 import cv2
@@ -22,10 +23,16 @@ from ml.scoring.wingsai_core import analyze_image_quality, WingsAIScore
 class WingsAITester:
     """Classe para facilitar testes do sistema WingsAI"""
 
-    def __init__(self, output_dir: str = "results"):
+    def __init__(self, output_dir: str = "results", store_dir: Optional[str] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
 
+        # Histórico colunar opcional (gravação assíncrona)
+        self.store = None
+        if store_dir:
+            from ml.scoring.result_store import ResultStore
+            self.store = ResultStore(store_dir)
+
     def load_image(self, image_path: str) -> Optional[np.ndarray]:
         """Carrega imagem de arquivo"""
         try:
@@ -70,7 +77,13 @@ class WingsAITester:
 
         # Análise WingsAI
         print("⚙️  Executando análise WingsAI...")
+        start = time.perf_counter()
         score = analyze_image_quality(image, exam_type, metadata)
+        if self.store is not None:
+            self.store.append(
+                score, str(image_path), exam_type, source='cli',
+                shape=image.shape, seconds=time.perf_counter() - start
+            )
 
         # Exibe resultados
         self._print_results(score)
@@ -112,6 +125,12 @@ class WingsAITester:
         # Salva resumo do batch
         self._save_batch_summary(results)
 
+    def close(self):
+        """Grava os scores pendentes no histórico"""
+        if self.store is not None:
+            self.store.close()
+            print(f"🗄️  Histórico atualizado: {self.store.root} ({self.store.stats['written']} registros)")
+
     def _print_results(self, score: WingsAIScore):
         """Imprime resultados formatados"""
 
@@ -133,7 +152,7 @@ class WingsAITester:
 
         # Recomendações
         print(f"\n💡 Recomendações:")
-        for i, rec in enumerate(score.recommendations, 1):
+        for i, rec in enumerate(score.render_recommendations(), 1):
             print(f"  {i}. {rec}")
 
         print(f"{'─'*60}\n")
@@ -166,7 +185,7 @@ class WingsAITester:
             'ml_readiness': score.ml_readiness,
             'clinical_adequacy': score.clinical_adequacy,
             'dimension_scores': score.dimension_scores,
-            'recommendations': score.recommendations,
+            'recommendations': score.render_recommendations(),
             'metadata': score.metadata,
             'analysis_timestamp': datetime.now().isoformat()
         }
@@ -220,14 +239,21 @@ def main():
     print("🏥 WingsAI - Sistema de Análise de Qualidade de Imagens")
     print("="*60)
 
+    # Histórico colunar opcional: --store=<diretório>
+    store_dir = None
+    for arg in sys.argv:
+        if arg.startswith("--store="):
+            store_dir = arg.split("=", 1)[1]
+
     # Inicializa tester
-    tester = WingsAITester()
+    tester = WingsAITester(store_dir=store_dir)
 
     # Verifica argumentos
     if len(sys.argv) < 2:
         print("\n📝 Uso:")
         print("  python scripts/test_wingsai.py <imagem>              # Analisa uma imagem")
         print("  python scripts/test_wingsai.py <diretório> --batch   # Analisa múltiplas imagens")
+        print("  ... --store=results/history                           # Grava no histórico de scores")
         print("\nExemplos:")
         print("  python scripts/test_wingsai.py examples/fundus_01.png")
         print("  python scripts/test_wingsai.py examples/ --batch")
@@ -237,6 +263,7 @@ def main():
         if examples_dir.exists():
             print(f"\n💡 Encontrado diretório examples/, executando análise batch...")
             tester.analyze_batch("examples", pattern="*.png")
+            tester.close()
         else:
             print(f"\n⚠️  Diretório examples/ não encontrado. Crie imagens de teste primeiro.")
             print(f"    Execute: python scripts/create_test_images.py")
@@ -263,6 +290,8 @@ def main():
 
         tester.analyze_single_image(path, exam_type=exam_type)
 
+    tester.close()
+
 
 if __name__ == "__main__":
     main()
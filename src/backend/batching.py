@@ -0,0 +1,236 @@
+"""
+WingsAI - Micro-batching da Engine Rápida
+
+Um forward da CNN com uma imagem desperdiça a vetorização e o paralelismo
+intra-op do torch. MicroBatcher junta as requisições engine=fast
+concorrentes de /api/v1/analyze em uma fila e roda um único forward
+(FastQualityScorer.predict, sob torch.inference_mode) quando:
+
+- a fila chega a max_batch_size imagens, ou
+- a primeira imagem do batch espera max_wait_ms
+
+O forward roda em uma thread (o event loop segue recebendo requisições, que
+formam o próximo batch) e cada requisição recebe o seu score por um Future.
+Sob carga baixa o custo é no máximo max_wait_ms de espera; sob carga alta o
+batch enche antes do prazo.
+
+Configuração por variáveis de ambiente:
+    WINGSAI_FAST_MAX_BATCH    (padrão 16)  imagens por forward
+    WINGSAI_FAST_MAX_WAIT_MS  (padrão 5)   espera máxima pelo batch
+
+Métricas (expostas em /api/v1/metrics): distribuição do tamanho dos batches,
+motivo do disparo, espera na fila e duração do forward.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.metrics import LatencyHistogram
+
+# Buckets (segundos) para espera na fila e forward, mais finos que LATENCY_BUCKETS
+BATCH_LATENCY_BUCKETS = [
+    0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+]
+
+
+@dataclass(frozen=True)
+class BatchingConfig:
+    """Limites do micro-batching (max_wait_ms=0: só junta o que já está na fila)"""
+    max_batch_size: int = 16
+    max_wait_ms: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> 'BatchingConfig':
+        """Lê WINGSAI_FAST_MAX_BATCH e WINGSAI_FAST_MAX_WAIT_MS"""
+        defaults = cls()
+        return cls(
+            max_batch_size=max(1, int(os.environ.get('WINGSAI_FAST_MAX_BATCH', defaults.max_batch_size))),
+            max_wait_ms=max(0.0, float(os.environ.get('WINGSAI_FAST_MAX_WAIT_MS', defaults.max_wait_ms)))
+        )
+
+
+class BatchingMetrics:
+    """Tamanho dos batches, espera na fila e forward (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.images = 0
+        self.errors = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self.flush_reasons = {'full': 0, 'timeout': 0}
+        self.queue_delay = LatencyHistogram(BATCH_LATENCY_BUCKETS)
+        self.forward = LatencyHistogram(BATCH_LATENCY_BUCKETS)
+
+    def observe_batch(self, size: int, reason: str, queue_delays: List[float], forward_seconds: float):
+        with self._lock:
+            self.batches += 1
+            self.images += size
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+            self.flush_reasons[reason] += 1
+            for delay in queue_delays:
+                self.queue_delay.observe(delay)
+            self.forward.observe(forward_seconds)
+
+    def observe_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> Dict:
+        """Estado atual serializável"""
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'images': self.images,
+                'errors': self.errors,
+                'mean_batch_size': self.images / self.batches if self.batches else None,
+                'batch_sizes': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                'flush_reasons': dict(self.flush_reasons),
+                'queue_delay': self.queue_delay.snapshot(),
+                'forward': self.forward.snapshot()
+            }
+
+
+@dataclass
+class _Pending:
+    image: np.ndarray
+    exam_type: str
+    metadata: Optional[Dict]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """
+    Fila de micro-batching sobre um FastQualityScorer
+
+    Args:
+        engine: FastQualityScorer carregado
+        config: Limites de tamanho e espera do batch
+
+    Uso (dentro do event loop):
+        batcher = MicroBatcher(engine, BatchingConfig.from_env())
+        batcher.start()
+        score = await batcher.submit(image, 'fundoscopy', metadata)
+        await batcher.stop()
+    """
+
+    def __init__(self, engine, config: Optional[BatchingConfig] = None):
+        self.engine = engine
+        self.config = config or BatchingConfig()
+        self.metrics = BatchingMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: List[_Pending] = []
+
+    def start(self):
+        """Cria a fila e a tarefa de despacho no event loop atual"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancela o despacho e falha as requisições na fila e no forward em curso"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        pending_items = self._inflight
+        while not self._queue.empty():
+            pending_items.append(self._queue.get_nowait())
+        self._inflight = []
+        for pending in pending_items:
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError("Micro-batching encerrado"))
+
+    async def submit(self, image: np.ndarray, exam_type: str = 'fundoscopy', metadata: Optional[Dict] = None):
+        """Enfileira uma imagem RGB e espera o WingsAIScore do batch em que ela entrar"""
+        if self._task is None:
+            raise RuntimeError("MicroBatcher não iniciado")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending(image, exam_type, metadata, future))
+        return await future
+
+    def info(self) -> Dict:
+        return {
+            'max_batch_size': self.config.max_batch_size,
+            'max_wait_ms': self.config.max_wait_ms,
+            'queued': self._queue.qsize() if self._queue is not None else 0
+        }
+
+    async def _collect(self) -> tuple:
+        """Próximo batch: espera a primeira imagem e junta as seguintes até o limite ou o prazo"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.max_wait_ms / 1000
+        while len(batch) < self.config.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        reason = 'full' if len(batch) >= self.config.max_batch_size else 'timeout'
+        return batch, reason
+
+    async def _run(self):
+        while True:
+            batch, reason = await self._collect()
+            # Requisições canceladas (cliente desconectou) não entram no forward
+            batch = [pending for pending in batch if not pending.future.done()]
+            if not batch:
+                continue
+            dispatched_at = time.perf_counter()
+            queue_delays = [dispatched_at - pending.enqueued_at for pending in batch]
+            self._inflight = batch
+            try:
+                scores = await asyncio.to_thread(self._score, batch)
+            except Exception as e:
+                # Uma imagem ruim não derruba o batch: refaz uma a uma
+                self.metrics.observe_error()
+                if len(batch) == 1:
+                    scores = [e]
+                else:
+                    scores = [await self._score_single(pending) for pending in batch]
+            self._inflight = []
+            self.metrics.observe_batch(len(batch), reason, queue_delays, time.perf_counter() - dispatched_at)
+
+            for pending, score in zip(batch, scores):
+                if pending.future.done():
+                    continue
+                if isinstance(score, Exception):
+                    pending.future.set_exception(score)
+                else:
+                    pending.future.set_result(score)
+
+    def _score(self, batch: List[_Pending]) -> list:
+        """Um forward para o batch inteiro (roda fora do event loop)"""
+        start = time.perf_counter()
+        predictions = self.engine.predict([pending.image for pending in batch])
+        per_image = (time.perf_counter() - start) / len(batch)
+        return self.engine.scores_from_predictions(
+            predictions,
+            [pending.exam_type for pending in batch],
+            [pending.metadata for pending in batch],
+            per_image
+        )
+
+    async def _score_single(self, pending: _Pending):
+        try:
+            return (await asyncio.to_thread(self._score, [pending]))[0]
+        except Exception as e:
+            return e
@@ -3,7 +3,7 @@ WingsAI - Backend API Principal
 FastAPI REST API para análise de qualidade de imagens médicas
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from typing import Optional, List
@@ -11,10 +11,13 @@ import uvicorn
 import numpy as np
 import cv2
 from datetime import datetime
+import asyncio
+import time
 import sys
 import os
 import traceback
 import logging
+import random
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -28,20 +31,45 @@ if src_dir not in sys.path:
     logger.info(f"Adicionado ao path: {src_dir}")
 
 try:
-    from ml.scoring.wingsai_core import analyze_image_quality
+    from ml.scoring.wingsai_core import (
+        analyze_image_quality, get_default_analyzer, resolve_fields,
+        ANALYZER_VERSION, DIMENSION_NAMES, OUTPUT_FIELDS
+    )
     logger.info("✅ Módulo wingsai_core importado com sucesso")
 except Exception as e:
     logger.error(f"❌ Erro ao importar wingsai_core: {e}")
     logger.error(f"   sys.path: {sys.path}")
     raise
 
+from backend.batching import BatchingConfig, MicroBatcher
+from backend.metrics import ServiceMetrics, monitor_event_loop_lag
+from backend.schemas import AnalyzeResponse, BatchResponse
+from backend.serialization import FastJSONResponse, round_score, round_scores, score_statistics
+from backend.upload_limits import RequestSizeLimitMiddleware, UploadLimits, read_upload
+from ml.scoring.recommendation_catalog import (
+    DEFAULT_LOCALE, SUPPORTED_LOCALES, render_recommendations, resolve_locale
+)
+from ml.scoring.thread_budget import current_thread_settings
+
+# Histórico colunar de scores (desativado se a variável não estiver definida)
+RESULT_STORE_ENV_VAR = 'WINGSAI_RESULT_STORE'
+
+# Engine rápida (modelo destilado, ver scripts/distill_fast_scorer.py)
+FAST_MODEL_ENV_VAR = 'WINGSAI_FAST_MODEL'
+# Fração das requisições engine=reference também pontuadas pela engine rápida
+# para medir a concordância online (custo: um forward da CNN, via micro-batcher)
+FAST_AGREEMENT_RATE_ENV_VAR = 'WINGSAI_FAST_AGREEMENT_RATE'
+DEFAULT_FAST_AGREEMENT_RATE = '0.05'
+ENGINES = ('reference', 'fast')
+
 # Inicializa FastAPI
 app = FastAPI(
     title="WingsAI API",
     description="Sistema Nacional de Qualidade de Imagens Médicas - API REST",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse
 )
 
 # CORS - permite acesso de qualquer origem (para desenvolvimento)
@@ -53,6 +81,266 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Limites de upload (WINGSAI_MAX_FILE_MB, WINGSAI_MAX_REQUEST_MB, WINGSAI_MAX_IMAGE_MEGAPIXELS)
+upload_limits = UploadLimits.from_env()
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=upload_limits.max_request_bytes)
+
+# Métricas do servidor (expostas em /api/v1/metrics)
+service_metrics = ServiceMetrics()
+# Rótulo único para requisições sem rota (404 de scanners não criam novas entradas)
+UNMATCHED_ROUTE_LABEL = "<unmatched>"
+
+
+@app.on_event("startup")
+async def start_metrics_monitor():
+    """Inicia monitor de lag do event loop"""
+    app.state.loop_lag_task = asyncio.create_task(
+        monitor_event_loop_lag(service_metrics)
+    )
+
+
+@app.on_event("startup")
+async def open_result_store():
+    """
+    Abre o histórico de scores (WINGSAI_RESULT_STORE)
+
+    Roda em cada worker após o fork: a thread de gravação não sobrevive ao fork.
+    """
+    app.state.result_store = None
+    root = os.environ.get(RESULT_STORE_ENV_VAR)
+    if root:
+        from ml.scoring.result_store import ResultStore
+        app.state.result_store = ResultStore(root)
+        logger.info(f"🗄️  Histórico de scores em {root}")
+
+
+@app.on_event("startup")
+async def load_fast_engine():
+    """
+    Carrega a engine rápida (WINGSAI_FAST_MODEL) em cada worker
+
+    Sem a variável, ou se o modelo não carregar, só a engine de referência
+    fica disponível. Com o modelo carregado, /api/v1/analyze passa pelo
+    micro-batching (WINGSAI_FAST_MAX_BATCH, WINGSAI_FAST_MAX_WAIT_MS).
+    """
+    app.state.fast_engine = None
+    app.state.batcher = None
+    app.state.agreement = None
+    app.state.agreement_tasks = set()
+    app.state.agreement_rate = float(os.environ.get(FAST_AGREEMENT_RATE_ENV_VAR, DEFAULT_FAST_AGREEMENT_RATE))
+    model_path = os.environ.get(FAST_MODEL_ENV_VAR)
+    if not model_path:
+        return
+    try:
+        from ml.scoring.fast_engine import AgreementTracker, FastQualityScorer
+        app.state.fast_engine = FastQualityScorer(model_path)
+        app.state.agreement = AgreementTracker()
+        app.state.batcher = MicroBatcher(app.state.fast_engine, BatchingConfig.from_env())
+        app.state.batcher.start()
+        logger.info(f"⚡ Engine rápida carregada de {model_path} (micro-batching: {app.state.batcher.info()})")
+    except Exception as e:
+        app.state.fast_engine = None
+        logger.error(f"❌ Engine rápida indisponível ({model_path}): {type(e).__name__}: {e}")
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    """Encerra o micro-batching da engine rápida (e as comparações de concordância pendentes)"""
+    for task in list(getattr(app.state, "agreement_tasks", ())):
+        task.cancel()
+    batcher = getattr(app.state, "batcher", None)
+    if batcher is not None:
+        await batcher.stop()
+
+
+@app.on_event("shutdown")
+async def close_result_store():
+    """Grava os scores pendentes do histórico"""
+    store = getattr(app.state, "result_store", None)
+    if store is not None:
+        store.close()
+
+
+def record_score(
+    score, filename: Optional[str], exam_type: str, shape, seconds: float, source: str = 'api'
+):
+    """Enfileira o score no histórico, se configurado (não bloqueia a requisição)"""
+    store = getattr(app.state, "result_store", None)
+    if store is not None:
+        store.append(score, filename, exam_type, source=source, shape=shape, seconds=seconds)
+
+
+def resolve_engine(engine: str, exam_type: str):
+    """
+    Valida a engine pedida
+
+    Returns:
+        FastQualityScorer para engine=fast, None para a referência
+
+    Raises:
+        HTTPException 400 (engine/tipo de exame inválido) ou 503 (engine rápida não carregada)
+    """
+    if engine not in ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"engine inválida: {engine}. Use: {', '.join(ENGINES)}"
+        )
+    if engine == 'reference':
+        return None
+
+    fast_engine = getattr(app.state, "fast_engine", None)
+    if fast_engine is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Engine rápida indisponível. Defina {FAST_MODEL_ENV_VAR}."
+        )
+    if not fast_engine.supports(exam_type):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Engine rápida não treinada para {exam_type} "
+                   f"(disponível: {', '.join(fast_engine.exam_types)})"
+        )
+    return fast_engine
+
+
+def track_agreement(image: np.ndarray, exam_type: str, reference_score, field_list: Optional[List[str]]):
+    """
+    Pontua uma amostra das análises de referência completas também com a engine rápida
+
+    A comparação roda numa tarefa em segundo plano: a resposta de referência
+    não espera o micro-batcher. O forward entra no micro-batcher (fora do
+    event loop, junto com as requisições engine=fast).
+    """
+    fast_engine = getattr(app.state, "fast_engine", None)
+    if (
+        fast_engine is None or field_list is not None or not fast_engine.supports(exam_type)
+        or random.random() >= app.state.agreement_rate
+    ):
+        return
+    # Guarda a referência: o event loop só mantém referências fracas às tarefas
+    task = asyncio.create_task(measure_agreement(image, exam_type, reference_score))
+    app.state.agreement_tasks.add(task)
+    task.add_done_callback(app.state.agreement_tasks.discard)
+
+
+async def measure_agreement(image: np.ndarray, exam_type: str, reference_score):
+    """Compara o score da engine rápida com o de referência (tarefa de track_agreement)"""
+    try:
+        fast_score = await app.state.batcher.submit(image, exam_type)
+        app.state.agreement.update(fast_score, reference_score)
+    except Exception as e:
+        logger.warning(f"⚠️  Falha ao medir concordância da engine rápida: {e}")
+
+
+@app.middleware("http")
+async def collect_request_metrics(request: Request, call_next):
+    """Registra latência e status de cada requisição"""
+    service_metrics.request_started()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Usa o template da rota para não explodir a cardinalidade
+        route = request.scope.get("route")
+        path = getattr(route, "path", UNMATCHED_ROUTE_LABEL)
+        service_metrics.request_finished(path, status_code, time.perf_counter() - start)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Converte o parâmetro `fields` (separado por vírgula) em lista validada
+
+    Raises:
+        HTTPException 400 se algum campo for desconhecido
+    """
+    if fields is None or not fields.strip():
+        return None
+
+    field_list = [f.strip() for f in fields.split(',') if f.strip()]
+    try:
+        resolve_fields(field_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return field_list
+
+
+RECOMMENDATION_FORMATS = ('text', 'codes')
+
+
+def parse_recommendation_options(locale: Optional[str], recommendation_format: str) -> tuple:
+    """
+    Valida idioma e formato das recomendações
+
+    Raises:
+        HTTPException 400 se o idioma ou o formato forem inválidos
+    """
+    if recommendation_format not in RECOMMENDATION_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"recommendation_format inválido: {recommendation_format}. "
+                   f"Use: {', '.join(RECOMMENDATION_FORMATS)}"
+        )
+    try:
+        return resolve_locale(locale), recommendation_format == 'codes'
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def requested_keys(field_list: Optional[List[str]]) -> tuple:
+    """Retorna (saídas pedidas, dimensões pedidas) para montar a resposta"""
+    if field_list is None:
+        return set(OUTPUT_FIELDS), set(DIMENSION_NAMES)
+
+    outputs = {f for f in field_list if f in OUTPUT_FIELDS}
+    dimensions = set()
+    for f in field_list:
+        if f == 'dimension_scores':
+            dimensions.update(DIMENSION_NAMES)
+        elif f.startswith('dimension_scores.'):
+            dimensions.add(f.split('.', 1)[1])
+    return outputs, dimensions
+
+
+def score_to_response(
+    score,
+    field_list: Optional[List[str]],
+    locale: str = DEFAULT_LOCALE,
+    codes_only: bool = False
+) -> dict:
+    """
+    Serializa apenas os campos pedidos do WingsAIScore
+
+    Recomendações saem como texto no idioma pedido (renderizado aqui, a partir
+    dos códigos) ou, com codes_only, só como códigos estáveis; os parâmetros
+    das mensagens (tipo de exame) são os da própria requisição.
+    """
+    outputs, dimensions = requested_keys(field_list)
+    result = {}
+
+    if 'global_score' in outputs:
+        result["global_score"] = round_score(score.global_score)
+    if 'confidence' in outputs:
+        result["confidence"] = round_score(score.confidence)
+    if 'ml_readiness' in outputs:
+        result["ml_readiness"] = score.ml_readiness
+    if 'clinical_adequacy' in outputs:
+        result["clinical_adequacy"] = score.clinical_adequacy
+    if dimensions:
+        result["dimension_scores"] = round_scores(score.dimension_scores, dimensions)
+    if 'recommendations' in outputs:
+        codes = score.recommendation_codes
+        if codes_only:
+            result["recommendation_codes"] = [code.key for code in codes]
+        else:
+            result["recommendations"] = render_recommendations(
+                codes, score.exam_type, score.brand, locale
+            )
+
+    return result
+
 
 @app.get("/")
 async def root():
@@ -65,7 +353,9 @@ async def root():
         "endpoints": {
             "health": "/health",
             "analyze": "/api/v1/analyze",
-            "batch_analyze": "/api/v1/analyze/batch"
+            "batch_analyze": "/api/v1/analyze/batch",
+            "engines": "/api/v1/engines",
+            "metrics": "/api/v1/metrics"
         }
     }
 
@@ -80,26 +370,39 @@ async def health_check():
     }
 
 
-@app.post("/api/v1/analyze")
+@app.post("/api/v1/analyze", responses={200: {"model": AnalyzeResponse}})
 async def analyze_image(
     file: UploadFile = File(...),
     exam_type: str = Form("fundoscopy"),
     patient_id: Optional[str] = Form(None),
-    exam_date: Optional[str] = Form(None)
+    exam_date: Optional[str] = Form(None),
+    fields: Optional[str] = Form(None),
+    locale: Optional[str] = Form(None),
+    recommendation_format: str = Form("text"),
+    engine: str = Form("reference")
 ):
     """
     Analisa qualidade de uma única imagem médica
 
     Args:
-        file: Arquivo de imagem (PNG, JPG, DICOM)
+        file: Arquivo de imagem decodificável pelo OpenCV (PNG, JPEG, TIFF, BMP, WebP...)
         exam_type: Tipo de exame (fundoscopy, oct, angiography)
         patient_id: ID do paciente (opcional)
         exam_date: Data do exame (opcional)
+        fields: Campos desejados separados por vírgula, ex:
+            "dimension_scores.sharpness,dimension_scores.artifacts" (opcional)
+        locale: Idioma das recomendações (pt-BR, en; padrão pt-BR)
+        recommendation_format: "text" (mensagens) ou "codes" (apenas códigos)
+        engine: "reference" (analyzer WingsAI) ou "fast" (modelo destilado)
 
     Returns:
         JSON com score de qualidade e recomendações
     """
 
+    field_list = parse_fields(fields)
+    locale, codes_only = parse_recommendation_options(locale, recommendation_format)
+    fast_engine = resolve_engine(engine, exam_type)
+
     try:
         logger.info(f"📥 Recebido arquivo: {file.filename}, tipo: {file.content_type}")
 
@@ -107,12 +410,12 @@ async def analyze_image(
         if not file.content_type.startswith('image/'):
             raise HTTPException(
                 status_code=400,
-                detail=f"Tipo de arquivo inválido: {file.content_type}. Use PNG, JPG ou DICOM."
+                detail=f"Tipo de arquivo inválido: {file.content_type}. Envie uma imagem (PNG, JPEG, TIFF, BMP, WebP...)."
             )
 
-        # Lê arquivo
+        # Valida tamanho e cabeçalho antes de ler o arquivo inteiro
         logger.info("📖 Lendo arquivo...")
-        contents = await file.read()
+        contents = await read_upload(file, upload_limits)
         logger.info(f"✓ Arquivo lido: {len(contents)} bytes")
 
         nparr = np.frombuffer(contents, np.uint8)
@@ -135,6 +438,7 @@ async def analyze_image(
             "content_type": file.content_type,
             "shape": image.shape,
             "exam_type": exam_type,
+            "engine": engine,
             "analysis_timestamp": datetime.now().isoformat()
         }
 
@@ -143,26 +447,34 @@ async def analyze_image(
         if exam_date:
             metadata["exam_date"] = exam_date
 
-        # Executa análise WingsAI
-        logger.info("🔬 Iniciando análise WingsAI...")
-        score = analyze_image_quality(image, exam_type=exam_type, metadata=metadata)
-        logger.info(f"✅ Análise concluída! Score: {score.global_score:.1f}/100")
-
-        # Retorna resultado
-        return {
+        # Executa análise WingsAI (ou o modelo destilado, com engine=fast)
+        logger.info(f"🔬 Iniciando análise WingsAI (engine {engine})...")
+        start = time.perf_counter()
+        if fast_engine is not None:
+            # Micro-batching: um forward para as requisições concorrentes
+            score = await app.state.batcher.submit(image, exam_type, metadata)
+            record_score(score, file.filename, exam_type, image.shape,
+                         time.perf_counter() - start, source='api-fast')
+        else:
+            score = analyze_image_quality(
+                image, exam_type=exam_type, metadata=metadata, fields=field_list
+            )
+            record_score(score, file.filename, exam_type, image.shape, time.perf_counter() - start)
+            track_agreement(image, exam_type, score, field_list)
+        if score.global_score is not None:
+            logger.info(f"✅ Análise concluída! Score: {score.global_score:.1f}/100")
+        else:
+            logger.info(f"✅ Análise parcial concluída: {', '.join(field_list)}")
+
+        # Retorna resultado (FastJSONResponse pula o jsonable_encoder)
+        return FastJSONResponse({
             "success": True,
             "result": {
-                "global_score": round(score.global_score, 2),
-                "confidence": round(score.confidence, 2),
-                "ml_readiness": score.ml_readiness,
-                "clinical_adequacy": score.clinical_adequacy,
-                "dimension_scores": {
-                    k: round(v, 2) for k, v in score.dimension_scores.items()
-                },
-                "recommendations": score.recommendations,
+                **score_to_response(score, field_list, locale, codes_only),
+                "skipped_dimensions": score.skipped_dimensions,
                 "metadata": metadata
             }
-        }
+        })
 
     except HTTPException:
         raise
@@ -181,10 +493,14 @@ async def analyze_image(
         )
 
 
-@app.post("/api/v1/analyze/batch")
+@app.post("/api/v1/analyze/batch", responses={200: {"model": BatchResponse}})
 async def analyze_batch(
     files: List[UploadFile] = File(...),
-    exam_type: str = Form("fundoscopy")
+    exam_type: str = Form("fundoscopy"),
+    fields: Optional[str] = Form(None),
+    locale: Optional[str] = Form(None),
+    recommendation_format: str = Form("text"),
+    engine: str = Form("reference")
 ):
     """
     Analisa múltiplas imagens em batch
@@ -192,6 +508,10 @@ async def analyze_batch(
     Args:
         files: Lista de arquivos de imagem
         exam_type: Tipo de exame
+        fields: Campos desejados separados por vírgula (opcional)
+        locale: Idioma das recomendações (pt-BR, en; padrão pt-BR)
+        recommendation_format: "text" (mensagens) ou "codes" (apenas códigos)
+        engine: "reference" ou "fast" (um único forward para todas as imagens)
 
     Returns:
         JSON com resultados de todas as imagens
@@ -203,13 +523,23 @@ async def analyze_batch(
             detail="Máximo de 100 imagens por batch"
         )
 
+    field_list = parse_fields(fields)
+    locale, codes_only = parse_recommendation_options(locale, recommendation_format)
+    fast_engine = resolve_engine(engine, exam_type)
+    # Sem fields, o batch retorna o resumo padrão (sem dimensões); pedir
+    # recommendation_format=codes inclui os códigos das recomendações
+    response_fields = field_list or [
+        'global_score', 'ml_readiness', 'clinical_adequacy', 'confidence'
+    ] + (['recommendations'] if codes_only else [])
+
     results = []
     errors = []
+    fast_pending = []  # (filename, imagem, metadata) para um forward único no fim
 
     for idx, file in enumerate(files):
         try:
-            # Processa cada imagem
-            contents = await file.read()
+            # Processa cada imagem (tamanho e cabeçalho validados antes da leitura)
+            contents = await read_upload(file, upload_limits)
             nparr = np.frombuffer(contents, np.uint8)
             image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
 
@@ -225,51 +555,75 @@ async def analyze_batch(
             metadata = {
                 "filename": file.filename,
                 "batch_index": idx,
-                "exam_type": exam_type
+                "exam_type": exam_type,
+                "engine": engine
             }
 
+            if fast_engine is not None:
+                fast_pending.append((file.filename, image, metadata))
+                continue
+
             # Análise
-            score = analyze_image_quality(image, exam_type=exam_type, metadata=metadata)
+            start = time.perf_counter()
+            score = analyze_image_quality(
+                image, exam_type=exam_type, metadata=metadata, fields=field_list
+            )
+            record_score(score, file.filename, exam_type, image.shape, time.perf_counter() - start)
+            track_agreement(image, exam_type, score, field_list)
 
             results.append({
                 "filename": file.filename,
-                "global_score": round(score.global_score, 2),
-                "ml_readiness": score.ml_readiness,
-                "clinical_adequacy": score.clinical_adequacy,
-                "confidence": round(score.confidence, 2)
+                **score_to_response(score, response_fields, locale, codes_only),
+                "skipped_dimensions": score.skipped_dimensions
             })
 
+        except HTTPException as e:
+            errors.append({
+                "filename": file.filename,
+                "error": e.detail
+            })
         except Exception as e:
             errors.append({
                 "filename": file.filename,
                 "error": str(e)
             })
 
-    # Estatísticas do batch
-    if results:
-        scores = [r["global_score"] for r in results]
-        statistics = {
-            "total_images": len(files),
-            "successful": len(results),
-            "failed": len(errors),
-            "mean_score": round(np.mean(scores), 2),
-            "std_score": round(np.std(scores), 2),
-            "min_score": round(min(scores), 2),
-            "max_score": round(max(scores), 2)
-        }
-    else:
-        statistics = {
-            "total_images": len(files),
-            "successful": 0,
-            "failed": len(errors)
-        }
+    if fast_pending:
+        start = time.perf_counter()
+        try:
+            # Um forward para o batch inteiro, fora do event loop
+            scores = await asyncio.to_thread(
+                fast_engine.score_images,
+                [image for _, image, _ in fast_pending], exam_type,
+                [metadata for _, _, metadata in fast_pending]
+            )
+        except Exception as e:
+            errors.extend({"filename": filename, "error": str(e)} for filename, _, _ in fast_pending)
+            scores = []
+        seconds = (time.perf_counter() - start) / len(fast_pending)
+        for (filename, image, _), score in zip(fast_pending, scores):
+            record_score(score, filename, exam_type, image.shape, seconds, source='api-fast')
+            results.append({
+                "filename": filename,
+                **score_to_response(score, response_fields, locale, codes_only),
+                "skipped_dimensions": score.skipped_dimensions
+            })
 
-    return {
+    # Estatísticas do batch (scores só existem se global_score foi pedido)
+    statistics = {
+        "total_images": len(files),
+        "successful": len(results),
+        "failed": len(errors)
+    }
+    if results and "global_score" in results[0]:
+        statistics.update(score_statistics([r["global_score"] for r in results]))
+
+    return FastJSONResponse({
         "success": True,
         "statistics": statistics,
         "results": results,
         "errors": errors if errors else None
-    }
+    })
 
 
 @app.get("/api/v1/info")
@@ -290,10 +644,100 @@ async def api_info():
             "clinical_adequacy"
         ],
         "ml_readiness_levels": ["excellent", "good", "fair", "poor"],
+        "recommendation_locales": list(SUPPORTED_LOCALES),
+        "recommendation_formats": list(RECOMMENDATION_FORMATS),
+        "engines": [
+            name for name in ENGINES
+            if name == 'reference' or getattr(app.state, "fast_engine", None) is not None
+        ],
+        "upload_limits": {
+            "max_file_mb": upload_limits.max_file_bytes / (1024 * 1024),
+            "max_request_mb": upload_limits.max_request_bytes / (1024 * 1024),
+            "max_image_megapixels": upload_limits.max_image_pixels / 1e6
+        },
         "clinical_adequacy_levels": ["diagnostic", "screening", "inadequate"]
     }
 
 
+@app.get("/api/v1/metrics")
+async def metrics():
+    """Snapshot das métricas do servidor (latência, erros, lag do event loop, micro-batching)"""
+    batcher = getattr(app.state, "batcher", None)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "pid": os.getpid(),
+        **service_metrics.snapshot(),
+        "analyzer": {
+            "cascade": get_default_analyzer().get_cascade_stats(),
+            "threads": current_thread_settings()
+        },
+        "batching": {**batcher.info(), **batcher.metrics.snapshot()} if batcher is not None else None
+    }
+
+
+@app.get("/api/v1/engines")
+async def engines():
+    """
+    Engines de scoring disponíveis neste worker
+
+    Para a engine rápida: modelo, concordância offline (split de teste da
+    destilação) e concordância online com a referência (amostra das
+    requisições engine=reference, ver WINGSAI_FAST_AGREEMENT_RATE).
+    """
+    fast_engine = getattr(app.state, "fast_engine", None)
+    fast = {"available": fast_engine is not None}
+    if fast_engine is not None:
+        fast.update(fast_engine.info())
+        fast["agreement_rate"] = app.state.agreement_rate
+        fast["online_agreement"] = app.state.agreement.summary()
+        fast["batching"] = app.state.batcher.info()
+    return {
+        "pid": os.getpid(),
+        "default": "reference",
+        "engines": {
+            "reference": {"available": True, "analyzer_version": ANALYZER_VERSION},
+            "fast": fast
+        }
+    }
+
+
+@app.get("/api/v1/analytics/summary")
+async def analytics_summary(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """
+    Agregados diários do histórico de scores (por dia e tipo de exame)
+
+    Args:
+        start_date: Data inicial YYYY-MM-DD (opcional)
+        end_date: Data final YYYY-MM-DD (opcional)
+    """
+    store = getattr(app.state, "result_store", None)
+    if store is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Histórico de scores desativado. Defina {RESULT_STORE_ENV_VAR}."
+        )
+
+    from datetime import date
+    from ml.scoring.result_store import daily_summary
+
+    try:
+        start = date.fromisoformat(start_date) if start_date else None
+        end = date.fromisoformat(end_date) if end_date else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Data inválida: {e}")
+
+    # Leitura em memory-map fora do event loop
+    days = await asyncio.to_thread(daily_summary, str(store.root), start, end)
+    return {
+        "success": True,
+        "store": {**store.stats},
+        "days": days
+    }
+
+
 @app.get("/api/v1/debug")
 async def debug_test():
     """
@@ -0,0 +1,134 @@
+"""
+WingsAI - Métricas do Servidor
+Contadores e histogramas de latência em memória, expostos em /api/v1/metrics
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+# Limites superiores (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = [
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+]
+
+
+class LatencyHistogram:
+    """Histograma de latência com buckets fixos (memória constante)"""
+
+    def __init__(self, buckets: List[float] = None):
+        self.buckets = buckets or LATENCY_BUCKETS
+        self.counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        """Registra uma observação"""
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantil aproximado (limite superior do bucket)"""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for idx, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.buckets[idx] if idx < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict:
+        """Estado atual serializável"""
+        return {
+            'count': self.count,
+            'mean_seconds': self.total / self.count if self.count else None,
+            'max_seconds': self.max,
+            'p50_seconds': self.quantile(0.50),
+            'p95_seconds': self.quantile(0.95),
+            'p99_seconds': self.quantile(0.99),
+            'buckets': {
+                **{str(b): c for b, c in zip(self.buckets, self.counts)},
+                '+Inf': self.counts[-1]
+            }
+        }
+
+
+class ServiceMetrics:
+    """
+    Métricas agregadas do serviço (por endpoint e do event loop)
+    Thread-safe: atualizadas pelo middleware HTTP e por threads de trabalho
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.endpoints: Dict[str, Dict] = {}
+        self.in_flight = 0
+        self.loop_lag = LatencyHistogram()
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, path: str, status_code: int, seconds: float):
+        """Registra uma requisição concluída"""
+        with self._lock:
+            self.in_flight -= 1
+            endpoint = self.endpoints.setdefault(path, {
+                'requests': 0,
+                'errors': 0,
+                'status_codes': {},
+                'latency': LatencyHistogram()
+            })
+            endpoint['requests'] += 1
+            if status_code >= 400:
+                endpoint['errors'] += 1
+            code = str(status_code)
+            endpoint['status_codes'][code] = endpoint['status_codes'].get(code, 0) + 1
+            endpoint['latency'].observe(seconds)
+
+    def observe_loop_lag(self, seconds: float):
+        with self._lock:
+            self.loop_lag.observe(seconds)
+
+    def snapshot(self) -> Dict:
+        """Snapshot serializável de todas as métricas"""
+        with self._lock:
+            return {
+                'uptime_seconds': time.time() - self.started_at,
+                'in_flight': self.in_flight,
+                'event_loop_lag': self.loop_lag.snapshot(),
+                'endpoints': {
+                    path: {
+                        'requests': data['requests'],
+                        'errors': data['errors'],
+                        'status_codes': dict(data['status_codes']),
+                        'latency': data['latency'].snapshot()
+                    }
+                    for path, data in self.endpoints.items()
+                }
+            }
+
+
+async def monitor_event_loop_lag(
+    metrics: ServiceMetrics,
+    interval: float = 0.1
+):
+    """
+    Mede o atraso do event loop: quanto um sleep de `interval` demora além
+    do esperado. Lag alto indica trabalho síncrono bloqueando o loop.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        metrics.observe_loop_lag(max(0.0, loop.time() - start - interval))
@@ -0,0 +1,61 @@
+"""
+WingsAI - Modelos de Resposta da API
+
+Usados apenas para documentar as respostas no OpenAPI (/docs). Os endpoints
+de análise devolvem FastJSONResponse montada diretamente, sem validação
+pelo Pydantic a cada requisição (ver backend/serialization.py).
+
+Campos não pedidos em `fields` são omitidos da resposta.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class ScoreResult(BaseModel):
+    """Score de uma imagem"""
+    global_score: Optional[float] = None
+    confidence: Optional[float] = None
+    ml_readiness: Optional[str] = None
+    clinical_adequacy: Optional[str] = None
+    dimension_scores: Optional[Dict[str, float]] = None
+    recommendations: Optional[List[str]] = None
+    recommendation_codes: Optional[List[str]] = None
+    skipped_dimensions: List[str] = []
+
+
+class AnalyzeResult(ScoreResult):
+    """Score de /api/v1/analyze, com a metadata da requisição"""
+    metadata: Dict[str, Any]
+
+
+class AnalyzeResponse(BaseModel):
+    success: bool
+    result: AnalyzeResult
+
+
+class BatchItem(ScoreResult):
+    filename: Optional[str] = None
+
+
+class BatchError(BaseModel):
+    filename: Optional[str] = None
+    error: str
+
+
+class BatchStatistics(BaseModel):
+    total_images: int
+    successful: int
+    failed: int
+    mean_score: Optional[float] = None
+    std_score: Optional[float] = None
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+
+
+class BatchResponse(BaseModel):
+    success: bool
+    statistics: BatchStatistics
+    results: List[BatchItem]
+    errors: Optional[List[BatchError]] = None
@@ -0,0 +1,82 @@
+"""
+WingsAI - Serialização JSON das Respostas
+
+Endpoints de análise devolvem FastJSONResponse já montada: o FastAPI não
+passa o conteúdo pelo jsonable_encoder (que percorre o dict de forma
+reflexiva) e o corpo é escrito pelo orjson, que serializa tuplas (ex:
+metadata.shape), floats NumPy e enums diretamente. Sem orjson instalado,
+cai para json da stdlib com conversão dos tipos NumPy.
+
+Medições em scripts/benchmark_serialization.py.
+"""
+
+import json
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(value: Any) -> Any:
+    """Tipos que o encoder não conhece nativamente"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        """Serializa para JSON (UTF-8)"""
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(content: Any) -> bytes:
+        """Serializa para JSON (UTF-8)"""
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse com orjson (ou json da stdlib) e tipos NumPy"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def round_score(value: Optional[float]) -> Optional[float]:
+    """Score com 2 casas como float Python (converte floats NumPy uma única vez)"""
+    return None if value is None else round(float(value), 2)
+
+
+def round_scores(scores: Dict[str, float], keys: Optional[set] = None) -> Dict[str, float]:
+    """Arredonda um dict de scores, opcionalmente filtrando as chaves"""
+    return {
+        k: round(float(v), 2) for k, v in scores.items()
+        if keys is None or k in keys
+    }
+
+
+def score_statistics(scores: List[float]) -> Dict[str, float]:
+    """Média, desvio, mínimo e máximo (2 casas) como floats Python"""
+    values = np.asarray(scores, dtype=np.float64)
+    return {
+        "mean_score": round(float(values.mean()), 2),
+        "std_score": round(float(values.std()), 2),
+        "min_score": round(float(values.min()), 2),
+        "max_score": round(float(values.max()), 2)
+    }
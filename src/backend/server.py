@@ -0,0 +1,228 @@
+"""
+WingsAI - Servidor de Produção (pre-fork)
+
+O processo mestre importa a API e aquece o analyzer uma única vez, abre o
+socket e faz fork de N workers uvicorn. Os workers herdam módulos e analyzer
+já carregados (copy-on-write) em vez de reimportar OpenCV/skimage cada um.
+
+Uso:
+    python src/backend/server.py                 # workers = cota de CPU
+    WINGSAI_WORKERS=4 python src/backend/server.py
+    python src/backend/server.py --workers 2 --threads 2 --port 8080
+"""
+
+import argparse
+import gc
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+import uvicorn
+
+# Adiciona src ao path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from ml.scoring.thread_budget import apply_thread_budget, available_cpus, threads_per_worker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("wingsai.server")
+
+# Reinícios de worker mais rápidos que isso entram em backoff
+MIN_WORKER_LIFETIME_SECONDS = 5.0
+RESTART_BACKOFF_SECONDS = 1.0
+
+
+def cpu_quota() -> Optional[float]:
+    """
+    Cota de CPU do container (cgroup v2 cpu.max ou v1 cfs_quota_us)
+
+    Returns:
+        Número de CPUs permitidas (pode ser fracionário) ou None sem limite
+    """
+    # cgroup v2: "<quota> <period>" ou "max <period>"
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+
+    return None
+
+
+def usable_cpus() -> int:
+    """CPUs da afinidade do processo, limitadas pela cota do cgroup"""
+    cpus = available_cpus()
+    quota = cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def default_worker_count() -> int:
+    """Um worker por CPU utilizável"""
+    return usable_cpus()
+
+
+def create_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Socket de escuta compartilhado por todos os workers"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def load_and_warm_app():
+    """
+    Importa a API e aquece o analyzer compartilhado no processo mestre
+
+    Returns:
+        Aplicação FastAPI pronta para ser servida pelos workers
+    """
+    start = time.perf_counter()
+    from backend.main import app
+    from ml.scoring.wingsai_core import get_default_analyzer
+
+    get_default_analyzer().warmup()
+    logger.info(f"🔥 Analyzer aquecido em {time.perf_counter() - start:.2f}s")
+
+    # Move objetos já existentes para a geração permanente: o GC dos workers
+    # não toca (e não copia) as páginas herdadas do mestre
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+class PreforkServer:
+    """Mestre pre-fork: cria, supervisiona e reinicia os workers"""
+
+    def __init__(
+        self,
+        app,
+        sock: socket.socket,
+        workers: int,
+        threads: int = 1,
+        log_level: str = "info"
+    ):
+        self.app = app
+        self.sock = sock
+        self.num_workers = workers
+        self.threads = threads
+        self.log_level = log_level
+        self.workers: Dict[int, float] = {}  # pid -> instante do fork
+        self.should_exit = False
+
+    def spawn_worker(self) -> int:
+        """Faz fork de um worker uvicorn servindo o socket herdado"""
+        pid = os.fork()
+        if pid > 0:
+            self.workers[pid] = time.monotonic()
+            return pid
+
+        # Processo filho: uvicorn instala os próprios handlers de sinal
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            # Recria os pools de threads no filho com o orçamento por worker
+            apply_thread_budget(self.threads)
+            config = uvicorn.Config(self.app, log_level=self.log_level)
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except Exception:
+            logger.exception("❌ Worker encerrado com erro")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def handle_exit(self, signum, frame):
+        """Repassa SIGTERM/SIGINT aos workers e encerra após a saída deles"""
+        if not self.should_exit:
+            logger.info(f"🛑 Sinal {signum} recebido, encerrando workers...")
+        self.should_exit = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """Loop de supervisão: reinicia workers que morrem inesperadamente"""
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        signal.signal(signal.SIGINT, self.handle_exit)
+
+        for _ in range(self.num_workers):
+            self.spawn_worker()
+        logger.info(f"✅ {self.num_workers} workers iniciados: {sorted(self.workers)}")
+
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+
+            started = self.workers.pop(pid, None)
+            if started is None or self.should_exit:
+                continue
+
+            logger.warning(
+                f"⚠️  Worker {pid} saiu (código {os.waitstatus_to_exitcode(status)}), reiniciando"
+            )
+            if time.monotonic() - started < MIN_WORKER_LIFETIME_SECONDS:
+                time.sleep(RESTART_BACKOFF_SECONDS)
+            if not self.should_exit:
+                self.spawn_worker()
+
+        self.sock.close()
+        logger.info("👋 Servidor encerrado")
+
+
+def main():
+    """Função principal via CLI"""
+    parser = argparse.ArgumentParser(description="Servidor de produção WingsAI (pre-fork)")
+    parser.add_argument('--host', default=os.environ.get('WINGSAI_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('WINGSAI_PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WINGSAI_WORKERS', 0)),
+                        help="Número de workers (0 = derivado da cota de CPU)")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WINGSAI_THREADS', 0)),
+                        help="Threads OpenCV/BLAS/torch por worker (0 = CPUs / workers)")
+    parser.add_argument('--log-level', default=os.environ.get('WINGSAI_LOG_LEVEL', 'info'))
+    args = parser.parse_args()
+
+    workers = args.workers or default_worker_count()
+    threads = args.threads or threads_per_worker(workers, usable_cpus())
+    logger.info(f"🏥 WingsAI API (pre-fork) em {args.host}:{args.port} com {workers} workers "
+                f"x {threads} threads (CPUs: {available_cpus()}, cota: {cpu_quota()})")
+
+    # Warmup no mestre já com o mesmo orçamento dos workers
+    apply_thread_budget(threads)
+    app = load_and_warm_app()
+    sock = create_socket(args.host, args.port)
+    PreforkServer(app, sock, workers, threads, args.log_level).run()
+
+
+if __name__ == "__main__":
+    main()
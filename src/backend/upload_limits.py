@@ -0,0 +1,279 @@
+"""
+WingsAI - Limites de Upload
+
+Três barreiras, da mais barata para a mais cara:
+
+1. RequestSizeLimitMiddleware (ASGI): recusa com 413 pelo Content-Length e,
+   sem ele, conta os bytes enquanto o corpo chega (o multipart não termina
+   de ser lido)
+2. Tamanho de cada arquivo: o Starlette já gravou a parte em arquivo
+   temporário (em disco acima de 1 MB); o tamanho é checado antes de qualquer
+   leitura para a memória do worker
+3. Cabeçalho da imagem: PNG/JPEG têm formato e dimensões lidos em poucos
+   bytes; pixels demais (413) são recusados antes do read() completo e do
+   cv2.imdecode. Outros formatos (TIFF, BMP, WebP...) passam só pelo limite
+   de bytes e o cv2.imdecode decide se são imagens válidas
+
+Configuração por variáveis de ambiente:
+    WINGSAI_MAX_FILE_MB          (padrão 10)   bytes por arquivo
+    WINGSAI_MAX_REQUEST_MB       (padrão 256)  bytes por requisição
+    WINGSAI_MAX_IMAGE_MEGAPIXELS (padrão 50)   largura x altura decodificada
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from backend.serialization import dumps
+
+MB = 1024 * 1024
+
+# Marcadores JPEG Start Of Frame (exceto DHT, JPG e DAC)
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF
+}
+# Marcadores sem payload de tamanho
+_JPEG_STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))
+
+# Maior distância até o SOF que aceitamos percorrer (EXIF, ICC, thumbnails)
+MAX_HEADER_SCAN_BYTES = 1 * MB
+
+
+@dataclass(frozen=True)
+class UploadLimits:
+    """Limites de upload (0 desativa o limite)"""
+    max_file_bytes: int = 10 * MB
+    max_request_bytes: int = 256 * MB
+    max_image_pixels: int = 50_000_000
+
+    @classmethod
+    def from_env(cls) -> 'UploadLimits':
+        """Lê WINGSAI_MAX_FILE_MB, WINGSAI_MAX_REQUEST_MB e WINGSAI_MAX_IMAGE_MEGAPIXELS"""
+        defaults = cls()
+        return cls(
+            max_file_bytes=int(float(os.environ.get(
+                'WINGSAI_MAX_FILE_MB', defaults.max_file_bytes / MB)) * MB),
+            max_request_bytes=int(float(os.environ.get(
+                'WINGSAI_MAX_REQUEST_MB', defaults.max_request_bytes / MB)) * MB),
+            max_image_pixels=int(float(os.environ.get(
+                'WINGSAI_MAX_IMAGE_MEGAPIXELS', defaults.max_image_pixels / 1e6)) * 1e6),
+        )
+
+
+class RequestTooLarge(HTTPException):
+    """Corpo da requisição acima do limite (propaga como 413 pelo FastAPI)"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Requisição excede o limite de {max_bytes / MB:.0f} MB"
+        )
+
+
+class ImageHeaderError(ValueError):
+    """Cabeçalho de imagem ausente ou truncado"""
+
+
+# ----------------------------------------------------------------------
+# Cabeçalho da imagem
+# ----------------------------------------------------------------------
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ImageHeaderError("Cabeçalho de imagem truncado")
+    return data
+
+
+def _sniff_jpeg(stream: BinaryIO) -> Tuple[int, int]:
+    """Percorre os segmentos JPEG até o SOF (sem decodificar nada)"""
+    while stream.tell() < MAX_HEADER_SCAN_BYTES:
+        byte = _read_exact(stream, 1)
+        if byte != b'\xff':
+            raise ImageHeaderError("JPEG inválido: marcador esperado")
+        marker = _read_exact(stream, 1)[0]
+        while marker == 0xFF:  # bytes de preenchimento
+            marker = _read_exact(stream, 1)[0]
+
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / SOS antes do SOF
+            raise ImageHeaderError("JPEG sem quadro (SOF)")
+
+        length = struct.unpack('>H', _read_exact(stream, 2))[0]
+        if length < 2:
+            raise ImageHeaderError("JPEG inválido: segmento com tamanho inválido")
+        if marker in _JPEG_SOF_MARKERS:
+            _, height, width = struct.unpack('>BHH', _read_exact(stream, 5))
+            return width, height
+        stream.seek(length - 2, os.SEEK_CUR)
+
+    raise ImageHeaderError("JPEG sem quadro (SOF) no início do arquivo")
+
+
+def sniff_image_header(stream: BinaryIO) -> Optional[Tuple[str, int, int]]:
+    """
+    Formato e dimensões de uma imagem PNG ou JPEG lendo só o cabeçalho
+
+    O stream volta para o início ao final.
+
+    Returns:
+        (formato, largura, altura), formato 'png' ou 'jpeg'; None para
+        formatos sem leitor de cabeçalho (o cv2.imdecode decide)
+
+    Raises:
+        ImageHeaderError se o cabeçalho PNG/JPEG for inválido
+    """
+    stream.seek(0)
+    try:
+        head = stream.read(24)
+        if head.startswith(b'\x89PNG\r\n\x1a\n'):
+            if len(head) < 24 or head[12:16] != b'IHDR':
+                raise ImageHeaderError("PNG inválido: IHDR ausente")
+            width, height = struct.unpack('>II', head[16:24])
+            return 'png', width, height
+
+        if head.startswith(b'\xff\xd8'):
+            stream.seek(2)
+            width, height = _sniff_jpeg(stream)
+            return 'jpeg', width, height
+
+        return None
+    finally:
+        stream.seek(0)
+
+
+# ----------------------------------------------------------------------
+# Leitura de uploads
+# ----------------------------------------------------------------------
+
+def check_upload(file: UploadFile, limits: UploadLimits) -> Optional[Tuple[str, int, int]]:
+    """
+    Valida tamanho e cabeçalho de um upload sem ler o conteúdo inteiro
+
+    Returns:
+        (formato, largura, altura) para PNG/JPEG; None para outros formatos
+        (só o limite de bytes se aplica)
+
+    Raises:
+        HTTPException 413 (arquivo ou pixels demais) ou 400 (cabeçalho
+        inválido/dimensões zeradas)
+    """
+    if limits.max_file_bytes and file.size is not None and file.size > limits.max_file_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Arquivo {file.filename} excede o limite de "
+                   f"{limits.max_file_bytes / MB:.0f} MB ({file.size / MB:.1f} MB)"
+        )
+
+    try:
+        header = sniff_image_header(file.file)
+    except ImageHeaderError as e:
+        raise HTTPException(status_code=400, detail=f"{file.filename}: {e}")
+    if header is None:
+        return None
+
+    image_format, width, height = header
+
+    if width == 0 or height == 0:
+        raise HTTPException(status_code=400, detail=f"{file.filename}: imagem sem pixels")
+    if limits.max_image_pixels and width * height > limits.max_image_pixels:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Imagem {file.filename} tem {width}x{height} pixels, acima do limite de "
+                   f"{limits.max_image_pixels / 1e6:.0f} megapixels"
+        )
+    return image_format, width, height
+
+
+async def read_upload(file: UploadFile, limits: UploadLimits) -> bytes:
+    """
+    Lê um upload após check_upload, sem passar de max_file_bytes mesmo se o
+    tamanho não foi informado pelo parser
+    """
+    check_upload(file, limits)
+    if not limits.max_file_bytes:
+        return await file.read()
+
+    contents = await file.read(limits.max_file_bytes + 1)
+    if len(contents) > limits.max_file_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Arquivo {file.filename} excede o limite de {limits.max_file_bytes / MB:.0f} MB"
+        )
+    return contents
+
+
+# ----------------------------------------------------------------------
+# Middleware
+# ----------------------------------------------------------------------
+
+class RequestSizeLimitMiddleware:
+    """
+    Middleware ASGI que limita o corpo da requisição a max_bytes
+
+    Recusa pelo Content-Length antes de ler o corpo; sem Content-Length
+    (chunked), interrompe a leitura assim que o limite é ultrapassado.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get('headers', ()):
+            if name == b'content-length':
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > self.max_bytes:
+                    await self._reject(send)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    raise RequestTooLarge(self.max_bytes)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge:
+            if response_started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = dumps({"detail": RequestTooLarge(self.max_bytes).detail})
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'connection', b'close'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,285 @@
+"""
+SNPQIM Training Dataset
+Datasets e data loaders para treinamento de modelos de quality assessment
+
+Layout de `data_dir`:
+    labels.csv ou labels.parquet   índice de rótulos (uma linha por imagem)
+    <imagens>                      caminhos relativos a data_dir (ou absolutos)
+    shards/                        cache opcional compilado por ml.data.shards
+
+Colunas do índice: `path`, `exam_type` (opcional), `status` (opcional; só
+'ok' é usado) e os targets em TARGET_COLUMNS, com os mesmos nomes do
+resultado do scoring em massa (`global_score`, `dim_<dimensão>`, `confidence`).
+
+Cada amostra é {'image': (3, H, W) float32 normalizado, 'targets': (8,)
+float32 na ordem de TARGET_COLUMNS}. targets_to_dict() converte o batch de
+targets para o formato das loss functions.
+"""
+
+import csv
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from ..scoring.thread_budget import available_cpus
+from ..scoring.wingsai_core import DIMENSION_NAMES
+
+logger = logging.getLogger(__name__)
+
+# Ordem das colunas do tensor de targets (a mesma de METRIC_COLUMNS)
+TARGET_COLUMNS = ('global_score',) + tuple(f'dim_{dim}' for dim in DIMENSION_NAMES) + ('confidence',)
+
+# Normalização de entrada (estatísticas ImageNet, usadas pelos backbones)
+NORMALIZE_MEAN = (0.485, 0.456, 0.406)
+NORMALIZE_STD = (0.229, 0.224, 0.225)
+
+DEFAULT_IMAGE_SIZE = 224
+INDEX_FILES = ('labels.parquet', 'labels.csv')
+SHARDS_DIRNAME = 'shards'
+
+
+def find_label_index(data_dir: str) -> Path:
+    """Arquivo de índice de rótulos em data_dir (Parquet tem preferência)"""
+    for name in INDEX_FILES:
+        path = Path(data_dir) / name
+        if path.exists():
+            return path
+    raise FileNotFoundError(
+        f"Nenhum índice de rótulos em {data_dir} (esperado: {', '.join(INDEX_FILES)})"
+    )
+
+
+def _read_index_rows(index_path: Path) -> List[Dict]:
+    if index_path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+
+        return pq.read_table(index_path).to_pylist()
+    with open(index_path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def load_label_index(data_dir: str, exam_type: Optional[str] = None) -> Tuple[List[str], np.ndarray]:
+    """
+    Lê o índice de rótulos
+
+    Args:
+        data_dir: Diretório com o índice de rótulos
+        exam_type: Se informado, só linhas desse tipo de exame (linhas sem
+            `exam_type` são mantidas)
+
+    Returns:
+        (caminhos absolutos, targets (N, 8) float32 na ordem de TARGET_COLUMNS)
+    """
+    index_path = find_label_index(data_dir)
+    paths = []
+    targets = []
+    skipped = 0
+    other_exams = 0
+    for row in _read_index_rows(index_path):
+        if exam_type is not None and row.get('exam_type') not in (exam_type, None, ''):
+            other_exams += 1
+            continue
+        if row.get('status', 'ok') not in ('ok', None, ''):
+            skipped += 1
+            continue
+        values = [row.get(column) for column in TARGET_COLUMNS]
+        if any(value in (None, '') for value in values):
+            skipped += 1
+            continue
+        path = row['path']
+        paths.append(path if os.path.isabs(path) else os.path.join(data_dir, path))
+        targets.append([float(value) for value in values])
+
+    if skipped:
+        logger.info(f"⏭️  {skipped} linhas sem rótulo completo ignoradas em {index_path.name}")
+    if other_exams:
+        logger.info(f"⏭️  {other_exams} linhas de outros tipos de exame ignoradas (exam_type={exam_type})")
+    return paths, np.asarray(targets, dtype=np.float32).reshape(-1, len(TARGET_COLUMNS))
+
+
+def resize_image(
+    image: np.ndarray, image_size: int = DEFAULT_IMAGE_SIZE, rgb: bool = False
+) -> np.ndarray:
+    """
+    Redimensiona uma imagem uint8 (BGR do OpenCV; RGB com rgb=True), sem normalizar
+
+    Returns:
+        Array (image_size, image_size, 3) uint8 RGB (entrada dos modelos
+        exportados, que normalizam internamente)
+    """
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    interpolation = cv2.INTER_AREA if max(image.shape[:2]) > image_size else cv2.INTER_LINEAR
+    image = cv2.resize(image, (image_size, image_size), interpolation=interpolation)
+    if not rgb:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return image
+
+
+def preprocess_image(
+    image: np.ndarray, image_size: int = DEFAULT_IMAGE_SIZE, rgb: bool = False
+) -> np.ndarray:
+    """
+    Redimensiona e normaliza uma imagem uint8 (BGR do OpenCV; RGB com rgb=True)
+
+    Returns:
+        Array (3, image_size, image_size) float32 RGB normalizado
+    """
+    image = resize_image(image, image_size, rgb).astype(np.float32) / 255.0
+    image -= np.asarray(NORMALIZE_MEAN, dtype=np.float32)
+    image /= np.asarray(NORMALIZE_STD, dtype=np.float32)
+    return np.ascontiguousarray(image.transpose(2, 0, 1))
+
+
+def load_image(path: str, image_size: int = DEFAULT_IMAGE_SIZE) -> np.ndarray:
+    """Decodifica e pré-processa uma imagem do disco"""
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Não foi possível decodificar {path}")
+    return preprocess_image(image, image_size)
+
+
+def drop_undecodable(
+    paths: Sequence[str], targets: np.ndarray, workers: Optional[int] = None
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Remove as linhas cujas imagens não decodificam (mesmo critério de load_image)
+
+    compile_shards pula essas imagens; o dataset decodificado precisa das
+    mesmas N linhas, na mesma ordem, para que split_indices dê os mesmos
+    splits nos dois caminhos.
+    """
+    def decodable(path: str) -> bool:
+        return cv2.imread(path, cv2.IMREAD_COLOR) is not None
+
+    with ThreadPoolExecutor(max_workers=workers or available_cpus()) as executor:
+        keep = list(executor.map(decodable, paths))
+    dropped = [path for path, ok in zip(paths, keep) if not ok]
+    if dropped:
+        logger.warning(f"⚠️  {len(dropped)} imagens que não decodificam ignoradas (ex.: {dropped[0]})")
+    targets = np.asarray(targets, dtype=np.float32)
+    return [path for path, ok in zip(paths, keep) if ok], targets[np.asarray(keep, dtype=bool)]
+
+
+def targets_to_dict(targets: torch.Tensor) -> Dict[str, torch.Tensor]:
+    """
+    Converte targets (B, 8) no formato das loss functions/métricas
+
+    Returns:
+        {'global_score': (B, 1), 'dimension_scores': (B, 6), 'confidence': (B, 1)}
+    """
+    return {
+        'global_score': targets[:, :1],
+        'dimension_scores': targets[:, 1:1 + len(DIMENSION_NAMES)],
+        'confidence': targets[:, -1:]
+    }
+
+
+class SnpqimImageDataset(Dataset):
+    """
+    Dataset que decodifica as imagens do disco a cada acesso
+
+    Args:
+        paths: Caminhos das imagens
+        targets: Targets (N, 8) na ordem de TARGET_COLUMNS
+        image_size: Lado da imagem quadrada de entrada
+    """
+
+    def __init__(self, paths: Sequence[str], targets: np.ndarray, image_size: int = DEFAULT_IMAGE_SIZE):
+        self.paths = list(paths)
+        self.targets = np.asarray(targets, dtype=np.float32)
+        self.image_size = image_size
+
+    @classmethod
+    def from_directory(
+        cls, data_dir: str, image_size: int = DEFAULT_IMAGE_SIZE, exam_type: Optional[str] = None
+    ) -> 'SnpqimImageDataset':
+        """
+        Dataset a partir do índice de rótulos de data_dir (filtrado por exam_type)
+
+        Imagens que não decodificam são removidas antes, como em
+        compile_shards: mesmas amostras e splits com ou sem shards.
+        """
+        paths, targets = load_label_index(data_dir, exam_type)
+        paths, targets = drop_undecodable(paths, targets)
+        return cls(paths, targets, image_size)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, index: int) -> Dict[str, torch.Tensor]:
+        return {
+            'image': torch.from_numpy(load_image(self.paths[index], self.image_size)),
+            'targets': torch.from_numpy(self.targets[index])
+        }
+
+
+def split_indices(
+    num_samples: int,
+    train_split: float = 0.8,
+    val_split: float = 0.15,
+    test_split: float = 0.05,
+    seed: int = 42
+) -> Tuple[List[int], List[int], List[int]]:
+    """Divisão aleatória (determinística por seed) em treino/validação/teste"""
+    total = train_split + val_split + test_split
+    order = np.random.default_rng(seed).permutation(num_samples).tolist()
+    train_end = int(round(num_samples * train_split / total))
+    val_end = train_end + int(round(num_samples * val_split / total))
+    return order[:train_end], order[train_end:val_end], order[val_end:]
+
+
+def get_data_loaders(
+    data_dir: str,
+    batch_size: int = 32,
+    train_split: float = 0.8,
+    val_split: float = 0.15,
+    test_split: float = 0.05,
+    num_workers: int = 4,
+    pin_memory: bool = True,
+    image_size: int = DEFAULT_IMAGE_SIZE,
+    shards_dir: Optional[str] = None,
+    seed: int = 42,
+    exam_type: Optional[str] = None
+) -> Tuple[DataLoader, DataLoader, DataLoader]:
+    """
+    Data loaders de treino, validação e teste
+
+    Usa o cache de shards (shards_dir, ou data_dir/shards) quando existir e
+    estiver atualizado para image_size, exam_type e o índice de rótulos;
+    senão decodifica as imagens a cada época. Com exam_type, só as linhas
+    desse tipo de exame entram nos splits.
+    """
+    from .shards import ShardedDataset, shards_available
+
+    shards_dir = shards_dir or os.path.join(data_dir, SHARDS_DIRNAME)
+    if shards_available(shards_dir, image_size, data_dir, exam_type):
+        dataset = ShardedDataset(shards_dir)
+        logger.info(f"📦 Usando shards pré-processados de {shards_dir} ({len(dataset)} amostras)")
+    else:
+        dataset = SnpqimImageDataset.from_directory(data_dir, image_size, exam_type)
+        logger.info(
+            f"🖼️  Decodificando imagens de {data_dir} a cada época ({len(dataset)} amostras); "
+            f"compile shards com scripts/compile_shards.py"
+        )
+
+    train_idx, val_idx, test_idx = split_indices(len(dataset), train_split, val_split, test_split, seed)
+
+    def loader(indices: List[int], shuffle: bool) -> DataLoader:
+        return DataLoader(
+            torch.utils.data.Subset(dataset, indices),
+            batch_size=batch_size,
+            shuffle=shuffle,
+            num_workers=num_workers,
+            pin_memory=pin_memory and torch.cuda.is_available(),
+            persistent_workers=num_workers > 0
+        )
+
+    return loader(train_idx, True), loader(val_idx, False), loader(test_idx, False)
@@ -0,0 +1,342 @@
+"""
+SNPQIM Label Generation
+Rotulagem do corpus de imagens com o WingsAIQualityAnalyzer como professor
+
+Os targets de treino (global_score, dim_<dimensão>, confidence) são as
+saídas do analyzer de referência. LabelingPipeline pontua um corpus inteiro
+(diretório, glob ou manifesto, como o scoring em massa) e grava direto o
+índice de rótulos de `data_dir`, lido por get_data_loaders/SnpqimTrainer:
+
+    data_dir/
+        labels.parquet                        índice consolidado (build_label_index)
+        label_parts/shard-000-of-001/part-*   linhas commitadas (rename atômico)
+
+Incremental: cada linha guarda o hash SHA-256 do conteúdo e o
+ANALYZER_VERSION que a gerou. Numa nova execução:
+    - mesmo caminho, tamanho e mtime já rotulados na versão atual: pulado
+      sem ler o arquivo;
+    - conteúdo (hash + tipo de exame) já rotulado na versão atual, mesmo em
+      outro caminho: o rótulo é copiado sem rodar o analyzer;
+    - demais imagens (novas, alteradas ou de versão antiga): analyzer;
+    - caminhos cujo arquivo não existe mais saem do índice (build_label_index).
+
+Sharding: `num_shards` jobs independentes (máquinas ou processos) dividem o
+corpus por hash estável do caminho; cada shard commita em seu próprio
+subdiretório e build_label_index junta todos. Dentro de um shard o scoring
+roda em um pool de processos, como em ml.scoring.bulk.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..scoring.bulk import (
+    PART_PREFIX,
+    PART_SUFFIX,
+    PartWriter,
+    _init_worker,
+    _score_bytes,
+    error_record,
+    result_schema
+)
+from ..scoring.thread_budget import available_cpus
+from ..scoring.wingsai_core import ANALYZER_VERSION
+from .dataset import INDEX_FILES
+
+logger = logging.getLogger(__name__)
+
+LABEL_PARTS_DIRNAME = 'label_parts'
+LABEL_INDEX_NAME = INDEX_FILES[0]  # labels.parquet (tem preferência sobre o CSV)
+
+
+def label_schema():
+    """Schema das linhas de rótulo: resultado do scoring + proveniência"""
+    import pyarrow as pa
+
+    schema = result_schema()
+    for name, type_ in (
+        ('content_hash', pa.string()),
+        ('analyzer_version', pa.string()),
+        ('size', pa.int64()),
+        ('mtime_ns', pa.int64()),
+        ('labeled_at', pa.float64()),
+    ):
+        schema = schema.append(pa.field(name, type_))
+    return schema
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 do conteúdo do arquivo (hex)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def shard_of(key: str, num_shards: int) -> int:
+    """Shard estável (independe de processo/máquina) de um caminho"""
+    return zlib.crc32(key.encode('utf-8')) % num_shards
+
+
+def shard_dirname(shard_index: int, num_shards: int) -> str:
+    return f'shard-{shard_index:03d}-of-{num_shards:03d}'
+
+
+def relative_key(path: str, data_dir: str) -> str:
+    """Caminho como gravado no índice: relativo a data_dir quando está dentro dele"""
+    absolute = os.path.abspath(path)
+    relative = os.path.relpath(absolute, os.path.abspath(data_dir))
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        return absolute
+    return relative.replace(os.sep, '/')
+
+
+def _label_parts(data_dir: str) -> List[Path]:
+    parts_dir = Path(data_dir) / LABEL_PARTS_DIRNAME
+    return sorted(parts_dir.glob(f'*/{PART_PREFIX}*{PART_SUFFIX}'))
+
+
+def _read_label_rows(data_dir: str) -> List[Dict]:
+    import pyarrow.parquet as pq
+
+    rows = []
+    for part in _label_parts(data_dir):
+        rows.extend(pq.read_table(part).to_pylist())
+    # Mais recente por último: a última linha de cada caminho vence
+    rows.sort(key=lambda row: row['labeled_at'] or 0.0)
+    return rows
+
+
+def latest_labels(data_dir: str, analyzer_version: Optional[str] = None) -> Dict[str, Dict]:
+    """Última linha de cada caminho, só da versão do analyzer (padrão: a atual)"""
+    analyzer_version = analyzer_version or ANALYZER_VERSION
+    latest = {}
+    for row in _read_label_rows(data_dir):
+        latest[row['path']] = row
+    return {path: row for path, row in latest.items() if row['analyzer_version'] == analyzer_version}
+
+
+def label_file(key: str, data_dir: str) -> str:
+    """Arquivo de uma chave do índice (relativa a data_dir ou absoluta)"""
+    return os.path.join(data_dir, key)
+
+
+def build_label_index(data_dir: str, prune_missing: bool = True) -> int:
+    """
+    Consolida as partes de todos os shards em data_dir/labels.parquet
+
+    Uma linha por caminho (a mais recente da versão atual), ordenada por
+    caminho. Com prune_missing, caminhos cujo arquivo não existe mais ficam
+    fora do índice (as linhas continuam nas partes). Gravação atômica: o
+    índice nunca fica parcial.
+
+    Returns:
+        Número de linhas do índice
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = [latest for _, latest in sorted(latest_labels(data_dir).items())]
+    if prune_missing:
+        kept = [row for row in rows if os.path.exists(label_file(row['path'], data_dir))]
+        if len(kept) < len(rows):
+            logger.info(f"🧹 {len(rows) - len(kept)} caminhos removidos do corpus saem do índice")
+        rows = kept
+    index_path = Path(data_dir) / LABEL_INDEX_NAME
+    tmp_path = index_path.with_suffix('.tmp')
+    pq.write_table(pa.Table.from_pylist(rows, schema=label_schema()), tmp_path)
+    os.replace(tmp_path, index_path)
+    logger.info(f"🏷️  Índice de rótulos com {len(rows)} imagens em {index_path}")
+    return len(rows)
+
+
+def _read_and_hash(
+    path: str, exam_type: str, key: str, size: int, mtime_ns: int
+) -> Tuple[str, str, str, int, int, Optional[bytes], Optional[str], Optional[str]]:
+    """Leitura + hash (threads de I/O; hashlib libera o GIL)"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return path, exam_type, key, size, mtime_ns, None, None, str(e)
+    return path, exam_type, key, size, mtime_ns, data, content_hash(data), None
+
+
+class LabelingPipeline:
+    """
+    Rotulagem incremental de um corpus com o analyzer de referência
+
+    Args:
+        data_dir: Diretório do dataset de treino (recebe labels.parquet)
+        workers: Processos de scoring (padrão: CPUs disponíveis)
+        threads_per_worker: Orçamento de threads por processo
+        read_threads: Threads de leitura + hash
+        prefetch: Imagens em voo por worker (limita memória)
+        row_group_size: Linhas por parte commitada
+        shard_index: Shard deste job (0 <= shard_index < num_shards)
+        num_shards: Total de jobs que dividem o corpus
+        build_index: Consolida labels.parquet ao fim da execução
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        workers: Optional[int] = None,
+        threads_per_worker: int = 1,
+        read_threads: int = 4,
+        prefetch: int = 4,
+        row_group_size: int = 1024,
+        shard_index: int = 0,
+        num_shards: int = 1,
+        build_index: bool = True,
+        progress_interval: float = 10.0
+    ):
+        if not 0 <= shard_index < num_shards:
+            raise ValueError(f"shard_index {shard_index} fora de [0, {num_shards})")
+        self.data_dir = data_dir
+        self.workers = workers or available_cpus()
+        self.threads_per_worker = threads_per_worker
+        self.read_threads = read_threads
+        self.window = self.workers * prefetch
+        self.row_group_size = row_group_size
+        self.shard_index = shard_index
+        self.num_shards = num_shards
+        self.build_index = build_index
+        self.progress_interval = progress_interval
+        self.parts_dir = Path(data_dir) / LABEL_PARTS_DIRNAME / shard_dirname(shard_index, num_shards)
+
+    def _known_labels(self) -> Tuple[Dict[str, Dict], Dict[Tuple[str, str], Dict]]:
+        """(última linha por caminho, rótulo ok por (hash, tipo de exame)) da versão atual"""
+        for tmp in self.parts_dir.glob(f'{PART_PREFIX}*.tmp'):
+            tmp.unlink()  # parte interrompida
+        by_path = latest_labels(self.data_dir)
+        by_content = {
+            (row['content_hash'], row['exam_type']): row
+            for row in by_path.values()
+            if row['status'] == 'ok' and row['content_hash']
+        }
+        return by_path, by_content
+
+    def run(self, inputs: Iterable[Tuple[str, str]]) -> Dict:
+        """
+        Rotula as entradas (caminho, tipo de exame) deste shard
+
+        Returns:
+            Estatísticas: labeled (analyzer), reused (conteúdo já rotulado),
+            unchanged (pulados sem leitura), errors, other_shards, removed
+            (caminhos deste shard ausentes das entradas e do disco)
+        """
+        by_path, by_content = self._known_labels()
+        writer = PartWriter(str(self.parts_dir), self.row_group_size, schema=label_schema())
+        stats = {'labeled': 0, 'reused': 0, 'unchanged': 0, 'errors': 0, 'other_shards': 0}
+        seen = set()
+
+        def provenance(record: Dict, key: str, size: int, mtime_ns: int, digest: Optional[str]) -> Dict:
+            record.update(
+                path=key, content_hash=digest, analyzer_version=ANALYZER_VERSION,
+                size=size, mtime_ns=mtime_ns, labeled_at=time.time()
+            )
+            return record
+
+        def pending():
+            # Filtro do shard e fast path por stat, antes de qualquer leitura
+            for path, exam_type in inputs:
+                key = relative_key(path, self.data_dir)
+                if self.num_shards > 1 and shard_of(key, self.num_shards) != self.shard_index:
+                    stats['other_shards'] += 1
+                    continue
+                seen.add(key)
+                try:
+                    stat = os.stat(path)
+                    size, mtime_ns = stat.st_size, stat.st_mtime_ns
+                except OSError:
+                    size = mtime_ns = None
+                known = by_path.get(key)
+                if (
+                    known is not None and size is not None and known['content_hash']
+                    and known['exam_type'] == exam_type
+                    and (known['size'], known['mtime_ns']) == (size, mtime_ns)
+                ):
+                    stats['unchanged'] += 1
+                    continue
+                yield path, exam_type, key, size, mtime_ns
+
+        items = pending()
+        start = time.perf_counter()
+        last_report = start
+
+        # spawn: os workers não herdam as threads de leitura do processo principal
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context,
+            initializer=_init_worker, initargs=(self.threads_per_worker, None)
+        ) as score_pool, ThreadPoolExecutor(max_workers=self.read_threads) as read_pool:
+
+            inflight = {}  # future -> (key, size, mtime_ns, hash) ou None para leituras
+
+            def fill():
+                while len(inflight) < self.window:
+                    item = next(items, None)
+                    if item is None:
+                        return
+                    inflight[read_pool.submit(_read_and_hash, *item)] = None
+
+            fill()
+            while inflight:
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    scored = inflight.pop(future)
+
+                    if scored is None:
+                        path, exam_type, key, size, mtime_ns, data, digest, error = future.result()
+                        if error is not None:
+                            record = error_record(path, exam_type, error)
+                        elif (digest, exam_type) in by_content:
+                            record = dict(by_content[(digest, exam_type)])
+                            stats['reused'] += 1
+                        else:
+                            task = score_pool.submit(_score_bytes, path, exam_type, data)
+                            inflight[task] = (key, size, mtime_ns, digest)
+                            continue
+                        record = provenance(record, key, size, mtime_ns, digest)
+                    else:
+                        record = provenance(future.result(), *scored)
+                        if record['status'] == 'ok':
+                            stats['labeled'] += 1
+                            # Cópias do mesmo conteúdo no resto do corpus não voltam ao analyzer
+                            by_content[(record['content_hash'], record['exam_type'])] = record
+
+                    writer.add(record)
+                    if record['status'] == 'error':
+                        stats['errors'] += 1
+
+                fill()
+
+                now = time.perf_counter()
+                if now - last_report >= self.progress_interval:
+                    logger.info(f"🏷️  {stats['labeled']} rotuladas, {stats['reused']} reaproveitadas, "
+                                f"{stats['unchanged']} sem mudança, {stats['errors']} erros")
+                    last_report = now
+
+        writer.flush()
+
+        elapsed = time.perf_counter() - start
+        stats['seconds'] = elapsed
+        stats['images_per_second'] = stats['labeled'] / elapsed if elapsed else None
+        stats['rows_written'] = writer.rows_written
+        stats['analyzer_version'] = ANALYZER_VERSION
+        stats['removed'] = sum(
+            1 for key in by_path
+            if key not in seen
+            and (self.num_shards == 1 or shard_of(key, self.num_shards) == self.shard_index)
+            and not os.path.exists(label_file(key, self.data_dir))
+        )
+        if self.build_index and (
+            writer.rows_written or stats['removed'] or not (Path(self.data_dir) / LABEL_INDEX_NAME).exists()
+        ):
+            # Sem linhas novas nem remoções o índice não é regravado (mantém os shards de treino válidos)
+            stats['indexed'] = build_label_index(self.data_dir)
+        return stats
@@ -0,0 +1,268 @@
+"""
+SNPQIM Dataset Shards
+Compilação única do dataset de treino em shards memory-mapped
+
+Decodificar e redimensionar cada JPEG de fundo de olho a cada época custa
+mais que o forward de um modelo pequeno. compile_shards() faz isso uma vez:
+
+    shards/
+        index.json                       metadados, caminhos e fingerprint do índice
+        shard-00000-images.npy           (shard_size, 3, H, W) float32 normalizado
+        shard-00000-targets.npy          (shard_size, 8) float32 (TARGET_COLUMNS)
+        ...
+
+Todos os shards têm `shard_size` linhas (o último só usa `count`). O
+index.json é gravado por último (rename atômico): sem ele o cache não existe.
+
+ShardedDataset abre os .npy com np.load(mmap_mode='c') no processo que lê
+(inclusive em workers do DataLoader) e devolve torch.from_numpy das linhas:
+sem decode e sem cópia até o collate do batch.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+from numpy.lib.format import open_memmap
+from torch.utils.data import Dataset
+
+from ..scoring.thread_budget import available_cpus
+from .dataset import (
+    DEFAULT_IMAGE_SIZE,
+    NORMALIZE_MEAN,
+    NORMALIZE_STD,
+    SHARDS_DIRNAME,
+    TARGET_COLUMNS,
+    find_label_index,
+    load_image,
+    load_label_index
+)
+
+logger = logging.getLogger(__name__)
+
+SHARD_FORMAT_VERSION = 1
+INDEX_NAME = 'index.json'
+DEFAULT_SHARD_SIZE = 1024
+
+
+def _shard_files(shard: int) -> Tuple[str, str]:
+    return f'shard-{shard:05d}-images.npy', f'shard-{shard:05d}-targets.npy'
+
+
+def index_fingerprint(data_dir: str) -> Dict:
+    """Identifica a versão do índice de rótulos (nome, tamanho e mtime)"""
+    index_path = find_label_index(data_dir)
+    stat = index_path.stat()
+    return {'file': index_path.name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_shard_index(shards_dir: str) -> Optional[Dict]:
+    """index.json dos shards, ou None se o cache não existe"""
+    path = Path(shards_dir) / INDEX_NAME
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def shards_available(
+    shards_dir: str, 
+    image_size: Optional[int] = None, 
+    data_dir: Optional[str] = None,
+    exam_type: Optional[str] = None
+) -> bool:
+    """
+    True se há shards completos, com o image_size pedido e, se data_dir for
+    informado, compilados a partir da versão atual do índice de rótulos com
+    o mesmo filtro de exam_type
+    """
+    index = read_shard_index(shards_dir)
+    if index is None or index.get('version') != SHARD_FORMAT_VERSION:
+        return False
+    if image_size is not None and index['image_size'] != image_size:
+        return False
+    if data_dir is not None and index['source'] != index_fingerprint(data_dir):
+        logger.warning(f"⚠️  Shards em {shards_dir} desatualizados (índice de rótulos mudou)")
+        return False
+    if data_dir is not None and index.get('exam_type') != exam_type:
+        return False
+    return True
+
+
+def _decoded(
+    paths: List[str], image_size: int, workers: int
+) -> Iterator[Tuple[int, Optional[np.ndarray], Optional[str]]]:
+    """(posição, imagem, erro) em ordem; decode em threads (cv2 libera o GIL)"""
+    def decode(position: int):
+        try:
+            return position, load_image(paths[position], image_size), None
+        except Exception as e:
+            return position, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Janela limitada para não segurar todas as imagens decodificadas
+        window = max(1, workers * 4)
+        pending = []
+        for position in range(len(paths)):
+            pending.append(executor.submit(decode, position))
+            if len(pending) >= window:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def compile_shards(
+    data_dir: str,
+    output_dir: Optional[str] = None,
+    image_size: int = DEFAULT_IMAGE_SIZE,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    workers: Optional[int] = None,
+    exam_type: Optional[str] = None
+) -> Dict:
+    """
+    Decodifica, redimensiona e normaliza o dataset uma vez, em shards .npy
+
+    Imagens que falham no decode são puladas (listadas em index['errors']),
+    as mesmas que SnpqimImageDataset.from_directory remove (drop_undecodable).
+
+    Args:
+        data_dir: Diretório com o índice de rótulos (ver ml.data.dataset)
+        output_dir: Destino dos shards (padrão: data_dir/shards)
+        image_size: Lado da imagem quadrada
+        shard_size: Amostras por shard
+        workers: Threads de decode (padrão: CPUs disponíveis)
+        exam_type: Só as linhas desse tipo de exame (ver load_label_index)
+
+    Returns:
+        Conteúdo do index.json gravado
+    """
+    output = Path(output_dir or os.path.join(data_dir, SHARDS_DIRNAME))
+    output.mkdir(parents=True, exist_ok=True)
+    index_path = output / INDEX_NAME
+    if index_path.exists():
+        index_path.unlink()  # invalida o cache anterior antes de sobrescrever shards
+
+    paths, targets = load_label_index(data_dir, exam_type)
+    workers = workers or available_cpus()
+    start = time.time()
+
+    shards = []
+    kept_paths = []
+    errors = []
+    images = shard_targets = None
+    row = shard_size
+
+    def close_shard():
+        if images is not None:
+            images.flush()
+            shard_targets.flush()
+            shards[-1]['count'] = row
+
+    for position, image, error in _decoded(paths, image_size, workers):
+        if error is not None:
+            errors.append({'path': paths[position], 'error': error})
+            continue
+
+        if row == shard_size:
+            close_shard()
+            image_file, target_file = _shard_files(len(shards))
+            images = open_memmap(output / image_file, mode='w+', dtype=np.float32,
+                                 shape=(shard_size, 3, image_size, image_size))
+            shard_targets = open_memmap(output / target_file, mode='w+', dtype=np.float32,
+                                        shape=(shard_size, len(TARGET_COLUMNS)))
+            shards.append({'images': image_file, 'targets': target_file, 'count': 0})
+            row = 0
+
+        images[row] = image
+        shard_targets[row] = targets[position]
+        kept_paths.append(paths[position])
+        row += 1
+
+    close_shard()
+
+    index = {
+        'version': SHARD_FORMAT_VERSION,
+        'image_size': image_size,
+        'shard_size': shard_size,
+        'dtype': 'float32',
+        'normalize_mean': list(NORMALIZE_MEAN),
+        'normalize_std': list(NORMALIZE_STD),
+        'target_columns': list(TARGET_COLUMNS),
+        'samples': len(kept_paths),
+        'source': index_fingerprint(data_dir),
+        'exam_type': exam_type,
+        'shards': shards,
+        'paths': kept_paths,
+        'errors': errors
+    }
+    tmp_path = index_path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+
+    logger.info(
+        f"📦 {len(kept_paths)} amostras em {len(shards)} shards ({image_size}px) "
+        f"em {time.time() - start:.1f}s; {len(errors)} falhas de decode"
+    )
+    return index
+
+
+class ShardedDataset(Dataset):
+    """
+    Dataset sobre os shards compilados (zero-copy via np.memmap)
+
+    Os arquivos são abertos sob demanda no processo que lê, então o dataset
+    pode ir para workers do DataLoader sem copiar os arrays no pickle.
+    """
+
+    def __init__(self, shards_dir: str):
+        self.shards_dir = Path(shards_dir)
+        index = read_shard_index(shards_dir)
+        if index is None:
+            raise FileNotFoundError(f"Shards não encontrados em {shards_dir} (rode compile_shards)")
+        if index.get('version') != SHARD_FORMAT_VERSION:
+            raise ValueError(f"Versão de shards {index.get('version')} não suportada")
+
+        self.index = index
+        self.image_size = index['image_size']
+        self.shard_size = index['shard_size']
+        self.paths = index['paths']
+        self._arrays: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None
+
+    def __len__(self) -> int:
+        return self.index['samples']
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_arrays'] = None
+        return state
+
+    def _open(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # mmap_mode='c' (copy-on-write): arrays graváveis para o torch, sem tocar o arquivo
+        self._arrays = [
+            (
+                np.load(self.shards_dir / shard['images'], mmap_mode='c'),
+                np.load(self.shards_dir / shard['targets'], mmap_mode='c')
+            )
+            for shard in self.index['shards']
+        ]
+        return self._arrays
+
+    def __getitem__(self, index: int) -> Dict[str, torch.Tensor]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        arrays = self._arrays or self._open()
+        images, targets = arrays[index // self.shard_size]
+        row = index % self.shard_size
+        return {
+            'image': torch.from_numpy(images[row]),
+            'targets': torch.from_numpy(targets[row])
+        }
@@ -0,0 +1,358 @@
+"""
+SNPQIM Export
+Exporta scorers (save_scorer ou checkpoints do SnpqimTrainer) para
+TorchScript ou ONNX, com a normalização embutida e quantização int8 opcional
+
+O artefato recebe imagens RGB uint8 (B, S, S, 3) já redimensionadas e
+devolve (B, 8) em 0-100: quem serve não precisa das classes de modelo, da
+configuração de treino nem das constantes de normalização (ver
+ml.scoring.exported_runtime).
+
+Quantização:
+- dynamic: pesos int8 só nas camadas Linear (cabeça); sem calibração
+- static: pesos e ativações int8 (FX graph mode no TorchScript, QDQ do
+  onnxruntime no ONNX), calibrada em uma amostra do dataset
+
+compare_with_eager() mede latência em CPU e concordância do artefato contra
+o modelo fp32 eager, pelo mesmo caminho de serving (FastQualityScorer).
+"""
+
+import copy
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ..data.dataset import NORMALIZE_MEAN, NORMALIZE_STD, resize_image
+from ..scoring.bulk import iter_inputs
+from ..scoring.exported_runtime import (
+    EXPORT_FORMAT,
+    EXPORT_FORMAT_VERSION,
+    INPUT_NAME,
+    METADATA_FILENAME,
+    ONNX_METADATA_KEY,
+    ONNXRUNTIME_AVAILABLE,
+    OUTPUT_NAME
+)
+from .quality_cnn import load_scorer, stack_outputs
+
+# onnx é opcional: só a exportação ONNX precisa dele
+try:
+    import onnx
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('torchscript', 'onnx')
+QUANTIZATION_MODES = ('dynamic', 'static')
+
+
+class NormalizedScorer(nn.Module):
+    """Modelo com a normalização embutida: uint8 (B, S, S, 3) RGB -> (B, 8)"""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+        # (x / 255 - mean) / std == (x - 255 * mean) / (255 * std)
+        self.register_buffer('mean', torch.tensor(NORMALIZE_MEAN).view(1, 3, 1, 1) * 255.0)
+        self.register_buffer('std', torch.tensor(NORMALIZE_STD).view(1, 3, 1, 1) * 255.0)
+
+    def normalize(self, images: torch.Tensor) -> torch.Tensor:
+        return (images.permute(0, 3, 1, 2).float() - self.mean) / self.std
+
+    def forward(self, images: torch.Tensor) -> torch.Tensor:
+        return stack_outputs(self.model(self.normalize(images)))
+
+
+def sample_images(
+    source: str,
+    samples: int,
+    exam_type: str = 'fundoscopy',
+    pattern: Optional[str] = None,
+    seed: int = 0,
+    image_size: Optional[int] = None
+) -> List[np.ndarray]:
+    """
+    Amostra aleatória de imagens RGB uint8 de um corpus
+
+    Args:
+        source: Diretório, glob ou manifesto (como em ml.scoring.bulk)
+        samples: Imagens na amostra
+        image_size: Redimensiona para a entrada do modelo (None: tamanho original)
+    """
+    paths = [path for path, _ in iter_inputs(source, exam_type, pattern)]
+    random.Random(seed).shuffle(paths)
+    images = []
+    for path in paths:
+        if len(images) >= samples:
+            break
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            logger.warning(f"⚠️  Não foi possível decodificar {path}")
+            continue
+        if image_size is None:
+            images.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        else:
+            images.append(resize_image(image, image_size))
+    if not images:
+        raise ValueError(f"Nenhuma imagem em {source}")
+    return images
+
+
+def calibration_images(
+    source: str,
+    image_size: int,
+    samples: int = 128,
+    exam_type: str = 'fundoscopy',
+    pattern: Optional[str] = None,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Amostra de calibração da quantização estática
+
+    Returns:
+        (N, image_size, image_size, 3) uint8 RGB
+    """
+    return np.stack(sample_images(source, samples, exam_type, pattern, seed, image_size))
+
+
+def _quantized_engine() -> str:
+    """Backend int8 do torch para CPU (x86 > fbgemm > qnnpack)"""
+    for engine in ('x86', 'fbgemm', 'qnnpack'):
+        if engine in torch.backends.quantized.supported_engines:
+            return engine
+    raise RuntimeError("Este build do torch não tem backend de quantização")
+
+
+def quantize_model(
+    model: nn.Module,
+    mode: str,
+    calibration: Optional[np.ndarray] = None,
+    batch_size: int = 32
+) -> nn.Module:
+    """
+    Quantização int8 do torch (o modelo original não é alterado)
+
+    Args:
+        model: Modelo em modo eval (entrada normalizada)
+        mode: 'dynamic' ou 'static'
+        calibration: (N, S, S, 3) uint8, obrigatório em 'static'
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Quantização desconhecida: {mode}. Use: {', '.join(QUANTIZATION_MODES)}")
+    torch.backends.quantized.engine = _quantized_engine()
+    model = copy.deepcopy(model).eval()
+
+    if mode == 'dynamic':
+        return quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+    if calibration is None or not len(calibration):
+        raise ValueError("Quantização estática requer imagens de calibração")
+    normalizer = NormalizedScorer(nn.Identity())
+    example = normalizer.normalize(torch.from_numpy(calibration[:1]))
+    prepared = prepare_fx(model, get_default_qconfig_mapping(torch.backends.quantized.engine), (example,))
+    with torch.inference_mode():
+        for start in range(0, len(calibration), batch_size):
+            prepared(normalizer.normalize(torch.from_numpy(calibration[start:start + batch_size])))
+    return convert_fx(prepared)
+
+
+def _export_torchscript(model: nn.Module, output_path: str, example: torch.Tensor, info: Dict[str, Any]):
+    with torch.inference_mode():
+        traced = torch.jit.freeze(torch.jit.trace(NormalizedScorer(model).eval(), example))
+    torch.jit.save(traced, output_path, _extra_files={METADATA_FILENAME: json.dumps(info)})
+
+
+def _export_onnx(
+    model: nn.Module,
+    output_path: str,
+    example: torch.Tensor,
+    info: Dict[str, Any],
+    quantization: Optional[str],
+    calibration: Optional[np.ndarray],
+    batch_size: int
+):
+    if not ONNX_AVAILABLE:
+        raise ImportError("Exportação ONNX requer onnx (pip install onnx)")
+    if quantization and not ONNXRUNTIME_AVAILABLE:
+        raise ImportError("Quantização ONNX requer onnxruntime (pip install onnxruntime)")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'fp32.onnx')
+        torch.onnx.export(
+            NormalizedScorer(model).eval(), (example,), path,
+            input_names=[INPUT_NAME], output_names=[OUTPUT_NAME],
+            dynamic_axes={INPUT_NAME: {0: 'batch'}, OUTPUT_NAME: {0: 'batch'}},
+            dynamo=False
+        )
+        if quantization == 'dynamic':
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(path, os.path.join(tmp_dir, 'int8.onnx'), weight_type=QuantType.QInt8)
+            path = os.path.join(tmp_dir, 'int8.onnx')
+        elif quantization == 'static':
+            if calibration is None or not len(calibration):
+                raise ValueError("Quantização estática requer imagens de calibração")
+            from onnxruntime.quantization import (
+                CalibrationDataReader, QuantFormat, QuantType, quantize_static
+            )
+
+            class _Reader(CalibrationDataReader):
+                def __init__(self):
+                    self._batches = iter([
+                        {INPUT_NAME: calibration[start:start + batch_size]}
+                        for start in range(0, len(calibration), batch_size)
+                    ])
+
+                def get_next(self):
+                    return next(self._batches, None)
+
+            quantize_static(path, os.path.join(tmp_dir, 'int8.onnx'), _Reader(),
+                            quant_format=QuantFormat.QDQ, weight_type=QuantType.QInt8)
+            path = os.path.join(tmp_dir, 'int8.onnx')
+
+        # Metadados depois da quantização (o onnxruntime não os preserva)
+        exported = onnx.load(path)
+        entry = exported.metadata_props.add()
+        entry.key = ONNX_METADATA_KEY
+        entry.value = json.dumps(info)
+        onnx.save(exported, output_path)
+
+
+def export_scorer(
+    model_path: str,
+    output_path: str,
+    export_format: str = 'torchscript',
+    quantization: Optional[str] = None,
+    calibration: Optional[np.ndarray] = None,
+    batch_size: int = 32
+) -> Dict[str, Any]:
+    """
+    Exporta um scorer para inferência em CPU
+
+    Args:
+        model_path: Arquivo de save_scorer ou checkpoint do SnpqimTrainer
+        output_path: Artefato gerado (.pt para TorchScript, .onnx para ONNX)
+        export_format: 'torchscript' ou 'onnx'
+        quantization: None (fp32), 'dynamic' ou 'static'
+        calibration: (N, S, S, 3) uint8 para 'static' (ver calibration_images)
+        batch_size: Batch da calibração
+
+    Returns:
+        Metadados gravados no artefato
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato desconhecido: {export_format}. Use: {', '.join(EXPORT_FORMATS)}")
+    if quantization is not None and quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Quantização desconhecida: {quantization}. Use: {', '.join(QUANTIZATION_MODES)}")
+    if quantization == 'static' and (calibration is None or not len(calibration)):
+        raise ValueError("Quantização estática requer imagens de calibração")
+
+    start = time.time()
+    model, scorer_info = load_scorer(model_path)
+    image_size = scorer_info['image_size']
+    info = {
+        'format': EXPORT_FORMAT,
+        'version': EXPORT_FORMAT_VERSION,
+        'model_config': scorer_info['model_config'],
+        'image_size': image_size,
+        'metadata': {
+            **scorer_info['metadata'],
+            'export': {
+                'format': export_format,
+                'quantization': quantization or 'fp32',
+                'calibration_samples': len(calibration) if quantization == 'static' else 0,
+                'parameters': sum(p.numel() for p in model.parameters()),
+                'source': os.path.basename(model_path),
+                'torch_version': torch.__version__,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+            }
+        }
+    }
+    example = torch.zeros(1, image_size, image_size, 3, dtype=torch.uint8)
+
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if export_format == 'torchscript':
+        if quantization:
+            model = quantize_model(model, quantization, calibration, batch_size)
+            info['metadata']['export']['quantized_engine'] = torch.backends.quantized.engine
+        _export_torchscript(model, output_path, example, info)
+    else:
+        _export_onnx(model, output_path, example, info, quantization, calibration, batch_size)
+
+    logger.info(f"📦 {model_path} -> {output_path} ({export_format}, {quantization or 'fp32'}, "
+                f"{os.path.getsize(output_path) / 1024:.0f} KB, {time.time() - start:.1f}s)")
+    return info
+
+
+def _best_seconds(fn, repeat: int) -> float:
+    fn()  # aquecimento
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def compare_with_eager(
+    model_path: str,
+    exported_path: str,
+    images: List[np.ndarray],
+    exam_type: str = 'fundoscopy',
+    repeat: int = 3
+) -> Dict[str, Any]:
+    """
+    Latência em CPU e concordância de um artefato exportado contra o fp32 eager
+
+    Os dois passam pelo FastQualityScorer (mesmo resize e mesmas regras do
+    analyzer), então a concordância é a do score servido.
+
+    Args:
+        model_path: Scorer original (fp32 eager)
+        exported_path: Artefato de export_scorer
+        images: Imagens RGB uint8 (qualquer tamanho)
+        repeat: Repetições de cada medida (vale o melhor tempo)
+    """
+    from ..scoring.fast_engine import AgreementTracker, FastQualityScorer
+
+    eager = FastQualityScorer(model_path, max_batch_size=len(images))
+    exported = FastQualityScorer(exported_path, max_batch_size=len(images))
+
+    latency = {}
+    for name, engine in (('eager_fp32', eager), ('exported', exported)):
+        single = _best_seconds(lambda: [engine.predict([image]) for image in images], repeat)
+        batch = _best_seconds(lambda: engine.predict(images), repeat)
+        latency[name] = {
+            'ms_per_image_batch1': single / len(images) * 1e3,
+            f'ms_per_image_batch{len(images)}': batch / len(images) * 1e3
+        }
+
+    tracker = AgreementTracker()
+    for fast_score, reference_score in zip(exported.score_images(images, exam_type),
+                                           eager.score_images(images, exam_type)):
+        tracker.update(fast_score, reference_score)
+
+    return {
+        'images': len(images),
+        'export': exported.metadata.get('export'),
+        'latency': latency,
+        'speedup': {
+            key: latency['eager_fp32'][key] / latency['exported'][key] for key in latency['exported']
+        },
+        'max_abs_diff': float(np.abs(exported.predict(images) - eager.predict(images)).max()),
+        'agreement': tracker.summary()
+    }
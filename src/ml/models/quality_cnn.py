@@ -0,0 +1,238 @@
+"""
+SNPQIM Quality CNN
+Modelos de quality assessment com as mesmas saídas do analyzer de referência
+
+Todas as variantes recebem (B, 3, H, W) normalizado (ver ml.data.dataset) e
+devolvem, em 0-100:
+    {'global_score': (B, 1), 'dimension_scores': (B, 6), 'confidence': (B, 1)}
+com as dimensões na ordem de DIMENSION_NAMES (formato aceito direto pelas
+losses e métricas de ml.training).
+
+- SnpqimFastScorer: CNN pequena (convoluções separáveis), feita para CPU e
+  destilada do WingsAIQualityAnalyzer (ver ml.training.distillation)
+- SnpqimQualityResNet: backbone torchvision (opcional) com a mesma cabeça
+- SnpqimEnsembleModel: média das saídas de vários modelos
+
+create_snpqim_model() monta o modelo a partir de model_config
+({'type': ..., 'params': {...}}); save_scorer/load_scorer guardam pesos,
+configuração e metadados (image_size, versão do analyzer, concordância).
+"""
+
+import logging
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import torch
+import torch.nn as nn
+
+from ..data.dataset import DEFAULT_IMAGE_SIZE
+from ..scoring.wingsai_core import DIMENSION_NAMES
+
+try:
+    import torchvision
+    TORCHVISION_AVAILABLE = True
+except ImportError:
+    TORCHVISION_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SCORER_FORMAT = 'snpqim-scorer'
+SCORER_FORMAT_VERSION = 1
+
+# global + 6 dimensões + confiança
+NUM_OUTPUTS = 1 + len(DIMENSION_NAMES) + 1
+
+
+class QualityHead(nn.Module):
+    """Cabeça compartilhada: features -> 8 saídas em 0-100"""
+
+    def __init__(self, in_features: int, hidden: int = 64, dropout_rate: float = 0.1):
+        super().__init__()
+        self.layers = nn.Sequential(
+            nn.Linear(in_features, hidden),
+            nn.ReLU(inplace=True),
+            nn.Dropout(dropout_rate),
+            nn.Linear(hidden, NUM_OUTPUTS)
+        )
+
+    def forward(self, features: torch.Tensor) -> Dict[str, torch.Tensor]:
+        outputs = torch.sigmoid(self.layers(features)) * 100.0
+        return {
+            'global_score': outputs[:, :1],
+            'dimension_scores': outputs[:, 1:1 + len(DIMENSION_NAMES)],
+            'confidence': outputs[:, -1:]
+        }
+
+
+def _separable_block(in_channels: int, out_channels: int, stride: int) -> nn.Sequential:
+    """Depthwise 3x3 + pointwise 1x1 (custo ~1/8 de uma conv 3x3 cheia)"""
+    return nn.Sequential(
+        nn.Conv2d(in_channels, in_channels, 3, stride, 1, groups=in_channels, bias=False),
+        nn.BatchNorm2d(in_channels),
+        nn.ReLU(inplace=True),
+        nn.Conv2d(in_channels, out_channels, 1, bias=False),
+        nn.BatchNorm2d(out_channels),
+        nn.ReLU(inplace=True)
+    )
+
+
+class SnpqimFastScorer(nn.Module):
+    """
+    CNN pequena para scoring em CPU
+
+    As dimensões do analyzer dependem tanto de detalhes finos (nitidez,
+    ruído) quanto de estatísticas globais (exposição, contraste), então a
+    cabeça recebe média e máximo globais das features finais.
+
+    Args:
+        num_quality_dimensions: Dimensões de saída (precisa ser 6)
+        width: Canais do primeiro estágio (dobra a cada redução)
+        dropout_rate: Dropout da cabeça
+    """
+
+    def __init__(self, num_quality_dimensions: int = 6, width: int = 16, dropout_rate: float = 0.1):
+        super().__init__()
+        if num_quality_dimensions != len(DIMENSION_NAMES):
+            raise ValueError(f"num_quality_dimensions deve ser {len(DIMENSION_NAMES)}")
+
+        stages = [(width, 2 * width, 2), (2 * width, 4 * width, 2), (4 * width, 4 * width, 1),
+                  (4 * width, 8 * width, 2), (8 * width, 8 * width, 2)]
+        self.features = nn.Sequential(
+            nn.Conv2d(3, width, 3, 2, 1, bias=False),
+            nn.BatchNorm2d(width),
+            nn.ReLU(inplace=True),
+            *(_separable_block(c_in, c_out, stride) for c_in, c_out, stride in stages)
+        )
+        self.head = QualityHead(2 * 8 * width, dropout_rate=dropout_rate)
+
+    def forward(self, images: torch.Tensor) -> Dict[str, torch.Tensor]:
+        # (B, C, H*W): a redução em uma dimensão também quantiza com mapas 1x1
+        features = self.features(images).flatten(2)
+        pooled = torch.cat([features.mean(dim=2), features.amax(dim=2)], dim=1)
+        return self.head(pooled)
+
+
+class SnpqimQualityResNet(nn.Module):
+    """
+    Backbone ResNet (torchvision) com a cabeça de qualidade
+
+    Args:
+        backbone: resnet18, resnet34, resnet50...
+        num_quality_dimensions: Dimensões de saída (precisa ser 6)
+        dropout_rate: Dropout da cabeça
+        pretrained: Pesos ImageNet do torchvision
+    """
+
+    def __init__(
+        self,
+        backbone: str = 'resnet50',
+        num_quality_dimensions: int = 6,
+        dropout_rate: float = 0.3,
+        pretrained: bool = False
+    ):
+        super().__init__()
+        if not TORCHVISION_AVAILABLE:
+            raise ImportError("SnpqimQualityResNet requer torchvision (pip install torchvision)")
+        if num_quality_dimensions != len(DIMENSION_NAMES):
+            raise ValueError(f"num_quality_dimensions deve ser {len(DIMENSION_NAMES)}")
+
+        self.backbone = getattr(torchvision.models, backbone)(weights='DEFAULT' if pretrained else None)
+        in_features = self.backbone.fc.in_features
+        self.backbone.fc = nn.Identity()
+        self.head = QualityHead(in_features, hidden=256, dropout_rate=dropout_rate)
+
+    def forward(self, images: torch.Tensor) -> Dict[str, torch.Tensor]:
+        return self.head(self.backbone(images))
+
+
+class SnpqimEnsembleModel(nn.Module):
+    """Média das saídas de vários modelos SNPQIM"""
+
+    def __init__(self, models: Sequence[nn.Module]):
+        super().__init__()
+        if not models:
+            raise ValueError("Ensemble precisa de ao menos um modelo")
+        self.models = nn.ModuleList(models)
+
+    def forward(self, images: torch.Tensor) -> Dict[str, torch.Tensor]:
+        outputs = [model(images) for model in self.models]
+        return {key: torch.stack([o[key] for o in outputs]).mean(dim=0) for key in outputs[0]}
+
+
+MODEL_TYPES = {
+    'fast': SnpqimFastScorer,
+    'single': SnpqimQualityResNet,
+}
+
+
+def create_snpqim_model(model_config: Dict[str, Any]) -> nn.Module:
+    """
+    Cria um modelo a partir da configuração
+
+    Args:
+        model_config: {'type': 'fast' | 'single' | 'ensemble', 'params': {...}};
+            no ensemble, params['members'] é uma lista de model_config
+    """
+    model_type = model_config.get('type', 'fast')
+    params = dict(model_config.get('params') or {})
+
+    if model_type == 'ensemble':
+        return SnpqimEnsembleModel([create_snpqim_model(member) for member in params['members']])
+    if model_type not in MODEL_TYPES:
+        raise ValueError(
+            f"Tipo de modelo desconhecido: {model_type}. Use: {', '.join([*MODEL_TYPES, 'ensemble'])}"
+        )
+    return MODEL_TYPES[model_type](**params)
+
+
+def save_scorer(
+    path: str,
+    model: nn.Module,
+    model_config: Dict[str, Any],
+    image_size: int = DEFAULT_IMAGE_SIZE,
+    metadata: Optional[Dict[str, Any]] = None
+):
+    """Grava pesos + configuração + metadados (só tipos primitivos)"""
+    torch.save({
+        'format': SCORER_FORMAT,
+        'version': SCORER_FORMAT_VERSION,
+        'model_config': model_config,
+        'image_size': image_size,
+        'state_dict': model.state_dict(),
+        'metadata': metadata or {}
+    }, path)
+
+
+def load_scorer(path: str, map_location: str = 'cpu') -> Tuple[nn.Module, Dict[str, Any]]:
+    """
+    Carrega um modelo gravado por save_scorer ou um checkpoint do SnpqimTrainer
+
+    Returns:
+        (modelo em modo eval, {'model_config', 'image_size', 'metadata'})
+    """
+    checkpoint = torch.load(path, map_location=map_location, weights_only=True)
+
+    if checkpoint.get('format') == SCORER_FORMAT:
+        if checkpoint['version'] != SCORER_FORMAT_VERSION:
+            raise ValueError(f"Versão de scorer {checkpoint['version']} não suportada")
+        model_config = checkpoint['model_config']
+        state_dict = checkpoint['state_dict']
+        info = {'image_size': checkpoint['image_size'], 'metadata': checkpoint['metadata']}
+    elif 'model_state_dict' in checkpoint:
+        config = checkpoint['config']
+        model_config = config['model_config']
+        state_dict = checkpoint['model_state_dict']
+        info = {'image_size': config.get('image_size', DEFAULT_IMAGE_SIZE),
+                'metadata': {'metrics': checkpoint.get('metrics', {})}}
+    else:
+        raise ValueError(f"{path} não é um scorer nem um checkpoint SNPQIM")
+
+    model = create_snpqim_model(model_config)
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model, {'model_config': model_config, **info}
+
+
+def stack_outputs(outputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+    """Saídas do modelo como (B, 8) na ordem de TARGET_COLUMNS"""
+    return torch.cat([outputs['global_score'], outputs['dimension_scores'], outputs['confidence']], dim=1)
+
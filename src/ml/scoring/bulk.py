@@ -0,0 +1,453 @@
+"""
+WingsAI - Scoring em Massa (offline)
+Pontua diretórios, globs ou manifestos com milhões de imagens
+
+Pipeline com prefetch limitado:
+    threads de leitura (I/O) -> processos (decode + scoring) -> writer Parquet
+
+O resultado é um dataset Parquet (um arquivo por row group commitado,
+gravado com rename atômico). Uma execução interrompida é retomada a partir
+do último row group commitado: caminhos já presentes no dataset são pulados.
+"""
+
+import csv
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from .thread_budget import apply_thread_budget, available_cpus
+from .wingsai_core import DIMENSION_NAMES, WingsAIQualityAnalyzer, WingsAIScore, resolve_fields
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp'}
+MANIFEST_EXTENSIONS = {'.txt', '.csv'}
+
+PART_PREFIX = 'part-'
+PART_SUFFIX = '.parquet'
+
+
+def result_schema():
+    """Schema Arrow das linhas de resultado (uma por imagem)"""
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ('path', pa.string()),
+            ('exam_type', pa.string()),
+            ('status', pa.string()),  # 'ok' ou 'error'
+            ('error', pa.string()),
+            ('width', pa.int32()),
+            ('height', pa.int32()),
+            ('global_score', pa.float32()),
+            ('confidence', pa.float32()),
+            ('ml_readiness', pa.string()),
+            ('clinical_adequacy', pa.string()),
+        ]
+        + [(f'dim_{dim}', pa.float32()) for dim in DIMENSION_NAMES]
+        + [
+            ('recommendation_codes', pa.list_(pa.string())),  # chaves do catálogo
+            ('skipped_dimensions', pa.list_(pa.string())),
+            ('seconds', pa.float32()),
+        ]
+    )
+
+
+def score_to_record(
+    path: str,
+    exam_type: str,
+    score: WingsAIScore,
+    shape: Optional[Tuple[int, ...]] = None,
+    seconds: Optional[float] = None
+) -> Dict:
+    """
+    Achata um WingsAIScore em uma linha do schema de resultado
+
+    Recomendações são gravadas como códigos (ex: 'low_sharpness'): o texto é
+    montado só na leitura, no idioma de quem consulta.
+    """
+    codes = score.recommendation_codes
+    record = {
+        'path': path,
+        'exam_type': exam_type,
+        'status': 'ok',
+        'error': None,
+        'width': int(shape[1]) if shape is not None else None,
+        'height': int(shape[0]) if shape is not None else None,
+        'global_score': score.global_score,
+        'confidence': score.confidence,
+        'ml_readiness': score.ml_readiness,
+        'clinical_adequacy': score.clinical_adequacy,
+        'recommendation_codes': [code.key for code in codes] if codes is not None else None,
+        'skipped_dimensions': list(score.skipped_dimensions),
+        'seconds': seconds
+    }
+    for dim in DIMENSION_NAMES:
+        record[f'dim_{dim}'] = score.dimension_scores.get(dim)
+    return record
+
+
+def conform_table(table, schema):
+    """
+    Ajusta ao schema atual uma tabela gravada com um schema anterior
+    (colunas novas viram nulas, colunas removidas são descartadas)
+    """
+    import pyarrow as pa
+
+    if table.schema.equals(schema):
+        return table
+    columns = [
+        table.column(f.name).cast(f.type) if f.name in table.column_names
+        else pa.nulls(table.num_rows, f.type)
+        for f in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def error_record(path: str, exam_type: str, error: str) -> Dict:
+    """Linha de resultado para imagem que não pôde ser lida/decodificada"""
+    return {'path': path, 'exam_type': exam_type, 'status': 'error', 'error': error}
+
+
+# ---------------------------------------------------------------------------
+# Entradas
+# ---------------------------------------------------------------------------
+
+def _read_manifest(manifest: Path, default_exam_type: str) -> Iterator[Tuple[str, str]]:
+    """
+    Manifesto .txt (um caminho por linha) ou .csv (coluna `path` e
+    opcionalmente `exam_type`). Caminhos relativos partem do diretório
+    do manifesto.
+    """
+    base = manifest.parent
+
+    def resolve(p: str) -> str:
+        return str(base / p) if not os.path.isabs(p) else p
+
+    with open(manifest, newline='', encoding='utf-8') as f:
+        if manifest.suffix == '.csv':
+            for row in csv.DictReader(f):
+                yield resolve(row['path']), row.get('exam_type') or default_exam_type
+        else:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield resolve(line), default_exam_type
+
+
+def iter_inputs(
+    source: str,
+    exam_type: str = 'fundoscopy',
+    pattern: Optional[str] = None
+) -> Iterator[Tuple[str, str]]:
+    """
+    Itera (caminho, tipo de exame) de um diretório, glob ou manifesto
+
+    Args:
+        source: Diretório (busca recursiva), padrão glob ou manifesto .txt/.csv
+        exam_type: Tipo de exame padrão
+        pattern: Padrão glob dentro do diretório (padrão: extensões de imagem)
+    """
+    path = Path(source)
+
+    if path.is_file() and path.suffix.lower() in MANIFEST_EXTENSIONS:
+        yield from _read_manifest(path, exam_type)
+    elif path.is_dir():
+        if pattern:
+            files = path.rglob(pattern)
+        else:
+            files = (p for p in path.rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS)
+        for file_path in files:
+            yield str(file_path), exam_type
+    else:
+        for file_path in glob.iglob(source, recursive=True):
+            yield file_path, exam_type
+
+
+# ---------------------------------------------------------------------------
+# Workers (processos)
+# ---------------------------------------------------------------------------
+
+_worker_state: Dict = {}
+
+
+def _init_worker(threads: int, fields: Optional[List[str]]):
+    """Initializer dos processos: orçamento de threads e analyzer próprio"""
+    apply_thread_budget(threads)
+    _worker_state['analyzer'] = WingsAIQualityAnalyzer()
+    _worker_state['fields'] = fields
+
+
+def _score_bytes(path: str, exam_type: str, data: bytes) -> Dict:
+    """Decodifica e pontua uma imagem (executado no processo worker)"""
+    start = time.perf_counter()
+    try:
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return error_record(path, exam_type, "Não foi possível decodificar a imagem")
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+        score = _worker_state['analyzer'].analyze_image(
+            image, exam_type=exam_type, fields=_worker_state['fields']
+        )
+        return score_to_record(path, exam_type, score, image.shape, time.perf_counter() - start)
+    except Exception as e:
+        return error_record(path, exam_type, f"{type(e).__name__}: {e}")
+
+
+def _read_file(path: str, exam_type: str) -> Tuple[str, str, Optional[bytes], Optional[str]]:
+    """Leitura dos bytes (threads de I/O no processo principal)"""
+    try:
+        with open(path, 'rb') as f:
+            return path, exam_type, f.read(), None
+    except OSError as e:
+        return path, exam_type, None, str(e)
+
+
+# ---------------------------------------------------------------------------
+# Saída Parquet particionada por row group
+# ---------------------------------------------------------------------------
+
+class PartWriter:
+    """
+    Acumula linhas e commita cada row group como um arquivo Parquet
+
+    Cada parte é escrita em `.tmp` e renomeada atomicamente: uma parte
+    visível no diretório está sempre completa.
+    """
+
+    def __init__(self, output_dir: str, row_group_size: int = 1024, schema=None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self.schema = schema if schema is not None else result_schema()
+        self.buffer: List[Dict] = []
+        self.next_part = self._next_part_index()
+        self.rows_written = 0
+
+    def _next_part_index(self) -> int:
+        indices = [
+            int(p.name[len(PART_PREFIX):-len(PART_SUFFIX)])
+            for p in self.output_dir.glob(f'{PART_PREFIX}*{PART_SUFFIX}')
+        ]
+        return max(indices) + 1 if indices else 0
+
+    def add(self, record: Dict):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Commita as linhas em buffer como uma nova parte"""
+        if not self.buffer:
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(self.buffer, schema=self.schema)
+        final_path = self.output_dir / f'{PART_PREFIX}{self.next_part:06d}{PART_SUFFIX}'
+        tmp_path = final_path.with_suffix('.tmp')
+
+        pq.write_table(table, tmp_path, row_group_size=len(self.buffer))
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, final_path)
+
+        self.rows_written += len(self.buffer)
+        self.next_part += 1
+        self.buffer = []
+
+
+def load_completed_paths(output_dir: str) -> Set[str]:
+    """
+    Caminhos já commitados no dataset (para retomar execuções)
+    Remove partes `.tmp` deixadas por uma execução interrompida.
+    """
+    import pyarrow.parquet as pq
+
+    output_path = Path(output_dir)
+    if not output_path.exists():
+        return set()
+
+    for tmp in output_path.glob(f'{PART_PREFIX}*.tmp'):
+        tmp.unlink()
+
+    completed = set()
+    for part in sorted(output_path.glob(f'{PART_PREFIX}*{PART_SUFFIX}')):
+        completed.update(pq.read_table(part, columns=['path']).column('path').to_pylist())
+    return completed
+
+
+def clear_parts(output_dir: str) -> int:
+    """
+    Remove as partes (e `.tmp`) de execuções anteriores, para recomeçar do zero
+    Outros arquivos do diretório não são tocados.
+
+    Returns:
+        Número de partes removidas
+    """
+    output_path = Path(output_dir)
+    if not output_path.exists():
+        return 0
+
+    removed = 0
+    for part in output_path.glob(f'{PART_PREFIX}*'):
+        if part.suffix in (PART_SUFFIX, '.tmp'):
+            part.unlink()
+            removed += 1
+    return removed
+
+
+def compact_parts(output_dir: str, output_file: str) -> int:
+    """
+    Junta as partes em um único arquivo Parquet (preserva os row groups)
+
+    Returns:
+        Número de linhas escritas
+    """
+    import pyarrow.parquet as pq
+
+    parts = sorted(Path(output_dir).glob(f'{PART_PREFIX}*{PART_SUFFIX}'))
+    rows = 0
+    with pq.ParquetWriter(output_file, result_schema()) as writer:
+        for part in parts:
+            # Partes de execuções anteriores podem ter o schema antigo
+            table = conform_table(pq.read_table(part), result_schema())
+            writer.write_table(table)
+            rows += table.num_rows
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Orquestração
+# ---------------------------------------------------------------------------
+
+class BulkScorer:
+    """
+    Scoring em massa com processos e prefetch limitado
+
+    Args:
+        output_dir: Diretório do dataset Parquet de saída
+        workers: Processos de scoring (padrão: CPUs disponíveis)
+        threads_per_worker: Orçamento de threads por processo
+        read_threads: Threads de leitura de arquivos
+        prefetch: Imagens em voo por worker (limita memória)
+        row_group_size: Linhas por row group commitado
+        fields: Subconjunto de saídas/dimensões (ver resolve_fields)
+        resume: Pula caminhos já commitados em output_dir; sem resume, as
+            partes existentes são apagadas (senão cada imagem sairia duplicada)
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        workers: Optional[int] = None,
+        threads_per_worker: int = 1,
+        read_threads: int = 4,
+        prefetch: int = 4,
+        row_group_size: int = 1024,
+        fields: Optional[List[str]] = None,
+        resume: bool = True,
+        progress_interval: float = 10.0
+    ):
+        self.output_dir = output_dir
+        self.workers = workers or available_cpus()
+        self.threads_per_worker = threads_per_worker
+        self.read_threads = read_threads
+        self.window = self.workers * prefetch
+        self.row_group_size = row_group_size
+        # Campo inválido falha aqui, não como linha de erro em cada imagem
+        resolve_fields(fields)
+        self.fields = fields
+        self.resume = resume
+        self.progress_interval = progress_interval
+
+    def run(self, inputs: Iterable[Tuple[str, str]]) -> Dict:
+        """
+        Pontua todas as entradas (caminho, tipo de exame)
+
+        Returns:
+            Estatísticas da execução
+        """
+        if self.resume:
+            completed = load_completed_paths(self.output_dir)
+        else:
+            completed = set()
+            removed = clear_parts(self.output_dir)
+            if removed:
+                logger.info(f"🗑️  Recomeçando: {removed} partes anteriores removidas")
+        if completed:
+            logger.info(f"♻️  Retomando: {len(completed)} imagens já commitadas")
+
+        pending = ((p, e) for p, e in inputs if p not in completed)
+        writer = PartWriter(self.output_dir, self.row_group_size)
+        stats = {'scored': 0, 'errors': 0, 'skipped': len(completed)}
+
+        start = time.perf_counter()
+        last_report = start
+
+        # spawn: os workers não herdam as threads de leitura do processo principal
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context,
+            initializer=_init_worker, initargs=(self.threads_per_worker, self.fields)
+        ) as score_pool, ThreadPoolExecutor(max_workers=self.read_threads) as read_pool:
+
+            inflight = set()
+            reading = set()
+
+            def fill():
+                # Leituras + scoring em voo nunca passam da janela
+                while len(inflight) < self.window:
+                    item = next(pending, None)
+                    if item is None:
+                        return
+                    future = read_pool.submit(_read_file, *item)
+                    reading.add(future)
+                    inflight.add(future)
+
+            fill()
+            while inflight:
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    inflight.discard(future)
+
+                    if future in reading:
+                        reading.discard(future)
+                        path, exam_type, data, error = future.result()
+                        if error is not None:
+                            record = error_record(path, exam_type, error)
+                        else:
+                            inflight.add(score_pool.submit(_score_bytes, path, exam_type, data))
+                            continue
+                    else:
+                        record = future.result()
+
+                    writer.add(record)
+                    stats['errors' if record['status'] == 'error' else 'scored'] += 1
+
+                fill()
+
+                now = time.perf_counter()
+                if now - last_report >= self.progress_interval:
+                    done_count = stats['scored'] + stats['errors']
+                    logger.info(f"📊 {done_count} imagens ({done_count / (now - start):.1f} img/s), "
+                                f"{writer.rows_written} commitadas")
+                    last_report = now
+
+        writer.flush()
+
+        elapsed = time.perf_counter() - start
+        stats['seconds'] = elapsed
+        stats['images_per_second'] = (stats['scored'] + stats['errors']) / elapsed if elapsed else None
+        stats['parts'] = writer.next_part
+        return stats
@@ -0,0 +1,128 @@
+"""
+WingsAI - Runtime dos Modelos Exportados
+Carrega os artefatos de ml.models.export sem as classes de modelo nem o
+stack de treino
+
+Os artefatos recebem imagens RGB uint8 (B, S, S, 3) já redimensionadas e
+devolvem (B, 8) em 0-100 na ordem de METRIC_COLUMNS: a normalização está
+dentro do grafo. Formatos:
+
+- TorchScript (.pt): torch.jit.load; metadados no arquivo extra
+  'snpqim.json' do zip
+- ONNX (.onnx): onnxruntime (opcional), sem torch; metadados em
+  metadata_props['snpqim']
+
+Uso:
+    runtime = ExportedScorer('models/fast_int8.pt')
+    scores = runtime.predict(batch_uint8)    # (B, 8) float64
+"""
+
+import json
+import os
+import zipfile
+from typing import Any, Dict
+
+import numpy as np
+
+from .thread_budget import THREADS_ENV_VAR
+
+# onnxruntime é opcional: só os artefatos .onnx precisam dele
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+EXPORT_FORMAT = 'snpqim-export'
+EXPORT_FORMAT_VERSION = 1
+# Arquivo extra do TorchScript / chave de metadata_props do ONNX
+METADATA_FILENAME = 'snpqim.json'
+ONNX_METADATA_KEY = 'snpqim'
+INPUT_NAME = 'images'
+OUTPUT_NAME = 'scores'
+
+
+def is_exported(path: str) -> bool:
+    """True para artefatos de ml.models.export (False para save_scorer/checkpoints)"""
+    if path.lower().endswith('.onnx'):
+        return True
+    if not zipfile.is_zipfile(path):
+        return False
+    with zipfile.ZipFile(path) as archive:
+        return any(name.endswith(f'extra/{METADATA_FILENAME}') for name in archive.namelist())
+
+
+def _check_metadata(path: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    if metadata.get('format') != EXPORT_FORMAT:
+        raise ValueError(f"{path} não é um modelo SNPQIM exportado")
+    if metadata.get('version') != EXPORT_FORMAT_VERSION:
+        raise ValueError(f"Versão de exportação {metadata.get('version')} não suportada")
+    return metadata
+
+
+class ExportedScorer:
+    """
+    Modelo exportado pronto para inferência em CPU
+
+    Args:
+        path: Artefato TorchScript (.pt) ou ONNX (.onnx)
+
+    Atributos:
+        image_size: Lado da entrada esperada
+        metadata: Metadados do scorer original (exam_types, analyzer_version,
+            agreement...) mais 'export' (formato, quantização, parâmetros)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path.lower().endswith('.onnx'):
+            self._load_onnx(path)
+        else:
+            self._load_torchscript(path)
+        self.image_size = self.info['image_size']
+        self.metadata = self.info['metadata']
+        self.model_config = self.info['model_config']
+
+    def _load_torchscript(self, path: str):
+        import torch
+
+        extra_files = {METADATA_FILENAME: ''}
+        self._module = torch.jit.load(path, map_location='cpu', _extra_files=extra_files)
+        self._module.eval()
+        self.info = _check_metadata(path, json.loads(extra_files[METADATA_FILENAME]))
+        self.backend = 'torchscript'
+        # Modelos int8 rodam no backend de quantização usado na exportação
+        quantized_engine = self.info['metadata'].get('export', {}).get('quantized_engine')
+        if quantized_engine:
+            torch.backends.quantized.engine = quantized_engine
+
+    def _load_onnx(self, path: str):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("Modelos .onnx requerem onnxruntime (pip install onnxruntime)")
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = int(os.environ.get(THREADS_ENV_VAR, 0))
+        self._session = onnxruntime.InferenceSession(
+            path, options, providers=['CPUExecutionProvider']
+        )
+        metadata = self._session.get_modelmeta().custom_metadata_map.get(ONNX_METADATA_KEY, '{}')
+        self.info = _check_metadata(path, json.loads(metadata))
+        self.backend = 'onnxruntime'
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        """
+        Forward de um batch
+
+        Args:
+            images: (B, image_size, image_size, 3) uint8 RGB
+
+        Returns:
+            (B, 8) float64 na ordem de METRIC_COLUMNS, em 0-100
+        """
+        images = np.ascontiguousarray(images, dtype=np.uint8)
+        if self.backend == 'onnxruntime':
+            outputs = self._session.run([OUTPUT_NAME], {INPUT_NAME: images})[0]
+            return outputs.astype(np.float64)
+
+        import torch
+        with torch.inference_mode():
+            return self._module(torch.from_numpy(images)).double().numpy()
@@ -0,0 +1,211 @@
+"""
+WingsAI - Engine Rápida (modelo destilado)
+Scoring com a CNN destilada do analyzer de referência (ver ml.training.distillation)
+
+A rede estima as seis dimensões e a confiança em um forward por batch; score
+global, classificações e recomendações saem das mesmas regras do analyzer
+(WingsAIQualityAnalyzer.score_from_dimensions), então a resposta tem o mesmo
+formato da engine de referência.
+
+AgreementTracker acumula, em memória constante, a concordância entre as duas
+engines nas requisições em que ambas rodam (ver backend: engine=reference
+com WINGSAI_FAST_AGREEMENT_RATE).
+
+model_path aceita também os artefatos TorchScript/ONNX de ml.models.export
+(normalização embutida, int8 opcional), carregados por ExportedScorer.
+
+Este módulo importa torch; o backend só o carrega se WINGSAI_FAST_MODEL
+estiver definido.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+from ..data.dataset import preprocess_image, resize_image, targets_to_dict
+from ..models.quality_cnn import load_scorer, stack_outputs
+from ..training.metrics import METRIC_COLUMNS, FadexQualityMetrics
+from .exported_runtime import ExportedScorer, is_exported
+from .wingsai_core import ANALYZER_VERSION, DIMENSION_NAMES, WingsAIQualityAnalyzer, WingsAIScore
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('reference', 'fast')
+
+# Métricas de concordância expostas (subconjunto de FadexQualityMetrics.compute)
+AGREEMENT_KEYS = (
+    'global_mae', 'global_rmse', 'global_pearson_corr', 'global_spearman_corr',
+    'confidence_mae', 'clinical_agreement_rate', 'clinical_adequacy_accuracy',
+    'category_accuracy', 'critical_error_rate', 'estimation_bias'
+) + tuple(f'dim_{dim}_mae' for dim in DIMENSION_NAMES)
+
+
+def score_row(score: WingsAIScore) -> List[float]:
+    """Linha (8,) na ordem de METRIC_COLUMNS a partir de um WingsAIScore completo"""
+    return [score.global_score] + [score.dimension_scores[d] for d in DIMENSION_NAMES] + [score.confidence]
+
+
+def agreement_summary(metrics: Dict[str, float], samples: int) -> Dict[str, float]:
+    """Recorta as métricas de concordância de um compute()"""
+    summary = {key: metrics[key] for key in AGREEMENT_KEYS if key in metrics}
+    summary['samples'] = samples
+    return summary
+
+
+class FastQualityScorer:
+    """
+    Engine rápida: CNN destilada + regras do analyzer
+
+    Args:
+        model_path: Arquivo gravado por save_scorer, checkpoint do trainer ou
+            artefato exportado (ml.models.export)
+        device: Device do forward (padrão: cpu; artefatos exportados rodam em cpu)
+        max_batch_size: Maior batch de um forward (batches maiores são divididos)
+    """
+
+    def __init__(self, model_path: str, device: str = 'cpu', max_batch_size: int = 32):
+        self.model_path = model_path
+        self.device = torch.device(device)
+        self.max_batch_size = max_batch_size
+        self.runtime = None
+        if is_exported(model_path):
+            self.device = torch.device('cpu')
+            self.runtime = ExportedScorer(model_path)
+            self.model = None
+            info = self.runtime.info
+        else:
+            self.model, info = load_scorer(model_path, map_location=str(self.device))
+            self.model.to(self.device)
+        self.image_size = info['image_size']
+        self.metadata = info['metadata']
+        self.model_config = info['model_config']
+        # Versão do analyzer que gerou os rótulos e tipos de exame vistos no treino
+        self.teacher_version = self.metadata.get('analyzer_version')
+        self.exam_types = tuple(self.metadata.get('exam_types') or ('fundoscopy',))
+        self.rules = WingsAIQualityAnalyzer()
+
+        if self.teacher_version and self.teacher_version != ANALYZER_VERSION:
+            logger.warning(
+                f"⚠️  Modelo rápido destilado do analyzer {self.teacher_version}; "
+                f"referência atual é {ANALYZER_VERSION}"
+            )
+
+    def supports(self, exam_type: str) -> bool:
+        """Tipos de exame com rótulos no treino (adequação clínica depende do tipo)"""
+        return exam_type in self.exam_types
+
+    def predict(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Forward em batch
+
+        Args:
+            images: Imagens RGB uint8 (H, W, 3) ou (H, W)
+
+        Returns:
+            (N, 8) float64 na ordem de METRIC_COLUMNS, em 0-100
+        """
+        rows = []
+        for start in range(0, len(images), self.max_batch_size):
+            chunk = images[start:start + self.max_batch_size]
+            if self.runtime is not None:
+                # Normalização dentro do artefato: entrada uint8
+                rows.append(self.runtime.predict(np.stack([
+                    resize_image(image, self.image_size, rgb=True) for image in chunk
+                ])))
+                continue
+            batch = torch.from_numpy(np.stack([
+                preprocess_image(image, self.image_size, rgb=True) for image in chunk
+            ])).to(self.device)
+            with torch.inference_mode():
+                rows.append(stack_outputs(self.model(batch)).cpu().double().numpy())
+        if not rows:
+            return np.empty((0, len(METRIC_COLUMNS)))
+        return np.concatenate(rows)
+
+    def score_images(
+        self,
+        images: Sequence[np.ndarray],
+        exam_type: str = 'fundoscopy',
+        metadata: Optional[Sequence[Optional[Dict]]] = None
+    ) -> List[WingsAIScore]:
+        """Scores no formato do analyzer de referência (um forward por batch)"""
+        start = time.perf_counter()
+        predictions = self.predict(images)
+        per_image = (time.perf_counter() - start) / max(len(images), 1)
+        return self.scores_from_predictions(predictions, [exam_type] * len(predictions), metadata, per_image)
+
+    def scores_from_predictions(
+        self,
+        predictions: np.ndarray,
+        exam_types: Sequence[str],
+        metadata: Optional[Sequence[Optional[Dict]]] = None,
+        inference_seconds: float = 0.0
+    ) -> List[WingsAIScore]:
+        """
+        Aplica as regras do analyzer às saídas de predict()
+
+        Um tipo de exame por linha: o micro-batching do backend junta
+        requisições de tipos diferentes no mesmo forward.
+        """
+        scores = []
+        for i, row in enumerate(predictions):
+            dimension_scores = {dim: float(row[1 + j]) for j, dim in enumerate(DIMENSION_NAMES)}
+            image_metadata = dict(metadata[i] or {}) if metadata else {}
+            image_metadata.update(engine='fast', inference_seconds=inference_seconds)
+            scores.append(self.rules.score_from_dimensions(
+                dimension_scores, float(row[-1]), exam_types[i], image_metadata
+            ))
+        return scores
+
+    def score_image(
+        self, image: np.ndarray, exam_type: str = 'fundoscopy', metadata: Optional[Dict] = None
+    ) -> WingsAIScore:
+        return self.score_images([image], exam_type, [metadata])[0]
+
+    def info(self) -> Dict:
+        """Descrição da engine (modelo, treino e concordância offline)"""
+        export = self.metadata.get('export')
+        return {
+            'model_path': self.model_path,
+            'model_type': self.model_config.get('type'),
+            'runtime': self.runtime.backend if self.runtime is not None else 'eager',
+            'quantization': export['quantization'] if export else 'fp32',
+            'parameters': (
+                export['parameters'] if self.runtime is not None
+                else sum(p.numel() for p in self.model.parameters())
+            ),
+            'image_size': self.image_size,
+            'device': str(self.device),
+            'teacher_version': self.teacher_version,
+            'exam_types': list(self.exam_types),
+            'offline_agreement': self.metadata.get('agreement')
+        }
+
+
+class AgreementTracker:
+    """
+    Concordância online engine rápida x referência (thread-safe)
+
+    Usa FadexQualityMetrics em modo streaming: memória constante e
+    Spearman aproximado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = FadexQualityMetrics(streaming=True)
+
+    def update(self, fast: WingsAIScore, reference: WingsAIScore):
+        """Registra um par de scores completos da mesma imagem"""
+        predictions = torch.tensor([score_row(fast)], dtype=torch.float32)
+        targets = torch.tensor([score_row(reference)], dtype=torch.float32)
+        with self._lock:
+            self._metrics.update(targets_to_dict(predictions), targets_to_dict(targets))
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            return agreement_summary(self._metrics.compute(), self._metrics.num_samples)
+
@@ -0,0 +1,122 @@
+"""
+WingsAI - Catálogo de Recomendações
+
+O core gera apenas códigos estáveis (RecommendationCode). O texto vem de um
+catálogo localizado (locales/pt-BR.json e locales/en.json, mesmos idiomas do
+webapp), carregado uma vez no import e renderizado só na camada de resposta.
+
+Parâmetros das mensagens:
+    {exam_type}  tipo de exame analisado
+    {brand}      marca do analyzer (WingsAI, SNPQIM)
+"""
+
+import json
+from enum import IntEnum
+from pathlib import Path
+from typing import Dict, List, Optional
+
+LOCALES_DIR = Path(__file__).parent / 'locales'
+DEFAULT_LOCALE = 'pt-BR'
+SUPPORTED_LOCALES = ('pt-BR', 'en')
+
+
+class RecommendationCode(IntEnum):
+    """
+    Códigos estáveis de recomendação (cabem em uint8, ver score_batch.ScoreBatch)
+    Nunca renumere: os valores são persistidos
+    """
+    LOW_SHARPNESS = 1
+    POOR_EXPOSURE = 2
+    LOW_CONTRAST = 3
+    HIGH_NOISE = 4
+    ARTIFACTS = 5
+    CLINICAL_STANDARDS = 6
+    FUNDUS_STRUCTURES = 7
+    OCT_SHARPNESS = 8
+    MEETS_STANDARDS = 9
+    UNUSABLE_FRAME = 10
+
+    @property
+    def key(self) -> str:
+        """Chave do código no catálogo e na API (ex: 'low_sharpness')"""
+        return self.name.lower()
+
+
+def _load_catalogs() -> Dict[str, Dict[RecommendationCode, str]]:
+    """Lê os catálogos de todos os idiomas suportados"""
+    catalogs = {}
+    for locale in SUPPORTED_LOCALES:
+        with open(LOCALES_DIR / f'{locale}.json', encoding='utf-8') as f:
+            messages = json.load(f)['recommendations']
+        missing = [code.key for code in RecommendationCode if code.key not in messages]
+        if missing:
+            raise ValueError(f"Catálogo {locale} sem mensagens para: {', '.join(missing)}")
+        catalogs[locale] = {code: messages[code.key] for code in RecommendationCode}
+    return catalogs
+
+
+CATALOGS = _load_catalogs()
+
+# Mensagens sem parâmetros já renderizadas: (idioma, código) -> texto
+_STATIC_MESSAGES = {
+    (locale, code): message
+    for locale, messages in CATALOGS.items()
+    for code, message in messages.items()
+    if '{' not in message
+}
+
+
+def resolve_locale(locale: Optional[str]) -> str:
+    """
+    Normaliza o idioma pedido ('en-US' -> 'en', None -> padrão)
+
+    Raises:
+        ValueError se o idioma não for suportado
+    """
+    if not locale:
+        return DEFAULT_LOCALE
+    for supported in SUPPORTED_LOCALES:
+        if locale.lower() == supported.lower():
+            return supported
+    language = locale.split('-', 1)[0].lower()
+    for supported in SUPPORTED_LOCALES:
+        if supported.split('-', 1)[0].lower() == language:
+            return supported
+    raise ValueError(f"Idioma não suportado: {locale}. Use: {', '.join(SUPPORTED_LOCALES)}")
+
+
+def render_recommendations(
+    codes: List[RecommendationCode],
+    exam_type: Optional[str] = None,
+    brand: str = "WingsAI",
+    locale: str = DEFAULT_LOCALE
+) -> List[str]:
+    """Converte códigos de recomendação nas mensagens do idioma pedido"""
+    messages = []
+    for code in codes:
+        message = _STATIC_MESSAGES.get((locale, code))
+        if message is None:
+            message = CATALOGS[locale][code].format(exam_type=exam_type, brand=brand)
+        messages.append(message)
+    return messages
+
+
+# Trecho fixo de cada mensagem (antes do primeiro parâmetro), para o caminho inverso
+_MESSAGE_PREFIXES = tuple(
+    (message.split('{', 1)[0], code)
+    for messages in CATALOGS.values()
+    for code, message in messages.items()
+)
+
+
+def recommendation_code_from_message(message: str) -> RecommendationCode:
+    """
+    Código de uma mensagem já renderizada (ex: JSONs antigos de resultados)
+
+    Raises:
+        ValueError se a mensagem não corresponder a nenhum código
+    """
+    for prefix, code in _MESSAGE_PREFIXES:
+        if message.startswith(prefix):
+            return code
+    raise ValueError(f"Recomendação desconhecida: {message}")
@@ -0,0 +1,376 @@
+"""
+WingsAI - Histórico de Scores em Formato Colunar
+Grava WingsAIScore em arquivos Arrow IPC particionados por data e permite
+consultas via memory-map para as visões de analytics
+
+Layout:
+    <root>/date=2025-10-08/batch-<timestamp>-<pid>-<seq>.arrow
+    <root>/date=2025-10-08/compacted-<timestamp>-<pid>.arrow
+
+Cada linha segue o schema de ml.scoring.bulk (dimensões como colunas dim_*)
+mais `timestamp` e `source` (api, cli, bulk). A escrita é assíncrona: quem
+chama só enfileira o registro; uma thread grava lotes e compacta
+periodicamente os arquivos pequenos de cada partição.
+
+Consultas listam e abrem os arquivos da partição sob flock compartilhado
+(.read.lock); a compactação publica o arquivo compactado e remove os lotes
+sob flock exclusivo, então uma consulta nunca vê os dois nem um lote que
+sumiu no meio da leitura.
+"""
+
+import fcntl
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .bulk import conform_table, result_schema, score_to_record
+from .wingsai_core import WingsAIScore
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'date='
+BATCH_PREFIX = 'batch-'
+COMPACTED_PREFIX = 'compacted-'
+FILE_SUFFIX = '.arrow'
+READ_LOCK_NAME = '.read.lock'
+
+
+def store_schema():
+    """Schema do histórico: schema de resultado + timestamp e origem"""
+    import pyarrow as pa
+
+    return result_schema().append(
+        pa.field('timestamp', pa.timestamp('ms', tz='UTC'))
+    ).append(
+        pa.field('source', pa.string())
+    )
+
+
+def _write_ipc_file(table, path: Path):
+    """Escreve Arrow IPC (sem compressão, para permitir memory-map)"""
+    import pyarrow as pa
+
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _write_ipc(table, path: Path):
+    """Escreve Arrow IPC com rename atômico"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    _write_ipc_file(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _partition_lock(partition_dir: Path, operation: int):
+    """flock da partição: LOCK_SH nas consultas, LOCK_EX ao trocar os arquivos na compactação"""
+    with open(partition_dir / READ_LOCK_NAME, 'a') as lock:
+        fcntl.flock(lock, operation)
+        yield
+
+
+class ResultStore:
+    """
+    Sink assíncrono de scores em Arrow IPC particionado por data
+
+    Args:
+        root: Diretório raiz do histórico
+        flush_rows: Registros por arquivo de lote
+        flush_interval: Segundos máximos entre gravações de lote
+        compact_interval: Segundos entre compactações (0 desativa)
+        compact_min_files: Arquivos mínimos na partição para compactar
+        max_queue: Registros pendentes antes de descartar (não bloqueia quem chama)
+    """
+
+    def __init__(
+        self,
+        root: str,
+        flush_rows: int = 256,
+        flush_interval: float = 5.0,
+        compact_interval: float = 300.0,
+        compact_min_files: int = 16,
+        max_queue: int = 100_000
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.compact_min_files = compact_min_files
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._sequence = 0
+        self._closed = False
+        self.stats = {'appended': 0, 'written': 0, 'dropped': 0, 'files': 0, 'compactions': 0}
+
+        self._thread = threading.Thread(target=self._run, name='wingsai-result-store', daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # API de escrita (não bloqueante)
+    # ------------------------------------------------------------------
+
+    def append(
+        self,
+        score: WingsAIScore,
+        path: Optional[str] = None,
+        exam_type: Optional[str] = None,
+        source: str = 'api',
+        shape: Optional[Tuple[int, ...]] = None,
+        seconds: Optional[float] = None
+    ):
+        """Enfileira um score para gravação assíncrona"""
+        metadata = score.metadata or {}
+        record = score_to_record(
+            path or metadata.get('filename'),
+            exam_type or metadata.get('exam_type'),
+            score, shape, seconds
+        )
+        self.append_record(record, source)
+
+    def append_record(self, record: Dict, source: str = 'api'):
+        """Enfileira um registro já achatado (schema de ml.scoring.bulk)"""
+        record = dict(record)
+        record.setdefault('timestamp', datetime.now(timezone.utc))
+        record['source'] = source
+        try:
+            self._queue.put_nowait(record)
+            self.stats['appended'] += 1
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+    def flush(self, timeout: Optional[float] = None):
+        """Bloqueia até todos os registros enfileirados serem gravados"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        """Grava o que estiver pendente e encerra a thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    # ------------------------------------------------------------------
+    # Thread de gravação
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        buffer: List[Dict] = []
+        last_flush = time.monotonic()
+        last_compaction = time.monotonic()
+
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+
+            if isinstance(item, dict):
+                buffer.append(item)
+                if len(buffer) < self.flush_rows:
+                    continue
+
+            # Lote cheio, intervalo expirado, flush() ou close()
+            if buffer:
+                try:
+                    self._write_batch(buffer)
+                except Exception:
+                    logger.exception("❌ Falha ao gravar lote do histórico de scores")
+                buffer = []
+            last_flush = time.monotonic()
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
+            if self.compact_interval and time.monotonic() - last_compaction >= self.compact_interval:
+                try:
+                    self.compact()
+                except Exception:
+                    logger.exception("❌ Falha na compactação do histórico de scores")
+                last_compaction = time.monotonic()
+
+    def _write_batch(self, records: List[Dict]):
+        """Grava os registros em um arquivo de lote por partição de data"""
+        import pyarrow as pa
+
+        by_date: Dict[date, List[Dict]] = {}
+        for record in records:
+            by_date.setdefault(record['timestamp'].date(), []).append(record)
+
+        schema = store_schema()
+        for day, day_records in by_date.items():
+            partition = self.root / f'{PARTITION_PREFIX}{day.isoformat()}'
+            partition.mkdir(exist_ok=True)
+
+            self._sequence += 1
+            name = f'{BATCH_PREFIX}{int(time.time() * 1000)}-{os.getpid()}-{self._sequence}{FILE_SUFFIX}'
+            _write_ipc(pa.Table.from_pylist(day_records, schema=schema), partition / name)
+
+            self.stats['written'] += len(day_records)
+            self.stats['files'] += 1
+
+    # ------------------------------------------------------------------
+    # Compactação
+    # ------------------------------------------------------------------
+
+    def compact(self, partition: Optional[str] = None) -> int:
+        """
+        Junta os arquivos de lote de cada partição em um único arquivo
+
+        Usa flock por partição: outro processo compactando a mesma partição
+        faz esta chamada pular (workers do servidor pre-fork compartilham o root).
+
+        Args:
+            partition: Data 'YYYY-MM-DD' (None = todas as partições)
+
+        Returns:
+            Número de partições compactadas
+        """
+        import pyarrow as pa
+
+        if partition is not None:
+            partitions = [self.root / f'{PARTITION_PREFIX}{partition}']
+        else:
+            partitions = sorted(self.root.glob(f'{PARTITION_PREFIX}*'))
+
+        compacted = 0
+        for partition_dir in partitions:
+            files = sorted(partition_dir.glob(f'*{FILE_SUFFIX}'))
+            if len(files) < max(2, self.compact_min_files if partition is None else 2):
+                continue
+
+            with open(partition_dir / '.compact.lock', 'w') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+
+                # Relista sob o lock: outro processo pode ter acabado de compactar
+                files = sorted(partition_dir.glob(f'*{FILE_SUFFIX}'))
+                if len(files) < 2:
+                    continue
+
+                table = pa.concat_tables(_read_ipc(f) for f in files)
+                name = f'{COMPACTED_PREFIX}{int(time.time() * 1000)}-{os.getpid()}{FILE_SUFFIX}'
+                tmp_path = partition_dir / f'{name}.tmp'
+                _write_ipc_file(table, tmp_path)
+
+                # Publica o compactado e remove os lotes de uma vez para as consultas
+                with _partition_lock(partition_dir, fcntl.LOCK_EX):
+                    os.replace(tmp_path, partition_dir / name)
+                    for f in files:
+                        f.unlink()
+
+            compacted += 1
+            self.stats['compactions'] += 1
+
+        return compacted
+
+
+# ----------------------------------------------------------------------
+# Consultas (memory-map)
+# ----------------------------------------------------------------------
+
+def _read_ipc(path: Path, columns: Optional[List[str]] = None):
+    """Lê um arquivo Arrow IPC via memory-map (sem copiar os buffers)"""
+    import pyarrow as pa
+
+    with pa.memory_map(str(path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    # Arquivos antigos (ex: recomendações em texto) seguem o schema atual
+    table = conform_table(table, store_schema())
+    return table.select(columns) if columns else table
+
+
+def load_scores(
+    root: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    columns: Optional[List[str]] = None
+):
+    """
+    Carrega o histórico de scores entre duas datas (inclusive)
+
+    Args:
+        root: Diretório raiz do histórico
+        start: Data inicial (None = sem limite)
+        end: Data final (None = sem limite)
+        columns: Colunas a carregar (None = todas)
+
+    Returns:
+        pyarrow.Table com os registros (buffers mapeados em memória)
+    """
+    import pyarrow as pa
+
+    tables = []
+    for partition_dir in sorted(Path(root).glob(f'{PARTITION_PREFIX}*')):
+        day = date.fromisoformat(partition_dir.name[len(PARTITION_PREFIX):])
+        if (start and day < start) or (end and day > end):
+            continue
+        # Lock compartilhado: a compactação não troca os arquivos no meio da leitura
+        with _partition_lock(partition_dir, fcntl.LOCK_SH):
+            for f in sorted(partition_dir.glob(f'*{FILE_SUFFIX}')):
+                tables.append(_read_ipc(f, columns))
+
+    if not tables:
+        schema = store_schema()
+        if columns:
+            schema = pa.schema([schema.field(c) for c in columns])
+        return schema.empty_table()
+    return pa.concat_tables(tables)
+
+
+def daily_summary(
+    root: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> List[Dict]:
+    """
+    Visão de analytics: agregados por dia e tipo de exame
+
+    Returns:
+        Lista de dicts com date, exam_type, count, errors, mean/min/max do
+        score global e média de cada dimensão
+    """
+    import pyarrow.compute as pc
+
+    dim_columns = [f.name for f in result_schema() if f.name.startswith('dim_')]
+    table = load_scores(root, start, end, ['timestamp', 'exam_type', 'status', 'global_score'] + dim_columns)
+    if table.num_rows == 0:
+        return []
+
+    table = table.append_column('date', pc.strftime(table.column('timestamp'), format='%Y-%m-%d'))
+    table = table.append_column('is_error', pc.equal(table.column('status'), 'error'))
+
+    aggregations = [
+        ('global_score', 'count'), ('is_error', 'sum'),
+        ('global_score', 'mean'), ('global_score', 'min'), ('global_score', 'max')
+    ] + [(c, 'mean') for c in dim_columns]
+    grouped = table.group_by(['date', 'exam_type']).aggregate(aggregations)
+
+    rows = []
+    for row in grouped.to_pylist():
+        rows.append({
+            'date': row['date'],
+            'exam_type': row['exam_type'],
+            'count': row['global_score_count'],
+            'errors': row['is_error_sum'],
+            'mean_score': row['global_score_mean'],
+            'min_score': row['global_score_min'],
+            'max_score': row['global_score_max'],
+            'dimension_means': {c[len('dim_'):]: row[f'{c}_mean'] for c in dim_columns}
+        })
+    return sorted(rows, key=lambda r: (r['date'], r['exam_type'] or ''))
@@ -0,0 +1,317 @@
+"""
+WingsAI - Lote Compacto de Scores (struct-of-arrays)
+
+Jobs de lote que mantêm milhões de WingsAIScore em memória pagam, por imagem,
+um objeto dataclass, um dict com seis floats, uma lista de strings de
+recomendação e um dict de metadata (~2 KB). ScoreBatch guarda os mesmos
+resultados em colunas NumPy (~50 bytes por imagem):
+
+    global_score, confidence   float32 (N,)        NaN = não calculado
+    dimensions                 float32 (N, 6)      ordem de DIMENSION_NAMES
+    ml_readiness               uint8   (N,)        índice em ML_READINESS_LEVELS
+    clinical_adequacy          uint8   (N,)        índice em CLINICAL_ADEQUACY_LEVELS
+    exam_type                  uint8   (N,)        índice em batch.exam_types
+    brand                      uint8   (N,)        índice em batch.brands
+    skipped                    uint8   (N,)        bitmask sobre DIMENSION_NAMES
+    recommendation codes       uint8 + offsets int64 (CSR)
+
+Metadata não é armazenada. Conversões: from_scores / to_scores e
+from_dicts / to_dicts (formato de WingsAIScore e das respostas da API).
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .recommendation_catalog import RecommendationCode, recommendation_code_from_message
+from .wingsai_core import DIMENSION_NAMES, WingsAIScore
+
+ML_READINESS_LEVELS = ('excellent', 'good', 'fair', 'poor')
+CLINICAL_ADEQUACY_LEVELS = ('diagnostic', 'screening', 'inadequate')
+
+# Código uint8 para campo ausente (None)
+MISSING = 255
+
+_DIMENSION_INDEX = {name: i for i, name in enumerate(DIMENSION_NAMES)}
+
+
+def _encode_level(value: Optional[str], levels: tuple) -> int:
+    return MISSING if value is None else levels.index(value)
+
+
+def _decode_level(code: int, levels: tuple) -> Optional[str]:
+    return None if code == MISSING else levels[code]
+
+
+def _optional_float(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+class ScoreBatch:
+    """
+    Container colunar de scores com append amortizado
+
+    Args:
+        capacity: Capacidade inicial (cresce dobrando)
+    """
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(1, capacity)
+        self._size = 0
+        self._global_score = np.empty(capacity, dtype=np.float32)
+        self._confidence = np.empty(capacity, dtype=np.float32)
+        self._dimensions = np.empty((capacity, len(DIMENSION_NAMES)), dtype=np.float32)
+        self._ml_readiness = np.empty(capacity, dtype=np.uint8)
+        self._clinical_adequacy = np.empty(capacity, dtype=np.uint8)
+        self._exam_type = np.empty(capacity, dtype=np.uint8)
+        self._brand = np.empty(capacity, dtype=np.uint8)
+        self._skipped = np.empty(capacity, dtype=np.uint8)
+
+        # Recomendações em CSR: códigos da linha i em codes[offsets[i]:offsets[i + 1]]
+        self._rec_codes = np.empty(capacity * 2, dtype=np.uint8)
+        self._rec_offsets = np.zeros(capacity + 1, dtype=np.int64)
+        # Linhas cujas recomendações não foram calculadas (fields)
+        self._has_recommendations = np.empty(capacity, dtype=bool)
+
+        # Tipos de exame e marcas internados (poucos valores distintos)
+        self.exam_types: List[Optional[str]] = []
+        self._exam_type_index: Dict[Optional[str], int] = {}
+        self.brands: List[str] = []
+        self._brand_index: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Construção
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_scores(cls, scores: Iterable[WingsAIScore]) -> 'ScoreBatch':
+        """Cria o lote a partir de WingsAIScore"""
+        scores = list(scores)
+        batch = cls(len(scores))
+        batch.extend(scores)
+        return batch
+
+    @classmethod
+    def from_dicts(cls, records: Iterable[Dict]) -> 'ScoreBatch':
+        """
+        Cria o lote a partir de dicts no formato de WingsAIScore
+        (ex: JSONs salvos em results/ ou respostas da API)
+
+        Recomendações são lidas de `recommendation_codes` (int ou nome) ou,
+        na falta deles, convertidas a partir das mensagens em `recommendations`.
+        """
+        records = list(records)
+        batch = cls(len(records))
+        for record in records:
+            codes = record.get('recommendation_codes')
+            if codes is not None:
+                codes = [
+                    RecommendationCode[c.upper()] if isinstance(c, str) else RecommendationCode(c)
+                    for c in codes
+                ]
+            elif record.get('recommendations') is not None:
+                codes = [recommendation_code_from_message(m) for m in record['recommendations']]
+
+            batch.append(WingsAIScore(
+                global_score=record.get('global_score'),
+                dimension_scores=record.get('dimension_scores') or {},
+                confidence=record.get('confidence'),
+                ml_readiness=record.get('ml_readiness'),
+                clinical_adequacy=record.get('clinical_adequacy'),
+                recommendations=None,
+                metadata={},
+                skipped_dimensions=record.get('skipped_dimensions') or [],
+                exam_type=record.get('exam_type'),
+                recommendation_codes=codes,
+                brand=record.get('brand', WingsAIScore.brand)
+            ))
+        return batch
+
+    def _grow(self, rows: int, codes: int):
+        """Dobra as colunas quando faltam linhas ou espaço de códigos"""
+        capacity = len(self._global_score)
+        if rows > capacity:
+            new_capacity = max(rows, capacity * 2)
+            for name in ('_global_score', '_confidence', '_dimensions', '_ml_readiness',
+                         '_clinical_adequacy', '_exam_type', '_brand', '_skipped',
+                         '_has_recommendations'):
+                old = getattr(self, name)
+                new = np.empty((new_capacity,) + old.shape[1:], dtype=old.dtype)
+                new[:self._size] = old[:self._size]
+                setattr(self, name, new)
+            offsets = np.zeros(new_capacity + 1, dtype=np.int64)
+            offsets[:self._size + 1] = self._rec_offsets[:self._size + 1]
+            self._rec_offsets = offsets
+
+        if codes > len(self._rec_codes):
+            new_codes = np.empty(max(codes, len(self._rec_codes) * 2), dtype=np.uint8)
+            used = self._rec_offsets[self._size]
+            new_codes[:used] = self._rec_codes[:used]
+            self._rec_codes = new_codes
+
+    @staticmethod
+    def _intern(value: Optional[str], values: List, index: Dict, what: str) -> int:
+        code = index.get(value)
+        if code is None:
+            if len(values) >= MISSING:
+                raise ValueError(f"ScoreBatch suporta até 255 {what} distintos")
+            code = len(values)
+            values.append(value)
+            index[value] = code
+        return code
+
+    def append(self, score: WingsAIScore):
+        """Adiciona um score (metadata é descartada)"""
+        i = self._size
+        codes = score.recommendation_codes
+        if codes is None and score.recommendations is not None:
+            codes = [recommendation_code_from_message(m) for m in score.recommendations]
+        n_codes = len(codes) if codes is not None else 0
+        start = self._rec_offsets[i]
+        self._grow(i + 1, start + n_codes)
+
+        self._global_score[i] = np.nan if score.global_score is None else score.global_score
+        self._confidence[i] = np.nan if score.confidence is None else score.confidence
+        row = self._dimensions[i]
+        row[:] = np.nan
+        for name, value in score.dimension_scores.items():
+            row[_DIMENSION_INDEX[name]] = value
+        self._ml_readiness[i] = _encode_level(score.ml_readiness, ML_READINESS_LEVELS)
+        self._clinical_adequacy[i] = _encode_level(score.clinical_adequacy, CLINICAL_ADEQUACY_LEVELS)
+        self._exam_type[i] = self._intern(
+            score.exam_type, self.exam_types, self._exam_type_index, 'tipos de exame'
+        )
+        self._brand[i] = self._intern(score.brand, self.brands, self._brand_index, 'marcas')
+
+        mask = 0
+        for name in score.skipped_dimensions:
+            mask |= 1 << _DIMENSION_INDEX[name]
+        self._skipped[i] = mask
+
+        self._has_recommendations[i] = codes is not None
+        if n_codes:
+            self._rec_codes[start:start + n_codes] = codes
+        self._rec_offsets[i + 1] = start + n_codes
+        self._size += 1
+
+    def extend(self, scores: Iterable[WingsAIScore]):
+        """Adiciona vários scores"""
+        for score in scores:
+            self.append(score)
+
+    # ------------------------------------------------------------------
+    # Colunas (views sem cópia)
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def global_score(self) -> np.ndarray:
+        return self._global_score[:self._size]
+
+    @property
+    def confidence(self) -> np.ndarray:
+        return self._confidence[:self._size]
+
+    @property
+    def dimensions(self) -> np.ndarray:
+        """Matriz (N, 6) na ordem de DIMENSION_NAMES"""
+        return self._dimensions[:self._size]
+
+    def dimension(self, name: str) -> np.ndarray:
+        """Coluna de uma dimensão"""
+        return self._dimensions[:self._size, _DIMENSION_INDEX[name]]
+
+    @property
+    def ml_readiness_codes(self) -> np.ndarray:
+        return self._ml_readiness[:self._size]
+
+    @property
+    def clinical_adequacy_codes(self) -> np.ndarray:
+        return self._clinical_adequacy[:self._size]
+
+    @property
+    def exam_type_codes(self) -> np.ndarray:
+        return self._exam_type[:self._size]
+
+    @property
+    def brand_codes(self) -> np.ndarray:
+        return self._brand[:self._size]
+
+    def recommendation_codes(self, index: int) -> Optional[List[RecommendationCode]]:
+        """Códigos de recomendação da linha (None se não calculados)"""
+        if not self._has_recommendations[index]:
+            return None
+        start, end = self._rec_offsets[index], self._rec_offsets[index + 1]
+        return [RecommendationCode(c) for c in self._rec_codes[start:end]]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes usados pelas colunas (capacidade alocada)"""
+        arrays = (self._global_score, self._confidence, self._dimensions, self._ml_readiness,
+                  self._clinical_adequacy, self._exam_type, self._brand, self._skipped,
+                  self._has_recommendations, self._rec_codes, self._rec_offsets)
+        return sum(a.nbytes for a in arrays)
+
+    # ------------------------------------------------------------------
+    # Conversões
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, index: int) -> WingsAIScore:
+        """Reconstrói o WingsAIScore da linha (metadata vazia)"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+
+        row = self._dimensions[index]
+        skipped = int(self._skipped[index])
+        exam_type = self.exam_types[self._exam_type[index]]
+        codes = self.recommendation_codes(index)
+
+        return WingsAIScore(
+            global_score=_optional_float(self._global_score[index]),
+            dimension_scores={
+                name: float(row[i]) for i, name in enumerate(DIMENSION_NAMES)
+                if not np.isnan(row[i])
+            },
+            confidence=_optional_float(self._confidence[index]),
+            ml_readiness=_decode_level(self._ml_readiness[index], ML_READINESS_LEVELS),
+            clinical_adequacy=_decode_level(self._clinical_adequacy[index], CLINICAL_ADEQUACY_LEVELS),
+            recommendations=None,  # texto via render_recommendations() a partir dos códigos
+            metadata={},
+            skipped_dimensions=[
+                name for i, name in enumerate(DIMENSION_NAMES) if skipped & (1 << i)
+            ],
+            exam_type=exam_type,
+            recommendation_codes=codes,
+            brand=self.brands[self._brand[index]]
+        )
+
+    def __iter__(self) -> Iterator[WingsAIScore]:
+        for i in range(self._size):
+            yield self[i]
+
+    def to_scores(self) -> List[WingsAIScore]:
+        """Lista de WingsAIScore (uma por linha)"""
+        return list(self)
+
+    def to_dicts(self) -> List[Dict]:
+        """Dicts no formato de WingsAIScore, com as mensagens em pt-BR e os códigos por nome"""
+        records = []
+        for score in self:
+            codes = score.recommendation_codes
+            records.append({
+                'global_score': score.global_score,
+                'dimension_scores': score.dimension_scores,
+                'confidence': score.confidence,
+                'ml_readiness': score.ml_readiness,
+                'clinical_adequacy': score.clinical_adequacy,
+                'recommendations': score.render_recommendations(),
+                'recommendation_codes': [c.key for c in codes] if codes is not None else None,
+                'skipped_dimensions': score.skipped_dimensions,
+                'exam_type': score.exam_type,
+                'brand': score.brand
+            })
+        return records
@@ -0,0 +1,152 @@
+"""
+WingsAI - Orçamento de Threads
+Configuração central das threads do OpenCV, do BLAS (NumPy/SciPy) e do torch
+
+Por padrão cada biblioteca usa todos os cores. Com vários workers (uvicorn
+pre-fork ou process pool) isso gera workers x cores threads disputando a CPU.
+O orçamento define quantas threads cada worker pode usar.
+
+Uso:
+    from ml.scoring.thread_budget import apply_thread_budget, threads_per_worker
+    apply_thread_budget(threads_per_worker(workers=4))
+
+Variáveis de ambiente:
+    WINGSAI_THREADS: threads por processo (aplicado pelo analyzer na criação)
+"""
+
+import logging
+import os
+import sys
+import threading
+from typing import Dict, Optional
+
+import cv2
+
+# threadpoolctl é opcional: sem ele, o BLAS só é limitado via variáveis de ambiente
+try:
+    from threadpoolctl import threadpool_limits, threadpool_info
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    THREADPOOLCTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+THREADS_ENV_VAR = 'WINGSAI_THREADS'
+
+# Lidas pelas bibliotecas nativas ao criar seus pools (valem para subprocessos)
+NATIVE_THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS'
+)
+
+_lock = threading.Lock()
+_applied: Dict[int, int] = {}  # pid -> threads aplicadas (fork reaplica no filho)
+_warned_blas = False
+
+
+def available_cpus() -> int:
+    """CPUs em que o processo pode rodar (afinidade), ou os.cpu_count()"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def threads_per_worker(workers: int, cpus: Optional[int] = None) -> int:
+    """Divide as CPUs igualmente entre os workers (mínimo 1 thread)"""
+    cpus = cpus or available_cpus()
+    return max(1, cpus // max(1, workers))
+
+
+def apply_thread_budget(threads: int) -> Dict[str, Optional[int]]:
+    """
+    Limita as threads de OpenCV, BLAS e torch neste processo
+
+    torch só é configurado se já estiver importado (não força o import).
+
+    Args:
+        threads: Threads permitidas por biblioteca neste processo
+
+    Returns:
+        Dict com o limite aplicado em cada biblioteca (None = não aplicado)
+    """
+    threads = max(1, int(threads))
+    applied = {'opencv': None, 'blas': None, 'torch': None}
+
+    with _lock:
+        for var in NATIVE_THREAD_ENV_VARS:
+            os.environ[var] = str(threads)
+        os.environ[THREADS_ENV_VAR] = str(threads)
+
+        cv2.setNumThreads(threads)
+        applied['opencv'] = threads
+
+        if THREADPOOLCTL_AVAILABLE:
+            threadpool_limits(limits=threads)
+            applied['blas'] = threads
+        else:
+            _warn_blas_fallback()
+
+        torch = sys.modules.get('torch')
+        if torch is not None:
+            torch.set_num_threads(threads)
+            applied['torch'] = threads
+
+        _applied[os.getpid()] = threads
+
+    return applied
+
+
+def _warn_blas_fallback():
+    """Avisa (uma vez) que o BLAS já carregado não será limitado sem threadpoolctl"""
+    global _warned_blas
+    if _warned_blas or 'numpy' not in sys.modules:
+        return
+    _warned_blas = True
+    logger.warning(
+        "⚠️  threadpoolctl não instalado: o BLAS do NumPy já carregado ignora "
+        "OMP_NUM_THREADS/OPENBLAS_NUM_THREADS e continua usando todos os cores "
+        "neste processo (pip install threadpoolctl)"
+    )
+
+
+def configure_from_env() -> Optional[int]:
+    """
+    Aplica WINGSAI_THREADS uma vez por processo (chamado pelo analyzer)
+
+    Returns:
+        Threads aplicadas, ou None se a variável não estiver definida
+    """
+    value = os.environ.get(THREADS_ENV_VAR)
+    if not value:
+        return None
+
+    threads = int(value)
+    if _applied.get(os.getpid()) != threads:
+        apply_thread_budget(threads)
+    return threads
+
+
+def current_thread_settings() -> Dict:
+    """Threads efetivas de cada biblioteca neste processo (para métricas)"""
+    settings = {
+        'budget': _applied.get(os.getpid()),
+        'cpus': available_cpus(),
+        'opencv': cv2.getNumThreads(),
+        'blas': None,
+        'torch': None
+    }
+
+    if THREADPOOLCTL_AVAILABLE:
+        settings['blas'] = {
+            info['internal_api']: info['num_threads'] for info in threadpool_info()
+        }
+
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        settings['torch'] = torch.get_num_threads()
+
+    return settings
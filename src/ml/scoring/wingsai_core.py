@@ -8,20 +8,33 @@ Este módulo implementa o algoritmo core proprietário da WingsAI para:
 2. Clinical Adequacy Scoring
 3. ML Readiness Assessment
 4. Confidence Quantification
+
+torch, scikit-image e scipy são importados sob demanda (no primeiro uso),
+para que workers e CLIs não paguem esse custo no import. Orçamento de
+`python -X importtime` documentado em docs/PERFORMANCE.md e verificado em
+tests/test_import_time.py.
 """
 
 import numpy as np
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
-from typing import Dict, List, Tuple, Optional, Union
-from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional, Union
+from dataclasses import dataclass, field
 from enum import Enum
+import sys
+import threading
+import time
 import cv2
-from scipy import ndimage
-from skimage import filters, measure, feature
 import math
 
+from .recommendation_catalog import (
+    DEFAULT_LOCALE,
+    RecommendationCode,
+    render_recommendations
+)
+from .thread_budget import configure_from_env
+
+if TYPE_CHECKING:
+    import torch
+
 
 class QualityDimension(Enum):
     """Dimensões de qualidade específicas para oftalmologia"""
@@ -33,16 +46,105 @@ class QualityDimension(Enum):
     CLINICAL_ADEQUACY = "clinical_adequacy"
 
 
+# Ordem fixa das dimensões (mesma ordem de QualityDimension)
+DIMENSION_NAMES = tuple(dim.value for dim in QualityDimension)
+
+# Versão do algoritmo de scoring: incrementar sempre que os scores mudarem
+# (rótulos gerados por ml.data.labeling com outra versão são refeitos)
+ANALYZER_VERSION = "1.0.0"
+
+# Saídas agregadas que podem ser pedidas em `fields`
+OUTPUT_FIELDS = (
+    'global_score', 'confidence', 'ml_readiness', 'clinical_adequacy', 'recommendations'
+)
+
+# Dependências entre análises: quais dimensões cada item precisa
+DIMENSION_DEPENDENCIES = {
+    # Adequação clínica usa a soma ponderada das outras cinco dimensões
+    'clinical_adequacy': tuple(d for d in DIMENSION_NAMES if d != 'clinical_adequacy')
+}
+OUTPUT_DEPENDENCIES = {
+    # Score global e confidence usam os pesos/valores de todas as dimensões
+    'global_score': DIMENSION_NAMES,
+    'confidence': DIMENSION_NAMES,
+    'ml_readiness': DIMENSION_NAMES,
+    'clinical_adequacy': DIMENSION_NAMES,
+    'recommendations': DIMENSION_NAMES,
+}
+OUTPUT_OUTPUT_DEPENDENCIES = {
+    'ml_readiness': ('global_score',),
+    'clinical_adequacy': ('global_score',),
+}
+
+
+def resolve_fields(fields: Optional[List[str]]) -> Tuple[set, set]:
+    """
+    Resolve os campos pedidos para o conjunto mínimo de análises
+
+    Campos aceitos: saídas de OUTPUT_FIELDS, 'dimension_scores' (todas as
+    dimensões) ou 'dimension_scores.<dimensão>' (uma dimensão específica).
+
+    Args:
+        fields: Lista de campos pedidos (None = análise completa)
+
+    Returns:
+        (dimensões a calcular, saídas a calcular), já com dependências
+    """
+    if fields is None:
+        return set(DIMENSION_NAMES), set(OUTPUT_FIELDS)
+
+    dimensions, outputs = set(), set()
+    for field_name in fields:
+        field_name = field_name.strip()
+        if field_name == 'dimension_scores':
+            dimensions.update(DIMENSION_NAMES)
+        elif field_name.startswith('dimension_scores.'):
+            dim = field_name.split('.', 1)[1]
+            if dim not in DIMENSION_NAMES:
+                raise ValueError(f"Dimensão desconhecida em fields: {dim}")
+            dimensions.add(dim)
+        elif field_name in OUTPUT_FIELDS:
+            outputs.add(field_name)
+        else:
+            raise ValueError(f"Campo desconhecido em fields: {field_name}")
+
+    for output in list(outputs):
+        outputs.update(OUTPUT_OUTPUT_DEPENDENCIES.get(output, ()))
+    for output in outputs:
+        dimensions.update(OUTPUT_DEPENDENCIES[output])
+    for dim in list(dimensions):
+        dimensions.update(DIMENSION_DEPENDENCIES.get(dim, ()))
+
+    return dimensions, outputs
+
+
 @dataclass
 class WingsAIScore:
-    """Estrutura do score WingsAI proprietário"""
-    global_score: float  # Score global 0-100
+    """
+    Estrutura do score WingsAI proprietário
+    Campos não pedidos em `fields` ficam como None
+
+    O analyzer só preenche `recommendation_codes`; o texto é montado por
+    render_recommendations(locale) onde for exibido (camada de resposta).
+    `recommendations` guarda mensagens já prontas (ex: resultados antigos).
+    """
+    global_score: Optional[float]  # Score global 0-100
     dimension_scores: Dict[str, float]  # Scores por dimensão
-    confidence: float  # Confidence do score
-    ml_readiness: str  # Adequação para ML (excellent, good, fair, poor)
-    clinical_adequacy: str  # Adequação clínica (diagnostic, screening, inadequate)
-    recommendations: List[str]  # Recomendações específicas
-    metadata: Dict[str, any]  # Metadata adicional
+    confidence: Optional[float]  # Confidence do score
+    ml_readiness: Optional[str]  # Adequação para ML (excellent, good, fair, poor)
+    clinical_adequacy: Optional[str]  # Adequação clínica (diagnostic, screening, inadequate)
+    recommendations: Optional[List[str]] = None  # Mensagens já renderizadas (opcional)
+    metadata: Dict[str, any] = field(default_factory=dict)  # Metadata adicional
+    skipped_dimensions: List[str] = field(default_factory=list)  # Dimensões não calculadas (cascade)
+    exam_type: Optional[str] = None  # Tipo de exame analisado
+    recommendation_codes: Optional[List[RecommendationCode]] = None  # Códigos das recomendações
+    brand: str = "WingsAI"  # Marca usada nas mensagens ({brand})
+
+    def render_recommendations(self, locale: str = DEFAULT_LOCALE) -> Optional[List[str]]:
+        """Mensagens das recomendações no idioma pedido (None se não calculadas)"""
+        if self.recommendation_codes is None:
+            return self.recommendations
+        return render_recommendations(self.recommendation_codes, self.exam_type, self.brand, locale)
 
 
 class WingsAIQualityAnalyzer:
@@ -51,12 +153,55 @@ class WingsAIQualityAnalyzer:
     ALGORITMO PROPRIETÁRIO para avaliação multi-dimensional
     """
     
+    # Thresholds padrão do cascade de saída antecipada
+    # Imagens fora destes limites são inutilizáveis (quadro em branco,
+    # tampa da lente, captura saturada) e não passam pelas análises caras
+    DEFAULT_CASCADE_CONFIG = {
+        'enabled': True,
+        'min_mean_intensity': 0.03,  # Abaixo disso: quadro escuro / tampa da lente
+        'max_mean_intensity': 0.97,  # Acima disso: captura saturada
+        'min_std_intensity': 0.005,  # Abaixo disso: quadro uniforme (em branco)
+        'max_clipped_ratio': 0.95,  # Fração máxima de pixels clipados (<0.02 ou >0.98)
+    }
+
+    # Dimensões caras que o cascade pula (exposição é sempre calculada)
+    CASCADE_SKIPPED_DIMENSIONS = [
+        'sharpness', 'contrast', 'noise_level', 'artifacts', 'clinical_adequacy'
+    ]
+
+    # Marca usada nas mensagens ao usuário (SnpqimQualityAnalyzer sobrescreve)
+    BRAND_NAME = "WingsAI"
+
+    # Detecção de estruturas do fundo de olho (raios/distâncias em px)
+    FUNDUS_HOUGH_CONFIG = {
+        'min_radius': 20,
+        'max_radius': 100,
+        'min_dist': 100,
+        'circle_param1': 50,
+        'circle_param2': 30,
+        'circle_param2_fast': 70,  # Primeira passada, mais barata (ver _has_optic_disc)
+        'line_threshold': 50,
+        'min_line_length': 30,
+        'max_line_gap': 10,
+        'min_lines': 5  # Bônus vascular exige mais que min_lines segmentos
+    }
+
     def __init__(
         self,
-        device: torch.device = None,
-        clinical_standards: Dict[str, float] = None
+        device: "torch.device" = None,
+        clinical_standards: Dict[str, float] = None,
+        cascade_config: Dict[str, float] = None
     ):
-        self.device = device or torch.device('cpu')
+        # torch só é importado se o device for consultado (ver propriedade device)
+        self._device = device
+
+        # Orçamento de threads do processo (WINGSAI_THREADS), ver thread_budget
+        configure_from_env()
+
+        # Cascade de saída antecipada (sobrescreve apenas as chaves informadas)
+        self.cascade_config = {**self.DEFAULT_CASCADE_CONFIG, **(cascade_config or {})}
+        self._stats_lock = threading.Lock()
+        self.reset_cascade_stats()
         
         # Padrões clínicos específicos para oftalmologia (propriedade intelectual)
         self.clinical_standards = clinical_standards or {
@@ -96,11 +241,24 @@ class WingsAIQualityAnalyzer:
             }
         }
     
+    @property
+    def device(self) -> "torch.device":
+        """Device torch (import preguiçoso: o scoring não precisa de torch)"""
+        if self._device is None:
+            import torch
+            self._device = torch.device('cpu')
+        return self._device
+
+    @device.setter
+    def device(self, value: "torch.device"):
+        self._device = value
+
     def analyze_image(
         self, 
-        image: Union[np.ndarray, torch.Tensor],
+        image: Union[np.ndarray, "torch.Tensor"],
         exam_type: str = 'fundoscopy',
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        fields: Optional[List[str]] = None
     ) -> WingsAIScore:
         """
         Análise principal de qualidade da imagem
@@ -110,52 +268,95 @@ class WingsAIQualityAnalyzer:
             image: Imagem para análise
             exam_type: Tipo de exame oftalmológico
             metadata: Metadata adicional da imagem
+            fields: Subconjunto de saídas/dimensões desejadas (ver resolve_fields).
+                Apenas as análises necessárias são executadas; None = completa.
+                A projeção vale também para o score rápido do cascade
             
         Returns:
-            WingsAIScore com análise completa
+            WingsAIScore com análise completa (ou parcial, se fields)
         """
+        start_time = time.perf_counter()
+        dimensions, outputs = resolve_fields(fields)
+
         # Preprocessamento da imagem
         processed_image = self._preprocess_image(image)
 
+        # Cascade: checagens baratas de exposição/clipping antes das análises caras
+        if self.cascade_config['enabled']:
+            cascade_reason = self._check_cascade(processed_image)
+            if cascade_reason is not None:
+                score = self._fast_path_score(
+                    processed_image, exam_type, metadata, cascade_reason, dimensions, outputs
+                )
+                self._record_cascade_stats(
+                    time.perf_counter() - start_time, triggered=True, reason=cascade_reason,
+                    projected=fields is not None
+                )
+                return score
+
+        # Bordas Canny compartilhadas por nitidez e contraste
+        edges = None
+        if dimensions & {'sharpness', 'contrast'}:
+            edges = self._compute_edges(processed_image)
+
         # Análise por dimensões específicas (algoritmo proprietário)
         dimension_scores = {}
 
         # 1. Análise de nitidez (propriedade intelectual WingsAI)
-        dimension_scores['sharpness'] = self._analyze_sharpness(processed_image)
+        if 'sharpness' in dimensions:
+            dimension_scores['sharpness'] = self._analyze_sharpness(processed_image, edges)
         
         # 2. Análise de exposição (algoritmo proprietário)
-        dimension_scores['exposure'] = self._analyze_exposure(processed_image)
+        if 'exposure' in dimensions:
+            dimension_scores['exposure'] = self._analyze_exposure(processed_image)
         
         # 3. Análise de contraste (método WingsAI)
-        dimension_scores['contrast'] = self._analyze_contrast(processed_image)
+        if 'contrast' in dimensions:
+            dimension_scores['contrast'] = self._analyze_contrast(processed_image, edges)
 
         # 4. Análise de ruído (propriedade intelectual)
-        dimension_scores['noise_level'] = self._analyze_noise(processed_image)
+        if 'noise_level' in dimensions:
+            dimension_scores['noise_level'] = self._analyze_noise(processed_image)
 
         # 5. Detecção de artifacts (algoritmo WingsAI)
-        dimension_scores['artifacts'] = self._detect_artifacts(processed_image)
+        if 'artifacts' in dimensions:
+            dimension_scores['artifacts'] = self._detect_artifacts(processed_image)
         
         # 6. Adequação clínica (propriedade intelectual)
-        dimension_scores['clinical_adequacy'] = self._assess_clinical_adequacy(
-            processed_image, dimension_scores, exam_type
-        )
+        if 'clinical_adequacy' in dimensions:
+            dimension_scores['clinical_adequacy'] = self._assess_clinical_adequacy(
+                processed_image, dimension_scores, exam_type
+            )
+
+        global_score = confidence = ml_readiness = clinical_adequacy = None
+        recommendation_codes = None
 
         # Cálculo do score global (fórmula proprietária WingsAI)
-        global_score = self._calculate_global_score(
-            dimension_scores, exam_type
-        )
+        if 'global_score' in outputs:
+            global_score = self._calculate_global_score(
+                dimension_scores, exam_type
+            )
 
         # Cálculo de confidence (algoritmo proprietário)
-        confidence = self._calculate_confidence(dimension_scores, processed_image)
+        if 'confidence' in outputs:
+            confidence = self._calculate_confidence(dimension_scores, processed_image)
 
         # Classificação ML readiness (propriedade intelectual)
-        ml_readiness = self._assess_ml_readiness(global_score, dimension_scores)
+        if 'ml_readiness' in outputs:
+            ml_readiness = self._assess_ml_readiness(global_score, dimension_scores)
 
         # Classificação clínica (algoritmo WingsAI)
-        clinical_adequacy = self._classify_clinical_adequacy(global_score, dimension_scores)
+        if 'clinical_adequacy' in outputs:
+            clinical_adequacy = self._classify_clinical_adequacy(global_score, dimension_scores)
         
         # Geração de recomendações (sistema especialista propriedade)
-        recommendations = self._generate_recommendations(dimension_scores, exam_type)
+        if 'recommendations' in outputs:
+            recommendation_codes = self._generate_recommendation_codes(dimension_scores, exam_type)
+
+        if self.cascade_config['enabled']:
+            self._record_cascade_stats(
+                time.perf_counter() - start_time, triggered=False, projected=fields is not None
+            )
 
         return WingsAIScore(
             global_score=global_score,
@@ -163,13 +364,219 @@ class WingsAIQualityAnalyzer:
             confidence=confidence,
             ml_readiness=ml_readiness,
             clinical_adequacy=clinical_adequacy,
-            recommendations=recommendations,
-            metadata=metadata or {}
+            recommendations=None,  # renderizadas na camada de resposta a partir dos códigos
+            metadata=metadata or {},
+            exam_type=exam_type,
+            recommendation_codes=recommendation_codes,
+            brand=self.BRAND_NAME
+        )
+
+    def score_from_dimensions(
+        self,
+        dimension_scores: Dict[str, float],
+        confidence: float,
+        exam_type: str = 'fundoscopy',
+        metadata: Optional[Dict] = None
+    ) -> WingsAIScore:
+        """
+        Monta o WingsAIScore a partir de dimensões já estimadas
+        (ex: modelo destilado em ml.scoring.fast_engine)
+
+        Score global, classificações e recomendações usam as mesmas regras
+        da análise completa.
+        """
+        global_score = self._calculate_global_score(dimension_scores, exam_type)
+        return WingsAIScore(
+            global_score=global_score,
+            dimension_scores=dimension_scores,
+            confidence=confidence,
+            ml_readiness=self._assess_ml_readiness(global_score, dimension_scores),
+            clinical_adequacy=self._classify_clinical_adequacy(global_score, dimension_scores),
+            recommendations=None,
+            metadata=metadata or {},
+            exam_type=exam_type,
+            recommendation_codes=self._generate_recommendation_codes(dimension_scores, exam_type),
+            brand=self.BRAND_NAME
+        )
+
+    def _check_cascade(self, image: np.ndarray) -> Optional[str]:
+        """
+        Checagens baratas de exposição e clipping (uma passada na imagem)
+
+        Returns:
+            Motivo do descarte ('underexposed', 'overexposed', 'blank_frame',
+            'clipped') ou None se a imagem segue para a análise completa
+        """
+        config = self.cascade_config
+
+        mean, std = cv2.meanStdDev(image)
+        mean_intensity = float(mean[0][0])
+        std_intensity = float(std[0][0])
+
+        if mean_intensity < config['min_mean_intensity']:
+            return 'underexposed'
+        if mean_intensity > config['max_mean_intensity']:
+            return 'overexposed'
+        if std_intensity < config['min_std_intensity']:
+            return 'blank_frame'
+
+        clipped = np.count_nonzero((image < 0.02) | (image > 0.98))
+        if clipped / image.size > config['max_clipped_ratio']:
+            return 'clipped'
+
+        return None
+
+    def _fast_path_score(
+        self,
+        image: np.ndarray,
+        exam_type: str,
+        metadata: Optional[Dict],
+        reason: str,
+        dimensions: Optional[set] = None,
+        outputs: Optional[set] = None
+    ) -> WingsAIScore:
+        """
+        Score de caminho rápido para imagens inutilizáveis
+        Apenas exposição é calculada; as demais dimensões ficam zeradas e
+        marcadas em skipped_dimensions
+
+        dimensions/outputs (de resolve_fields) aplicam a mesma projeção de
+        `fields` da análise completa: o que não foi pedido fica de fora/None.
+        """
+        if dimensions is None or outputs is None:
+            dimensions, outputs = set(DIMENSION_NAMES), set(OUTPUT_FIELDS)
+
+        all_dimensions = {
+            'sharpness': 0.0,
+            'exposure': self._analyze_exposure(image),
+            'contrast': 0.0,
+            'noise_level': 0.0,
+            'artifacts': 0.0,
+            'clinical_adequacy': 0.0
+        }
+        dimension_scores = {dim: all_dimensions[dim] for dim in DIMENSION_NAMES if dim in dimensions}
+
+        global_score = confidence = recommendation_codes = None
+        if 'global_score' in outputs:
+            global_score = self._calculate_global_score(all_dimensions, exam_type)
+        if 'confidence' in outputs:
+            confidence = self._calculate_confidence(all_dimensions, image)
+
+        if 'recommendations' in outputs:
+            recommendation_codes = [RecommendationCode.UNUSABLE_FRAME]
+            if all_dimensions['exposure'] < 60:
+                recommendation_codes.append(RecommendationCode.POOR_EXPOSURE)
+
+        return WingsAIScore(
+            global_score=global_score,
+            dimension_scores=dimension_scores,
+            confidence=confidence,
+            ml_readiness="poor" if 'ml_readiness' in outputs else None,
+            clinical_adequacy="inadequate" if 'clinical_adequacy' in outputs else None,
+            recommendations=None,
+            metadata={**(metadata or {}), 'cascade_reason': reason},
+            skipped_dimensions=[
+                dim for dim in self.CASCADE_SKIPPED_DIMENSIONS if dim in dimensions
+            ],
+            exam_type=exam_type,
+            recommendation_codes=recommendation_codes,
+            brand=self.BRAND_NAME
+        )
+
+    def warmup(self, size: int = 256):
+        """
+        Executa imagens sintéticas por todos os caminhos do scoring
+        (cada tipo de exame, cascade e caminho completo) para carregar
+        skimage/scipy e inicializar internals do OpenCV antes do tráfego real.
+        Usado pelo servidor pre-fork antes do fork dos workers.
+        """
+        rng = np.random.default_rng(0)
+        y, x = np.ogrid[:size, :size]
+
+        # Imagem com disco, vasos e ruído: percorre o caminho completo
+        image = np.full((size, size), 0.35, dtype=np.float32)
+        image[(x - size * 0.6) ** 2 + (y - size * 0.4) ** 2 <= (size * 0.1) ** 2] = 0.8
+        for k in range(6):
+            cv2.line(image, (0, k * size // 6), (size - 1, k * size // 6 + size // 8), 0.1, 2)
+        image = np.clip(image + 0.02 * rng.standard_normal(image.shape), 0, 1)
+        image_rgb = (np.dstack([image] * 3) * 255).astype(np.uint8)
+
+        for exam_type in self.exam_weights:
+            self.analyze_image(image_rgb, exam_type=exam_type)
+
+        # Imagem inutilizável: caminho do cascade
+        self.analyze_image(np.zeros((size, size, 3), dtype=np.uint8))
+
+        # Warmup não conta nas estatísticas de produção
+        self.reset_cascade_stats()
+
+    def reset_cascade_stats(self):
+        """Zera contadores do cascade"""
+        with self._stats_lock:
+            self._cascade_stats = {
+                'analyzed': 0,
+                'triggered': 0,
+                'reasons': {},
+                'fast_path_seconds': 0.0,
+                'full_path_seconds': 0.0,
+                'projected': 0,
+                'projected_triggered': 0
+            }
+
+    def _record_cascade_stats(
+        self,
+        seconds: float,
+        triggered: bool,
+        reason: str = None,
+        projected: bool = False
+    ):
+        with self._stats_lock:
+            stats = self._cascade_stats
+            # Análises com `fields` têm custo diferente: contadas à parte, fora
+            # da taxa de disparo e das médias dos dois caminhos
+            if projected:
+                stats['projected'] += 1
+                stats['projected_triggered'] += int(triggered)
+                return
+            stats['analyzed'] += 1
+            if triggered:
+                stats['triggered'] += 1
+                stats['reasons'][reason] = stats['reasons'].get(reason, 0) + 1
+                stats['fast_path_seconds'] += seconds
+            else:
+                stats['full_path_seconds'] += seconds
+
+    def get_cascade_stats(self) -> Dict[str, any]:
+        """
+        Estatísticas do cascade: taxa de disparo e tempo economizado
+
+        O tempo economizado é estimado como (tempo médio do caminho completo
+        - tempo médio do caminho rápido) x número de disparos. Só análises
+        completas (sem `fields`) entram; as projetadas ficam em 'projected' e
+        'projected_triggered'.
+        """
+        with self._stats_lock:
+            stats = dict(self._cascade_stats)
+            stats['reasons'] = dict(stats['reasons'])
+
+        full_count = stats['analyzed'] - stats['triggered']
+        avg_full = stats['full_path_seconds'] / full_count if full_count else None
+        avg_fast = stats['fast_path_seconds'] / stats['triggered'] if stats['triggered'] else None
+
+        stats['trigger_rate'] = stats['triggered'] / stats['analyzed'] if stats['analyzed'] else 0.0
+        stats['avg_full_path_seconds'] = avg_full
+        stats['avg_fast_path_seconds'] = avg_fast
+        stats['estimated_seconds_saved'] = (
+            max(avg_full - avg_fast, 0.0) * stats['triggered']
+            if avg_full is not None and avg_fast is not None else 0.0
         )
+        return stats
     
-    def _preprocess_image(self, image: Union[np.ndarray, torch.Tensor]) -> np.ndarray:
+    def _preprocess_image(self, image: Union[np.ndarray, "torch.Tensor"]) -> np.ndarray:
         """Preprocessamento padronizado da imagem"""
-        if isinstance(image, torch.Tensor):
+        # Um tensor só pode chegar aqui se o chamador já importou torch
+        torch = sys.modules.get('torch')
+        if torch is not None and isinstance(image, torch.Tensor):
             image = image.detach().cpu().numpy()
 
         # Normalização para 0-1
@@ -187,7 +594,17 @@ class WingsAIQualityAnalyzer:
 
         return gray_image
     
-    def _analyze_sharpness(self, image: np.ndarray) -> float:
+    def _compute_edges(self, image: np.ndarray) -> np.ndarray:
+        """
+        Mapa de bordas Canny (uint8) compartilhado entre nitidez e contraste
+
+        Converte para 0-255 em float64, como as duas análises já faziam. As
+        estruturas do fundo convertem a imagem float32 e truncam diferente em
+        alguns valores, por isso calculam as próprias bordas.
+        """
+        return cv2.Canny((image.astype(np.float64) * 255).astype(np.uint8), 50, 150)
+
+    def _analyze_sharpness(self, image: np.ndarray, edges: Optional[np.ndarray] = None) -> float:
         """
         Análise proprietária de nitidez WingsAI
         Combina múltiplas métricas para avaliação robusta
@@ -220,7 +637,8 @@ class WingsAIQualityAnalyzer:
         high_freq_energy = np.mean(magnitude_spectrum * high_freq_mask)
 
         # 4. Edge density analysis (método WingsAI)
-        edges = cv2.Canny((image * 255).astype(np.uint8), 50, 150)
+        if edges is None:
+            edges = self._compute_edges(image)
         edge_density = np.sum(edges > 0) / edges.size
 
         # Combinação proprietária WingsAI (fórmula patenteável)
@@ -282,7 +700,7 @@ class WingsAIQualityAnalyzer:
         
         return max(min(exposure_score * 100, 100.0), 0.0)
     
-    def _analyze_contrast(self, image: np.ndarray) -> float:
+    def _analyze_contrast(self, image: np.ndarray, edges: Optional[np.ndarray] = None) -> float:
         """
         Análise proprietária de contraste WingsAI
         Otimizada para estruturas oftalmológicas
@@ -295,6 +713,8 @@ class WingsAIQualityAnalyzer:
         
         # 2. Michelson Contrast para regiões de interesse
         # Identifica regiões com estruturas oftalmológicas
+        from skimage import filters, feature
+
         structure_enhanced = filters.unsharp_mask(image, radius=2, amount=1)
         local_maxima = feature.peak_local_max(structure_enhanced, min_distance=20)
         local_minima = feature.peak_local_max(-structure_enhanced, min_distance=20)
@@ -325,7 +745,8 @@ class WingsAIQualityAnalyzer:
         mean_local_contrast = np.mean(local_contrasts) if local_contrasts else 0
 
         # 4. Edge-based contrast (método WingsAI)
-        edges = cv2.Canny((image * 255).astype(np.uint8), 50, 150)
+        if edges is None:
+            edges = self._compute_edges(image)
         edge_pixels = image[edges > 0]
         non_edge_pixels = image[edges == 0]
         
@@ -357,6 +778,7 @@ class WingsAIQualityAnalyzer:
 
         # 1. Noise estimation via wavelet decomposition
         from scipy import ndimage
+        from skimage import filters
         
         # Estima ruído usando método Donoho (adaptado para medicina)
         coeffs = cv2.medianBlur((image * 255).astype(np.uint8), 3)
@@ -462,6 +884,8 @@ class WingsAIQualityAnalyzer:
         
         # 4. Reflection artifacts (específico para fundoscopia)
         # Detecta reflexos especulares comuns em fundoscopia
+        from skimage import measure
+
         very_bright = image > 0.9
         bright_regions = measure.label(very_bright)
         
@@ -540,29 +964,49 @@ class WingsAIQualityAnalyzer:
         """Detecta estruturas do fundo de olho"""
         # Simplified structure detection for demo
         # Em implementação real, usaria modelos específicos
-        
-        # Detecta regiões circulares (possível disco óptico)
-        circles = cv2.HoughCircles(
-            (image * 255).astype(np.uint8),
-            cv2.HOUGH_GRADIENT, dp=1, minDist=100,
-            param1=50, param2=30, minRadius=20, maxRadius=100
-        )
-        
+        config = self.FUNDUS_HOUGH_CONFIG
+        image_u8 = (image * 255).astype(np.uint8)
+
         structure_score = 50.0  # Base score
-        
-        if circles is not None:
+
+        if self._has_optic_disc(image_u8):
             structure_score += 30  # Bonus for detected circular structures
         
         # Detecta estruturas lineares (possíveis vasos)
-        edges = cv2.Canny((image * 255).astype(np.uint8), 50, 150)
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=50, 
-                               minLineLength=30, maxLineGap=10)
-        
-        if lines is not None and len(lines) > 5:
+        edges = cv2.Canny(image_u8, 50, 150)
+        lines = cv2.HoughLinesP(
+            edges, 1, np.pi/180, threshold=config['line_threshold'],
+            minLineLength=config['min_line_length'], maxLineGap=config['max_line_gap']
+        )
+
+        if lines is not None and len(lines) > config['min_lines']:
             structure_score += 20  # Bonus for vascular structures
         
         return min(structure_score, 100.0)
     
+    def _has_optic_disc(self, image_u8: np.ndarray) -> bool:
+        """
+        Detecta regiões circulares (possível disco óptico) via HoughCircles
+
+        O custo está na estimativa do raio de cada centro candidato: com
+        param2=30 o ruído de fundos medium/low gera dezenas deles. Uma primeira
+        passada com param2 maior (`circle_param2_fast`) tem poucos candidatos.
+        O acumulador não depende de param2, então um círculo achado nela também
+        seria achado com param2=30. Só quando ela não acha nada roda a busca
+        original. A decisão é sempre a da busca original com param2=30.
+        """
+        config = self.FUNDUS_HOUGH_CONFIG
+        for param2 in (config['circle_param2_fast'], config['circle_param2']):
+            circles = cv2.HoughCircles(
+                image_u8,
+                cv2.HOUGH_GRADIENT, dp=1, minDist=config['min_dist'],
+                param1=config['circle_param1'], param2=param2,
+                minRadius=config['min_radius'], maxRadius=config['max_radius']
+            )
+            if circles is not None:
+                return True
+        return False
+
     def _detect_oct_layers(self, image: np.ndarray) -> float:
         """Detecta camadas em imagens OCT"""
         # Simplified OCT layer detection
@@ -721,72 +1165,57 @@ class WingsAIQualityAnalyzer:
         else:
             return "inadequate"   # Inadequado para uso clínico
     
-    def _generate_recommendations(
+    def _generate_recommendation_codes(
         self,
         dimension_scores: Dict[str, float],
         exam_type: str
-    ) -> List[str]:
+    ) -> List[RecommendationCode]:
         """
-        Geração de recomendações específicas
+        Códigos das recomendações (sem montar texto)
         Sistema especialista proprietário WingsAI
         """
-        recommendations = []
-        
+        codes = []
+
         # Análise por dimensão com recomendações específicas
         if dimension_scores.get('sharpness', 0) < 70:
-            recommendations.append(
-                "Verifique o foco do equipamento e estabilize a captura para melhorar nitidez"
-            )
-        
+            codes.append(RecommendationCode.LOW_SHARPNESS)
+
         if dimension_scores.get('exposure', 0) < 60:
-            recommendations.append(
-                "Ajuste a exposição - imagem muito escura ou clara para análise adequada"
-            )
-        
+            codes.append(RecommendationCode.POOR_EXPOSURE)
+
         if dimension_scores.get('contrast', 0) < 65:
-            recommendations.append(
-                "Melhore o contraste ajustando iluminação ou configurações do equipamento"
-            )
-        
+            codes.append(RecommendationCode.LOW_CONTRAST)
+
         if dimension_scores.get('noise_level', 0) < 70:
-            recommendations.append(
-                "Reduza o ruído usando menor ISO ou melhor iluminação"
-            )
-        
+            codes.append(RecommendationCode.HIGH_NOISE)
+
         if dimension_scores.get('artifacts', 0) < 75:
-            recommendations.append(
-                "Verifique artifacts de movimento ou compressão que podem afetar diagnóstico"
-            )
-        
+            codes.append(RecommendationCode.ARTIFACTS)
+
         if dimension_scores.get('clinical_adequacy', 0) < 70:
-            recommendations.append(
-                f"Imagem pode não atender padrões clínicos para {exam_type} - considere nova captura"
-            )
-        
+            codes.append(RecommendationCode.CLINICAL_STANDARDS)
+
         # Recomendações específicas por tipo de exame
         if exam_type == 'fundoscopy':
             if dimension_scores.get('clinical_adequacy', 0) < 80:
-                recommendations.append(
-                    "Para fundoscopia: garanta visibilidade do disco óptico e estruturas vasculares"
-                )
-        
+                codes.append(RecommendationCode.FUNDUS_STRUCTURES)
+
         elif exam_type == 'oct':
             if dimension_scores.get('sharpness', 0) < 80:
-                recommendations.append(
-                    "Para OCT: nitidez crítica para visualização de camadas retinianas"
-                )
-        
+                codes.append(RecommendationCode.OCT_SHARPNESS)
+
         # Se não há problemas significativos
-        if not recommendations:
-            recommendations.append("Imagem atende aos padrões de qualidade WingsAI")
+        if not codes:
+            codes.append(RecommendationCode.MEETS_STANDARDS)
 
-        return recommendations
+        return codes
 
 
 def analyze_image_quality(
-    image: Union[np.ndarray, torch.Tensor],
+    image: Union[np.ndarray, "torch.Tensor"],
     exam_type: str = 'fundoscopy',
-    metadata: Optional[Dict] = None
+    metadata: Optional[Dict] = None,
+    fields: Optional[List[str]] = None
 ) -> WingsAIScore:
     """
     Função principal de análise de qualidade WingsAI
@@ -796,12 +1225,29 @@ def analyze_image_quality(
         image: Imagem para análise
         exam_type: Tipo de exame ('fundoscopy', 'oct', 'angiography')
         metadata: Metadata adicional
+        fields: Subconjunto de saídas/dimensões (ex: ['dimension_scores.sharpness'])
 
     Returns:
-        WingsAIScore com análise completa
+        WingsAIScore com análise completa (ou parcial, se fields)
+    """
+    return get_default_analyzer().analyze_image(image, exam_type, metadata, fields)
+
+
+_default_analyzer: Optional[WingsAIQualityAnalyzer] = None
+_default_analyzer_lock = threading.Lock()
+
+
+def get_default_analyzer() -> WingsAIQualityAnalyzer:
+    """
+    Analyzer compartilhado usado por analyze_image_quality
+    Mantém as estatísticas do cascade entre chamadas (ex: métricas da API)
     """
-    analyzer = WingsAIQualityAnalyzer()
-    return analyzer.analyze_image(image, exam_type, metadata)
+    global _default_analyzer
+    if _default_analyzer is None:
+        with _default_analyzer_lock:
+            if _default_analyzer is None:
+                _default_analyzer = WingsAIQualityAnalyzer()
+    return _default_analyzer
 
 
 if __name__ == "__main__":
@@ -836,5 +1282,5 @@ if __name__ == "__main__":
         print(f"  {dim}: {value:.1f}/100")
     
     print("\nRecommendations:")
-    for rec in score.recommendations:
+    for rec in score.render_recommendations():
         print(f"  - {rec}")
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+SNPQIM Distillation
+Destilação do WingsAIQualityAnalyzer (professor) em uma CNN pequena para CPU
+
+Fluxo ponta a ponta de distill_fast_scorer():
+    1. rotula o corpus com o analyzer (ml.data.labeling, incremental)
+    2. compila os shards de treino (ml.data.shards), se desatualizados
+    3. treina o SnpqimFastScorer com o SnpqimTrainer
+    4. mede a concordância com a referência no split de teste
+    5. grava o modelo (save_scorer) com versão do professor e concordância
+
+Um modelo por tipo de exame: a adequação clínica do analyzer depende do
+tipo, e o score global servido é recalculado pelas regras do analyzer a
+partir das dimensões previstas (o mesmo que ml.scoring.fast_engine faz).
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader
+
+from ..data.dataset import DEFAULT_IMAGE_SIZE, SHARDS_DIRNAME, targets_to_dict
+from ..data.labeling import LabelingPipeline
+from ..data.shards import compile_shards, shards_available
+from ..models.quality_cnn import save_scorer, stack_outputs
+from ..scoring.bulk import iter_inputs
+from ..scoring.fast_engine import agreement_summary
+from ..scoring.wingsai_core import ANALYZER_VERSION, DIMENSION_NAMES, WingsAIQualityAnalyzer
+from .metrics import GLOBAL_COLUMN, METRIC_COLUMNS, FadexQualityMetrics
+from .pipeline import SnpqimTrainer, TrainingConfig
+
+logger = logging.getLogger(__name__)
+
+FAST_MODEL_CONFIG = {'type': 'fast', 'params': {'width': 16, 'dropout_rate': 0.1}}
+
+
+def served_global_scores(
+    predictions: np.ndarray, exam_type: str, rules: Optional[WingsAIQualityAnalyzer] = None
+) -> np.ndarray:
+    """Score global servido: regras do analyzer sobre as dimensões previstas (N, 8)"""
+    rules = rules or WingsAIQualityAnalyzer()
+    return np.array([
+        rules.score_from_dimensions(
+            {dim: float(row[1 + j]) for j, dim in enumerate(DIMENSION_NAMES)}, float(row[-1]), exam_type
+        ).global_score
+        for row in predictions
+    ])
+
+
+def collect_predictions(model: nn.Module, loader: DataLoader, device: torch.device) -> Dict[str, np.ndarray]:
+    """Saídas do modelo e targets do loader, (N, 8) cada"""
+    model.eval()
+    predictions, targets = [], []
+    with torch.inference_mode():
+        for batch in loader:
+            predictions.append(stack_outputs(model(batch['image'].to(device))).cpu())
+            targets.append(batch['targets'])
+    if not predictions:
+        return {'predictions': np.empty((0, len(METRIC_COLUMNS))), 'targets': np.empty((0, len(METRIC_COLUMNS)))}
+    return {
+        'predictions': torch.cat(predictions).double().numpy(),
+        'targets': torch.cat(targets).double().numpy()
+    }
+
+
+def agreement_report(predictions: np.ndarray, references: np.ndarray) -> Dict[str, float]:
+    """Concordância (N, 8) servida x referência, com as chaves de AgreementTracker"""
+    metrics = FadexQualityMetrics()
+    if len(predictions):
+        metrics.update(
+            targets_to_dict(torch.as_tensor(predictions, dtype=torch.float32)),
+            targets_to_dict(torch.as_tensor(references, dtype=torch.float32))
+        )
+    return agreement_summary(metrics.compute(), metrics.num_samples)
+
+
+def evaluate_agreement(
+    model: nn.Module, loader: DataLoader, exam_type: str, device: Optional[torch.device] = None
+) -> Dict[str, float]:
+    """Concordância da engine rápida com o analyzer em um split rotulado"""
+    device = device or next(model.parameters()).device
+    collected = collect_predictions(model, loader, device)
+    served = collected['predictions'].copy()
+    served[:, GLOBAL_COLUMN] = served_global_scores(served, exam_type)
+    return agreement_report(served, collected['targets'])
+
+
+def distill_fast_scorer(
+    corpus: Optional[str],
+    data_dir: str,
+    output_path: str,
+    exam_type: str = 'fundoscopy',
+    pattern: Optional[str] = None,
+    image_size: int = DEFAULT_IMAGE_SIZE,
+    num_epochs: int = 30,
+    batch_size: int = 32,
+    learning_rate: float = 1e-3,
+    label_workers: Optional[int] = None,
+    model_config: Optional[Dict[str, Any]] = None,
+    training_overrides: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Rotula, treina e exporta o modelo rápido
+
+    Args:
+        corpus: Diretório, glob ou manifesto de imagens (None: usa só os
+            rótulos já existentes em data_dir)
+        data_dir: Dataset de treino (labels.parquet, shards/, checkpoints/)
+        output_path: Arquivo do modelo exportado (carregado pela engine rápida)
+        exam_type: Tipo de exame do corpus (só rótulos desse tipo entram no treino)
+        image_size: Lado da entrada do modelo
+        label_workers: Processos da rotulagem
+        model_config: Configuração do modelo (padrão: FAST_MODEL_CONFIG)
+        training_overrides: Campos extras de TrainingConfig
+
+    Returns:
+        Metadados gravados no modelo (inclui 'agreement' no split de teste)
+    """
+    start = time.time()
+    model_config = model_config or FAST_MODEL_CONFIG
+
+    if corpus is not None:
+        stats = LabelingPipeline(data_dir, workers=label_workers).run(iter_inputs(corpus, exam_type, pattern))
+        logger.info(f"🏷️  Rotulagem: {stats['labeled']} novas, {stats['reused']} reaproveitadas, "
+                    f"{stats['unchanged']} sem mudança")
+
+    # Só os rótulos deste tipo de exame (o índice pode ter corpus de vários)
+    if not shards_available(os.path.join(data_dir, SHARDS_DIRNAME), image_size, data_dir, exam_type):
+        compile_shards(data_dir, image_size=image_size, exam_type=exam_type)
+
+    run_dir = Path(data_dir) / 'distillation'
+    config = TrainingConfig(**{
+        'model_config': model_config,
+        'batch_size': batch_size,
+        'learning_rate': learning_rate,
+        'num_epochs': num_epochs,
+        'optimizer': 'adamw',
+        'image_size': image_size,
+        'num_workers': 0,
+        'experiment_tracker': 'none',
+        'device': 'cpu',
+        'mixed_precision': False,
+        'data_dir': data_dir,
+        'exam_type': exam_type,
+        'output_dir': str(run_dir / 'outputs'),
+        'checkpoint_dir': str(run_dir / 'checkpoints'),
+        **(training_overrides or {})
+    })
+    trainer = SnpqimTrainer(config)
+    trainer.train()
+
+    best_path = Path(config.checkpoint_dir) / 'best_model.pt'
+    if best_path.exists():
+        checkpoint = torch.load(best_path, map_location=trainer.device, weights_only=True)
+        trainer.model.load_state_dict(checkpoint['model_state_dict'])
+
+    # Split de teste (ou validação, em datasets pequenos demais para teste)
+    loader = trainer.test_loader if len(trainer.test_loader.dataset) else trainer.val_loader
+    agreement = evaluate_agreement(trainer.model, loader, exam_type, trainer.device)
+
+    metadata = {
+        'analyzer_version': ANALYZER_VERSION,
+        'exam_types': [exam_type],
+        'agreement': agreement,
+        'train_samples': len(trainer.train_loader.dataset),
+        'epochs': trainer.epoch + 1,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seconds': time.time() - start
+    }
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    save_scorer(output_path, trainer.model.cpu(), model_config, image_size, metadata)
+    logger.info(
+        f"✅ Modelo rápido em {output_path}: MAE global {agreement.get('global_mae', float('nan')):.2f}, "
+        f"concordância clínica {agreement.get('clinical_agreement_rate', float('nan')):.1%} "
+        f"({agreement['samples']} imagens de teste)"
+    )
+    return metadata
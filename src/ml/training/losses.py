@@ -7,7 +7,83 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import numpy as np
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
+
+from .metrics import DIMENSION_NAMES
+
+# Dimension scores: dict {nome: (B, 1)} ou tensor (B, 6) na ordem de DIMENSION_NAMES
+DimensionScores = Union[Dict[str, torch.Tensor], torch.Tensor]
+
+
+def stack_dimension_scores(
+    dimension_scores: Optional[DimensionScores]
+) -> Tuple[Optional[torch.Tensor], Optional[torch.Tensor]]:
+    """
+    Padroniza dimension scores como um tensor (B, 6) na ordem de DIMENSION_NAMES
+
+    Adaptador da interface em dict: tensores (B, 6) passam direto.
+
+    Returns:
+        (scores (B, 6), máscara (6,) das dimensões presentes ou None se todas)
+    """
+    if isinstance(dimension_scores, torch.Tensor):
+        return dimension_scores, None
+    if not dimension_scores:
+        return None, None
+
+    present = [name in dimension_scores for name in DIMENSION_NAMES]
+    if all(present):
+        columns = [dimension_scores[name].reshape(-1, 1) for name in DIMENSION_NAMES]
+        return torch.cat(columns, dim=1), None
+
+    reference = next(iter(dimension_scores.values())).reshape(-1, 1)
+    columns = [
+        dimension_scores[name].reshape(-1, 1) if name in dimension_scores else torch.zeros_like(reference)
+        for name in DIMENSION_NAMES
+    ]
+    return torch.cat(columns, dim=1), torch.tensor(present, device=reference.device)
+
+
+def total_loss(value: Union[torch.Tensor, Dict[str, torch.Tensor]]) -> torch.Tensor:
+    """Tensor a otimizar: as losses compostas devolvem dict com 'total_loss' ou 'total'"""
+    if isinstance(value, dict):
+        return value['total_loss'] if 'total_loss' in value else value['total']
+    return value
+
+
+def _stack_pair(
+    predictions: Dict[str, DimensionScores], 
+    targets: Dict[str, DimensionScores]
+) -> Tuple[Optional[torch.Tensor], Optional[torch.Tensor], Optional[torch.Tensor]]:
+    """Dimensões de predição e target empilhadas + máscara das presentes nas duas"""
+    pred_dims, pred_mask = stack_dimension_scores(predictions.get('dimension_scores'))
+    target_dims, target_mask = stack_dimension_scores(targets.get('dimension_scores'))
+    if pred_dims is None or target_dims is None:
+        return None, None, None
+    if pred_mask is None:
+        mask = target_mask
+    elif target_mask is None:
+        mask = pred_mask
+    else:
+        mask = pred_mask & target_mask
+    return pred_dims, target_dims, mask
+
+
+def _dimension_weights(
+    weights: Dict[str, float], default: float = 0.0, device: Optional[torch.device] = None
+) -> torch.Tensor:
+    """Vetor (6,) de pesos na ordem de DIMENSION_NAMES (float64; convertido para o dtype da loss)"""
+    return torch.tensor(
+        [weights.get(name, default) for name in DIMENSION_NAMES], dtype=torch.float64, device=device
+    )
+
+
+def _masked_mean(values: torch.Tensor, mask: Optional[torch.Tensor]) -> torch.Tensor:
+    """Média de um vetor (6,) só nas dimensões presentes (0 se nenhuma)"""
+    if mask is None:
+        return values.mean()
+    count = mask.sum()
+    return torch.where(mask, values, torch.zeros_like(values)).sum() / count.clamp(min=1)
 
 
 class SnpqimQualityLoss(nn.Module):
@@ -15,7 +91,14 @@ class SnpqimQualityLoss(nn.Module):
     Loss function proprietária SNPQIM para quality assessment
     Combina múltiplos objetivos específicos para imagens médicas
     PROPRIEDADE INTELECTUAL
+
+    Dimension scores são processados como um tensor (B, 6) (ver
+    stack_dimension_scores); o dict de entrada é só um adaptador.
     """
+
+    # Dimensões críticas têm penalidade maior
+    CRITICAL_DIMENSIONS = ('sharpness', 'clinical_adequacy')
+    CRITICAL_DIMENSION_FACTOR = 1.5
     
     def __init__(
         self,
@@ -28,18 +111,26 @@ class SnpqimQualityLoss(nn.Module):
         self.device = device or torch.device('cpu')
         self.smoothing_factor = smoothing_factor
         
-        # Pesos padrão para componentes da loss
-        self.weights = weights or {
+        # Pesos padrão para componentes da loss (pesos parciais sobrescrevem só as chaves dadas)
+        self.weights = {
             'global_score': 0.4,      # Score global principal
             'dimension_scores': 0.35,  # Scores por dimensão
             'consistency': 0.15,       # Consistência entre dimensões
-            'confidence': 0.1          # Confidence accuracy
+            'confidence': 0.1,         # Confidence accuracy
+            **(weights or {})
         }
         
         # Loss functions auxiliares
         self.mse_loss = nn.MSELoss()
         self.smooth_l1_loss = nn.SmoothL1Loss()
         self.bce_loss = nn.BCEWithLogitsLoss()
+
+        # Peso de cada dimensão (ordem de DIMENSION_NAMES) e zero (devolvido como cópia)
+        self.register_buffer('dimension_factors', _dimension_weights(
+            {name: self.CRITICAL_DIMENSION_FACTOR for name in self.CRITICAL_DIMENSIONS}, default=1.0,
+            device=self.device
+        ), persistent=False)
+        self.register_buffer('zero', torch.zeros((), device=self.device), persistent=False)
         
     def forward(
         self, 
@@ -57,6 +148,7 @@ class SnpqimQualityLoss(nn.Module):
             Dict com loss total e componentes individuais
         """
         losses = {}
+        pred_dims, target_dims, dim_mask = _stack_pair(predictions, targets)
         
         # 1. Global Score Loss (MSE suavizado)
         global_pred = predictions['global_score'] / 100.0  # Normaliza para 0-1
@@ -66,12 +158,13 @@ class SnpqimQualityLoss(nn.Module):
         losses['global_loss'] = global_loss
         
         # 2. Dimension Scores Loss
-        dimension_loss = self._calculate_dimension_loss(predictions, targets)
-        losses['dimension_loss'] = dimension_loss
+        losses['dimension_loss'] = self._calculate_dimension_loss(pred_dims, target_dims, dim_mask)
         
         # 3. Consistency Loss (propriedade SNPQIM)
-        consistency_loss = self._calculate_consistency_loss(predictions, targets)
-        losses['consistency_loss'] = consistency_loss
+        pred_only_dims, pred_mask = stack_dimension_scores(predictions.get('dimension_scores'))
+        losses['consistency_loss'] = self._calculate_consistency_loss(
+            predictions.get('global_score'), pred_only_dims, pred_mask
+        )
         
         # 4. Confidence Loss
         if 'confidence' in predictions and 'confidence' in targets:
@@ -80,7 +173,7 @@ class SnpqimQualityLoss(nn.Module):
             confidence_loss = self.mse_loss(conf_pred, conf_target)
             losses['confidence_loss'] = confidence_loss
         else:
-            losses['confidence_loss'] = torch.tensor(0.0, device=self.device)
+            losses['confidence_loss'] = self.zero.clone()
         
         # 5. Total Loss (combinação ponderada)
         total_loss = (
@@ -96,66 +189,51 @@ class SnpqimQualityLoss(nn.Module):
     
     def _calculate_dimension_loss(
         self, 
-        predictions: Dict[str, torch.Tensor], 
-        targets: Dict[str, torch.Tensor]
+        pred_dims: Optional[torch.Tensor], 
+        target_dims: Optional[torch.Tensor],
+        mask: Optional[torch.Tensor] = None
     ) -> torch.Tensor:
         """
-        Loss para scores dimensionais individuais
+        Loss para scores dimensionais individuais (tensores (B, 6))
         Propriedade intelectual SNPQIM
         """
-        dimension_losses = []
-        
-        pred_dimensions = predictions.get('dimension_scores', {})
-        target_dimensions = targets.get('dimension_scores', {})
-        
-        for dim_name in pred_dimensions.keys():
-            if dim_name in target_dimensions:
-                pred_score = pred_dimensions[dim_name] / 100.0
-                target_score = target_dimensions[dim_name] / 100.0
-                
-                # Loss adaptativa baseada na importância da dimensão
-                if dim_name in ['sharpness', 'clinical_adequacy']:
-                    # Dimensões críticas têm penalidade maior
-                    dim_loss = self.smooth_l1_loss(pred_score, target_score) * 1.5
-                else:
-                    dim_loss = self.smooth_l1_loss(pred_score, target_score)
-                
-                dimension_losses.append(dim_loss)
-        
-        if dimension_losses:
-            return torch.stack(dimension_losses).mean()
-        else:
-            return torch.tensor(0.0, device=self.device)
+        if pred_dims is None:
+            return self.zero.clone()
+        
+        # Smooth L1 por dimensão (média no batch) com penalidade das críticas
+        per_dimension = F.smooth_l1_loss(
+            pred_dims / 100.0, target_dims / 100.0, reduction='none'
+        ).mean(dim=0)
+        return _masked_mean(per_dimension * self.dimension_factors.to(per_dimension.dtype), mask)
     
     def _calculate_consistency_loss(
         self, 
-        predictions: Dict[str, torch.Tensor], 
-        targets: Dict[str, torch.Tensor]
+        pred_global: Optional[torch.Tensor], 
+        pred_dims: Optional[torch.Tensor],
+        mask: Optional[torch.Tensor] = None
     ) -> torch.Tensor:
         """
         Loss de consistência entre global score e dimension scores
         ALGORITMO PROPRIETÁRIO SNPQIM
         """
-        pred_global = predictions.get('global_score', torch.tensor(0.0))
-        pred_dimensions = predictions.get('dimension_scores', {})
-        
-        if not pred_dimensions:
-            return torch.tensor(0.0, device=self.device)
-        
-        # Calcula média das dimensões
-        dim_values = list(pred_dimensions.values())
-        if dim_values:
-            pred_dim_mean = torch.stack(dim_values).mean()
+        if pred_dims is None:
+            return self.zero.clone()
+        if pred_global is None:
+            pred_global = self.zero.clone()
+        
+        # Calcula média das dimensões (sobre todo o batch)
+        if mask is None:
+            pred_dim_mean = pred_dims.mean()
+        else:
+            pred_dim_mean = pred_dims[:, mask].mean()
             
-            # Loss de consistência: global score deve ser consistente com média das dimensões
-            consistency_diff = torch.abs(pred_global - pred_dim_mean) / 100.0
+        # Loss de consistência: global score deve ser consistente com média das dimensões
+        consistency_diff = torch.abs(pred_global - pred_dim_mean) / 100.0
             
-            # Penalidade não-linear para grandes inconsistências
-            consistency_loss = consistency_diff ** 2
+        # Penalidade não-linear para grandes inconsistências
+        consistency_loss = consistency_diff ** 2
             
-            return consistency_loss.mean()
-        
-        return torch.tensor(0.0, device=self.device)
+        return consistency_loss.mean()
 
 
 class DimensionAwareLoss(nn.Module):
@@ -206,6 +284,10 @@ class DimensionAwareLoss(nn.Module):
         self.dimension_weights = self.exam_weights.get(
             exam_type, self.exam_weights['fundoscopy']
         )
+        self.register_buffer(
+            'weight_vector', _dimension_weights(self.dimension_weights, device=self.device), persistent=False
+        )
+        self.register_buffer('zero', torch.zeros((), device=self.device), persistent=False)
         
         # Loss base
         self.mse_loss = nn.MSELoss(reduction='none')
@@ -218,23 +300,16 @@ class DimensionAwareLoss(nn.Module):
         """
         Calcula loss ponderada por importância dimensional
         """
-        total_loss = torch.tensor(0.0, device=self.device)
-        
-        pred_dimensions = predictions.get('dimension_scores', {})
-        target_dimensions = targets.get('dimension_scores', {})
-        
-        for dim_name, weight in self.dimension_weights.items():
-            if dim_name in pred_dimensions and dim_name in target_dimensions:
-                pred_score = pred_dimensions[dim_name] / 100.0
-                target_score = target_dimensions[dim_name] / 100.0
-                
-                # Loss MSE ponderada
-                dim_loss = self.mse_loss(pred_score, target_score)
-                weighted_loss = weight * dim_loss.mean()
-                
-                total_loss += weighted_loss
-        
-        return total_loss
+        pred_dims, target_dims, mask = _stack_pair(predictions, targets)
+        if pred_dims is None:
+            return self.zero.clone()
+        
+        # Loss MSE ponderada: soma de peso * MSE médio de cada dimensão
+        per_dimension = self.mse_loss(pred_dims / 100.0, target_dims / 100.0).mean(dim=0)
+        weighted = per_dimension * self.weight_vector.to(per_dimension.dtype)
+        if mask is not None:
+            weighted = torch.where(mask, weighted, torch.zeros_like(weighted))
+        return weighted.sum()
 
 
 class RobustQualityLoss(nn.Module):
@@ -257,6 +332,7 @@ class RobustQualityLoss(nn.Module):
         
         # Huber loss para robustez
         self.huber_loss = nn.HuberLoss(delta=alpha)
+        self.register_buffer('zero', torch.zeros((), device=self.device), persistent=False)
         
     def forward(
         self, 
@@ -275,23 +351,15 @@ class RobustQualityLoss(nn.Module):
             global_loss = self.huber_loss(global_pred, global_target)
             losses.append(self.weights['global'] * global_loss)
         
-        # Dimension scores loss
-        pred_dimensions = predictions.get('dimension_scores', {})
-        target_dimensions = targets.get('dimension_scores', {})
-        
-        dim_losses = []
-        for dim_name in pred_dimensions.keys():
-            if dim_name in target_dimensions:
-                pred_score = pred_dimensions[dim_name] / 100.0
-                target_score = target_dimensions[dim_name] / 100.0
-                dim_loss = self.huber_loss(pred_score, target_score)
-                dim_losses.append(dim_loss)
-        
-        if dim_losses:
-            avg_dim_loss = torch.stack(dim_losses).mean()
-            losses.append(self.weights['dimensions'] * avg_dim_loss)
+        # Dimension scores loss (média das Huber por dimensão)
+        pred_dims, target_dims, mask = _stack_pair(predictions, targets)
+        if pred_dims is not None and (mask is None or bool(mask.any())):
+            per_dimension = F.huber_loss(
+                pred_dims / 100.0, target_dims / 100.0, reduction='none', delta=self.alpha
+            ).mean(dim=0)
+            losses.append(self.weights['dimensions'] * _masked_mean(per_dimension, mask))
         
-        return sum(losses) if losses else torch.tensor(0.0, device=self.device)
+        return sum(losses) if losses else self.zero.clone()
 
 
 class ConfidenceAwareLoss(nn.Module):
@@ -371,14 +439,14 @@ class MultiTaskQualityLoss(nn.Module):
         Multi-task loss computation
         """
         losses = {}
-        total_loss = torch.tensor(0.0, device=self.device)
+        weighted_losses = []
         
         # Quality assessment loss
         if 'global_score' in predictions:
             quality_loss_dict = self.quality_loss(predictions, targets)
             quality_loss = quality_loss_dict['total_loss']
             losses['quality'] = quality_loss
-            total_loss += self.task_weights['quality'] * quality_loss
+            weighted_losses.append(self.task_weights['quality'] * quality_loss)
         
         # Classification loss (se disponível)
         if 'classification' in predictions and 'classification' in targets:
@@ -387,7 +455,7 @@ class MultiTaskQualityLoss(nn.Module):
                 targets['classification']
             )
             losses['classification'] = class_loss
-            total_loss += self.task_weights['classification'] * class_loss
+            weighted_losses.append(self.task_weights['classification'] * class_loss)
         
         # Segmentation loss (se disponível)
         if 'segmentation' in predictions and 'segmentation' in targets:
@@ -396,9 +464,9 @@ class MultiTaskQualityLoss(nn.Module):
                 targets['segmentation']
             )
             losses['segmentation'] = seg_loss
-            total_loss += self.task_weights['segmentation'] * seg_loss
+            weighted_losses.append(self.task_weights['segmentation'] * seg_loss)
         
-        losses['total'] = total_loss
+        losses['total'] = sum(weighted_losses) if weighted_losses else self.quality_loss.zero.clone()
         return losses
 
 
@@ -16,12 +16,16 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import DataLoader, Dataset, random_split
-from torch.utils.tensorboard import SummaryWriter
-import torchmetrics
 from tqdm import tqdm
 import yaml
 
 # Optional imports for experiment tracking
+try:
+    from torch.utils.tensorboard import SummaryWriter
+    TENSORBOARD_AVAILABLE = True
+except ImportError:
+    TENSORBOARD_AVAILABLE = False
+
 try:
     import mlflow
     import mlflow.pytorch
@@ -36,9 +40,10 @@ except ImportError:
     WANDB_AVAILABLE = False
 
 from ..models.quality_cnn import create_snpqim_model, SnpqimQualityResNet, SnpqimEnsembleModel
-from ..data.dataset import SnpqimImageDataset, get_data_loaders
-from .losses import SnpqimQualityLoss, DimensionAwareLoss
+from ..data.dataset import SnpqimImageDataset, get_data_loaders, targets_to_dict
+from .losses import SnpqimQualityLoss, DimensionAwareLoss, total_loss
 from .metrics import SnpqimQualityMetrics
+from .step_logging import AsyncMetricsLogger, StepStatsAccumulator
 
 
 @dataclass
@@ -66,6 +71,9 @@ class TrainingConfig:
     test_split: float = 0.05
     num_workers: int = 4
     pin_memory: bool = True
+    image_size: int = 224
+    shards_dir: Optional[str] = None  # padrão: data_dir/shards (ver scripts/compile_shards.py)
+    exam_type: Optional[str] = None  # só linhas desse tipo de exame (None: todas)
     
     # Regularization
     dropout_rate: float = 0.3
@@ -74,7 +82,7 @@ class TrainingConfig:
     
     # Experiment Tracking
     experiment_name: str = "snpqim_quality_training"
-    experiment_tracker: str = "tensorboard"  # tensorboard, mlflow, wandb
+    experiment_tracker: str = "tensorboard"  # tensorboard, mlflow, wandb, none
     log_interval: int = 10
     save_interval: int = 5
     
@@ -173,7 +181,7 @@ class SnpqimTrainer:
             )
             self.experiment_tracker = "wandb"
             
-        elif self.config.experiment_tracker == "tensorboard":
+        elif self.config.experiment_tracker == "tensorboard" and TENSORBOARD_AVAILABLE:
             log_dir = Path(self.config.output_dir) / "tensorboard" / datetime.now().strftime("%Y%m%d_%H%M%S")
             self.writer = SummaryWriter(log_dir)
             self.experiment_tracker = "tensorboard"
@@ -204,7 +212,10 @@ class SnpqimTrainer:
             val_split=self.config.val_split,
             test_split=self.config.test_split,
             num_workers=self.config.num_workers,
-            pin_memory=self.config.pin_memory
+            pin_memory=self.config.pin_memory,
+            image_size=self.config.image_size,
+            shards_dir=self.config.shards_dir,
+            exam_type=self.config.exam_type
         )
         
         self.logger.info(f"Train samples: {len(self.train_loader.dataset)}")
@@ -284,6 +295,7 @@ class SnpqimTrainer:
             self.criterion = nn.MSELoss()
         else:
             raise ValueError(f"Loss type {self.config.loss_type} não suportado")
+        self.criterion.to(self.device)
         
         self.logger.info(f"Loss function: {self.criterion.__class__.__name__}")
         return self.criterion
@@ -302,6 +314,10 @@ class SnpqimTrainer:
         self.prepare_criterion()
         self.prepare_metrics()
         
+        # Logging por step sem sincronizar com o device
+        self.step_stats = StepStatsAccumulator(self.device)
+        self.step_logger = AsyncMetricsLogger(self.log_metrics)
+
         # Mixed precision training
         if self.config.mixed_precision and self.device.type == "cuda":
             self.scaler = torch.cuda.amp.GradScaler()
@@ -310,9 +326,14 @@ class SnpqimTrainer:
             self.scaler = None
     
     def train_epoch(self) -> Dict[str, float]:
-        """Treina uma época"""
+        """
+        Treina uma época
+
+        Loss e learning rate são acumulados no device e materializados só a
+        cada `log_interval` steps, na thread do AsyncMetricsLogger.
+        """
         self.model.train()
-        epoch_metrics = {'loss': 0.0}
+        self.step_stats.reset_epoch()
         
         progress_bar = tqdm(
             self.train_loader, 
@@ -320,20 +341,20 @@ class SnpqimTrainer:
         )
         
         for batch_idx, batch in enumerate(progress_bar):
-            images = batch['image'].to(self.device)
-            targets = batch['targets'].to(self.device)
+            images = batch['image'].to(self.device, non_blocking=True)
+            targets = targets_to_dict(batch['targets'].to(self.device, non_blocking=True))
             
             # Forward pass
             if self.scaler is not None:
                 with torch.cuda.amp.autocast():
                     outputs = self.model(images)
-                    loss = self.criterion(outputs, targets)
+                    loss = total_loss(self.criterion(outputs, targets))
             else:
                 outputs = self.model(images)
-                loss = self.criterion(outputs, targets)
+                loss = total_loss(self.criterion(outputs, targets))
             
             # Backward pass
-            self.optimizer.zero_grad()
+            self.optimizer.zero_grad(set_to_none=True)
             
             if self.scaler is not None:
                 self.scaler.scale(loss).backward()
@@ -352,48 +373,52 @@ class SnpqimTrainer:
                 )
                 self.optimizer.step()
             
-            # Update metrics
-            epoch_metrics['loss'] += loss.item()
-            
-            # Log batch metrics
-            if batch_idx % self.config.log_interval == 0:
-                self.log_metrics({
-                    'batch_loss': loss.item(),
-                    'learning_rate': self.optimizer.param_groups[0]['lr']
-                }, step=self.global_step)
-            
+            # Update metrics (sem .item(): nada de sincronização por step)
+            self.step_stats.update(loss, self.optimizer.param_groups[0]['lr'])
             self.global_step += 1
             
-            # Update progress bar
-            progress_bar.set_postfix({
-                'loss': f"{loss.item():.4f}",
-                'lr': f"{self.optimizer.param_groups[0]['lr']:.2e}"
-            })
-        
-        # Average metrics
-        epoch_metrics['loss'] /= len(self.train_loader)
-        
-        return epoch_metrics
+            # Log batch metrics (janela de log_interval steps)
+            if self.step_stats.window_steps >= self.config.log_interval:
+                self.step_logger.log_window(self.step_stats.snapshot(), step=self.global_step)
+                
+                # Progress bar com a última janela já gravada
+                latest = self.step_logger.latest
+                if latest:
+                    progress_bar.set_postfix({
+                        'loss': f"{latest['batch_loss']:.4f}",
+                        'lr': f"{latest['learning_rate']:.2e}"
+                    }, refresh=False)
+        
+        # Restante da última janela
+        self.step_logger.log_window(self.step_stats.snapshot(), step=self.global_step)
+        
+        # Average metrics (uma sincronização por época)
+        return {'loss': self.step_stats.epoch_mean()}
     
     def validate_epoch(self) -> Dict[str, float]:
         """Valida uma época"""
         self.model.eval()
         val_metrics = {}
+        loss_sum = torch.zeros((), device=self.device)
+        num_batches = 0
         
         with torch.no_grad():
             for batch in tqdm(self.val_loader, desc="Validation"):
                 images = batch['image'].to(self.device)
-                targets = batch['targets'].to(self.device)
+                targets = targets_to_dict(batch['targets'].to(self.device))
                 
                 outputs = self.model(images)
-                loss = self.criterion(outputs, targets)
+                loss_sum += total_loss(self.criterion(outputs, targets)).detach()
+                num_batches += 1
                 
                 # Update metrics
                 self.metrics.update(outputs, targets)
         
         # Compute final metrics
         val_metrics = self.metrics.compute()
-        val_metrics['val_loss'] = loss.item()  # Simplified for example
+        val_metrics['val_loss'] = loss_sum.item() / max(num_batches, 1)
+        # Score usado para best model / early stopping / plateau
+        val_metrics['val_score'] = val_metrics.get('fadex_overall_score', 0.0)
         
         # Reset metrics for next epoch
         self.metrics.reset()
@@ -500,6 +525,7 @@ class SnpqimTrainer:
         self.logger.info(f"Best validation score: {self.best_val_score:.4f}")
         
         # Final cleanup
+        self.step_logger.close()
         if self.experiment_tracker == "mlflow":
             mlflow.end_run()
         elif self.experiment_tracker == "wandb":
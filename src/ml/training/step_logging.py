@@ -0,0 +1,189 @@
+"""
+SNPQIM Step Logging
+Logging de métricas por step sem sincronizar host e device
+
+`loss.item()` força uma sincronização host-device a cada chamada (em GPU) e,
+mesmo em CPU, segura o loop de treino enquanto o tracker grava. Aqui:
+
+- StepStatsAccumulator soma a loss em tensores no próprio device (sem
+  .item()) e o learning rate no host (já é float Python). A soma é em
+  float64 na CPU e em float32 nos aceleradores (MPS não tem float64)
+- a cada `log_interval` steps, snapshot() empacota a janela em um único
+  tensor, ainda no device
+- AsyncMetricsLogger materializa esse tensor e grava no tracker em uma
+  thread de fundo; o loop de treino só enfileira
+
+Há uma única sincronização por época (epoch_mean).
+"""
+
+import logging
+import math
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Union
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+MetricsSink = Callable[[Dict[str, float], int], None]
+
+
+@dataclass
+class WindowStats:
+    """Estatísticas de uma janela de steps (loss ainda no device)"""
+    loss_stats: torch.Tensor  # [soma, mínimo, máximo]
+    steps: int
+    lr_last: float
+    lr_min: float
+    lr_max: float
+
+    def to_metrics(self) -> Dict[str, float]:
+        """Materializa no host (sincroniza; chamado na thread de logging)"""
+        loss_sum, loss_min, loss_max = self.loss_stats.tolist()
+        metrics = {
+            'batch_loss': loss_sum / self.steps,
+            'batch_loss_min': loss_min,
+            'batch_loss_max': loss_max,
+            'learning_rate': self.lr_last
+        }
+        if self.lr_min != self.lr_max:
+            metrics['learning_rate_min'] = self.lr_min
+            metrics['learning_rate_max'] = self.lr_max
+        return metrics
+
+
+class StepStatsAccumulator:
+    """
+    Acumula loss e learning rate por step sem chamar .item()
+
+    Args:
+        device: Device onde a loss é calculada
+    """
+
+    def __init__(self, device: Optional[torch.device] = None):
+        self.device = device or torch.device('cpu')
+        self.dtype = torch.float64 if self.device.type == 'cpu' else torch.float32
+        self.reset_epoch()
+
+    def reset_epoch(self):
+        """Zera os acumuladores da época e da janela"""
+        self._epoch_sum = torch.zeros((), dtype=self.dtype, device=self.device)
+        self.epoch_steps = 0
+        self._reset_window()
+
+    def _reset_window(self):
+        # [soma, mínimo, máximo] em um tensor só: um snapshot = uma cópia
+        self._window = torch.tensor(
+            [0.0, math.inf, -math.inf], dtype=self.dtype, device=self.device
+        )
+        self.window_steps = 0
+        self._lr_last = 0.0
+        self._lr_min = math.inf
+        self._lr_max = -math.inf
+
+    def update(self, loss: torch.Tensor, lr: float):
+        """Registra um step (operações assíncronas no device)"""
+        value = loss.detach().to(self.dtype)
+        self._epoch_sum.add_(value)
+        self._window[0].add_(value)
+        torch.minimum(self._window[1], value, out=self._window[1])
+        torch.maximum(self._window[2], value, out=self._window[2])
+        self.epoch_steps += 1
+        self.window_steps += 1
+
+        self._lr_last = lr
+        self._lr_min = min(self._lr_min, lr)
+        self._lr_max = max(self._lr_max, lr)
+
+    def snapshot(self) -> Optional[WindowStats]:
+        """Fecha a janela atual (None se vazia); não sincroniza"""
+        if self.window_steps == 0:
+            return None
+        stats = WindowStats(
+            loss_stats=self._window,
+            steps=self.window_steps,
+            lr_last=self._lr_last,
+            lr_min=self._lr_min,
+            lr_max=self._lr_max
+        )
+        self._reset_window()
+        return stats
+
+    def epoch_mean(self) -> float:
+        """Loss média da época (única sincronização por época)"""
+        if self.epoch_steps == 0:
+            return 0.0
+        return self._epoch_sum.item() / self.epoch_steps
+
+
+class AsyncMetricsLogger:
+    """
+    Grava métricas no tracker em uma thread de fundo
+
+    Args:
+        sink: Função que grava (metrics, step), ex: SnpqimTrainer.log_metrics
+        max_queue: Itens pendentes antes de descartar (o treino nunca bloqueia)
+    """
+
+    def __init__(self, sink: MetricsSink, max_queue: int = 1024):
+        self.sink = sink
+        self.latest: Dict[str, float] = {}  # últimas métricas gravadas
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='snpqim-step-logger', daemon=True)
+        self._thread.start()
+
+    def log_window(self, stats: Optional[WindowStats], step: int):
+        """Enfileira uma janela de StepStatsAccumulator.snapshot()"""
+        if stats is not None:
+            self._put((stats, step))
+
+    def log(self, metrics: Dict[str, Union[float, torch.Tensor]], step: int):
+        """Enfileira métricas avulsas (tensores são materializados na thread)"""
+        self._put((dict(metrics), step))
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None):
+        """Bloqueia até tudo que foi enfileirado ser gravado"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        """Grava o que estiver pendente e encerra a thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+
+            payload, step = item
+            try:
+                if isinstance(payload, WindowStats):
+                    metrics = payload.to_metrics()
+                else:
+                    metrics = {
+                        k: v.item() if isinstance(v, torch.Tensor) else float(v)
+                        for k, v in payload.items()
+                    }
+                self.sink(metrics, step)
+                self.latest = metrics
+            except Exception:
+                logger.exception("Falha ao gravar métricas do step %s", step)
@@ -0,0 +1,111 @@
+"""
+Testes para o micro-batching da engine rápida (backend.batching)
+"""
+
+import asyncio
+import io
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+import torch
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backend.batching import BatchingConfig, MicroBatcher
+from ml.models.quality_cnn import create_snpqim_model, save_scorer
+from ml.scoring.fast_engine import FastQualityScorer
+
+TINY_CONFIG = {'type': 'fast', 'params': {'width': 4}}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    torch.manual_seed(0)
+    path = str(tmp_path / 'fast.pt')
+    save_scorer(path, create_snpqim_model(TINY_CONFIG), TINY_CONFIG, image_size=32,
+                metadata={'exam_types': ['fundoscopy', 'oct']})
+    return FastQualityScorer(path)
+
+
+def rgb_image(seed=0):
+    return np.random.default_rng(seed).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+
+
+def run_batcher(engine, config, requests):
+    """Submete (imagem, exam_type) concorrentemente; devolve resultados e o batcher"""
+    async def main():
+        batcher = MicroBatcher(engine, config)
+        batcher.start()
+        try:
+            results = await asyncio.gather(
+                *(batcher.submit(image, exam_type, {'i': i}) for i, (image, exam_type) in enumerate(requests)),
+                return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+        return results, batcher
+
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_share_forward(engine):
+    images = [rgb_image(i) for i in range(4)]
+    exam_types = ['fundoscopy', 'oct', 'fundoscopy', 'oct']
+    scores, batcher = run_batcher(engine, BatchingConfig(max_batch_size=8, max_wait_ms=200),
+                                  list(zip(images, exam_types)))
+
+    snapshot = batcher.metrics.snapshot()
+    assert snapshot['batches'] == 1 and snapshot['batch_sizes'] == {'4': 1}
+    assert snapshot['flush_reasons'] == {'full': 0, 'timeout': 1}
+    assert snapshot['queue_delay']['count'] == 4
+
+    # Mesmo resultado que pontuar cada imagem sozinha, com o tipo de exame de cada requisição
+    for i, (score, image, exam_type) in enumerate(zip(scores, images, exam_types)):
+        expected = engine.score_image(image, exam_type)
+        assert score.global_score == pytest.approx(expected.global_score, abs=1e-3)
+        assert score.clinical_adequacy == expected.clinical_adequacy
+        assert score.metadata['i'] == i and score.metadata['engine'] == 'fast'
+
+
+def test_batches_split_at_max_size(engine):
+    requests = [(rgb_image(i), 'fundoscopy') for i in range(5)]
+    scores, batcher = run_batcher(engine, BatchingConfig(max_batch_size=2, max_wait_ms=50), requests)
+
+    assert all(score.global_score is not None for score in scores)
+    snapshot = batcher.metrics.snapshot()
+    assert snapshot['batch_sizes'] == {'1': 1, '2': 2}
+    assert snapshot['flush_reasons'] == {'full': 2, 'timeout': 1}
+    assert snapshot['images'] == 5
+
+
+def test_bad_image_fails_only_its_request(engine):
+    requests = [(rgb_image(0), 'fundoscopy'), (np.zeros((0, 0, 3), np.uint8), 'fundoscopy'),
+                (rgb_image(1), 'fundoscopy')]
+    results, batcher = run_batcher(engine, BatchingConfig(max_batch_size=8, max_wait_ms=100), requests)
+
+    assert isinstance(results[1], Exception)
+    assert results[0].global_score is not None and results[2].global_score is not None
+    assert batcher.metrics.snapshot()['errors'] == 1
+
+
+def test_backend_exposes_batching_metrics(engine, monkeypatch):
+    from fastapi.testclient import TestClient
+    from backend import main
+
+    monkeypatch.setenv(main.FAST_MODEL_ENV_VAR, engine.model_path)
+    monkeypatch.setenv('WINGSAI_FAST_MAX_BATCH', '4')
+    monkeypatch.setenv('WINGSAI_FAST_MAX_WAIT_MS', '1')
+    png = cv2.imencode('.png', rgb_image())[1].tobytes()
+
+    with TestClient(main.app) as client:
+        response = client.post('/api/v1/analyze', data={'engine': 'fast'},
+                               files={'file': ('x.png', io.BytesIO(png), 'image/png')})
+        assert response.status_code == 200
+        batching = client.get('/api/v1/metrics').json()['batching']
+        assert batching['max_batch_size'] == 4 and batching['max_wait_ms'] == 1.0
+        assert batching['images'] == 1
+        assert client.get('/api/v1/engines').json()['engines']['fast']['batching']['max_batch_size'] == 4
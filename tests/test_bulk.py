@@ -0,0 +1,120 @@
+"""
+Testes para o scoring em massa (dataset Parquet retomável)
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.scoring.bulk import (
+    BulkScorer,
+    PartWriter,
+    clear_parts,
+    compact_parts,
+    error_record,
+    iter_inputs,
+    load_completed_paths
+)
+from ml.scoring.recommendation_catalog import RecommendationCode
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    """Diretório com 5 imagens sintéticas e um arquivo corrompido"""
+    images = tmp_path / "images"
+    images.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(5):
+        image = np.clip(0.5 + 0.1 * rng.standard_normal((96, 96, 3)), 0, 1)
+        cv2.imwrite(str(images / f"img_{i}.png"), (image * 255).astype(np.uint8))
+    (images / "corrupt.png").write_bytes(b"not an image")
+    return images
+
+
+def test_iter_inputs_manifest(tmp_path, image_dir):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("path,exam_type\nimages/img_0.png,oct\nimages/img_1.png,\n")
+
+    items = list(iter_inputs(str(manifest), exam_type='fundoscopy'))
+
+    assert items == [
+        (str(tmp_path / "images/img_0.png"), 'oct'),
+        (str(tmp_path / "images/img_1.png"), 'fundoscopy')
+    ]
+
+
+def test_iter_inputs_directory_and_glob(image_dir):
+    assert len(list(iter_inputs(str(image_dir)))) == 6
+    assert len(list(iter_inputs(str(image_dir / "img_*.png")))) == 5
+
+
+def test_bulk_run_and_resume(tmp_path, image_dir):
+    output = tmp_path / "out"
+    scorer = BulkScorer(str(output), workers=1, row_group_size=2, progress_interval=1e9)
+
+    stats = scorer.run(iter_inputs(str(image_dir)))
+
+    assert stats['scored'] == 5
+    assert stats['errors'] == 1
+    assert len(list(output.glob("part-*.parquet"))) == 3
+
+    table = pq.read_table(str(output))
+    assert table.num_rows == 6
+    ok = table.filter(table.column('status').to_numpy(zero_copy_only=False) == 'ok')
+    assert all(0 <= s <= 100 for s in ok.column('global_score').to_pylist())
+    # Recomendações gravadas como códigos do catálogo, não como texto
+    keys = {code.key for code in RecommendationCode}
+    assert all(set(codes) <= keys for codes in ok.column('recommendation_codes').to_pylist())
+
+    # Retomada: nada novo para pontuar
+    stats = BulkScorer(str(output), workers=1, progress_interval=1e9).run(iter_inputs(str(image_dir)))
+    assert stats['skipped'] == 6
+    assert stats['scored'] == 0
+
+    compacted = tmp_path / "all.parquet"
+    assert compact_parts(str(output), str(compacted)) == 6
+
+
+def test_no_resume_starts_over(tmp_path, image_dir):
+    output = tmp_path / "out"
+    BulkScorer(str(output), workers=1, progress_interval=1e9).run(iter_inputs(str(image_dir)))
+    (output / "notes.txt").write_text("fora do dataset")
+
+    stats = BulkScorer(str(output), workers=1, resume=False, progress_interval=1e9).run(
+        iter_inputs(str(image_dir))
+    )
+
+    assert stats['skipped'] == 0
+    assert stats['scored'] + stats['errors'] == 6
+    # Partes antigas apagadas: cada imagem aparece uma vez, numeração recomeça
+    assert [p.name for p in output.glob("part-*")] == ["part-000000.parquet"]
+    assert compact_parts(str(output), str(tmp_path / "all.parquet")) == 6
+    assert (output / "notes.txt").exists()
+    assert clear_parts(str(tmp_path / "missing")) == 0
+
+
+def test_invalid_fields_fail_before_scoring(tmp_path):
+    # Erro de digitação não vira uma linha de erro (e "concluída") por imagem
+    with pytest.raises(ValueError):
+        BulkScorer(str(tmp_path / "out"), workers=1, fields=['dimension_scores.sharpnes'])
+    assert not (tmp_path / "out").exists()
+
+
+def test_uncommitted_parts_are_discarded(tmp_path):
+    writer = PartWriter(str(tmp_path), row_group_size=10)
+    writer.add(error_record('a.png', 'oct', 'erro'))
+    writer.flush()
+
+    # Parte interrompida antes do rename
+    (tmp_path / "part-000001.tmp").write_bytes(b"parcial")
+
+    assert load_completed_paths(str(tmp_path)) == {'a.png'}
+    assert not (tmp_path / "part-000001.tmp").exists()
@@ -0,0 +1,133 @@
+"""
+Testes para o dataset de treino e o cache em shards (ml.data)
+"""
+
+import csv
+import os
+import pickle
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+import torch
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.data.dataset import (
+    TARGET_COLUMNS,
+    SnpqimImageDataset,
+    get_data_loaders,
+    targets_to_dict
+)
+from ml.data.shards import ShardedDataset, compile_shards, shards_available
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    with open(tmp_path / 'labels.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['path', 'status', *TARGET_COLUMNS])
+        for i in range(10):
+            image = rng.integers(0, 255, (48, 64, 3), dtype=np.uint8)
+            cv2.imwrite(str(tmp_path / f'img_{i}.png'), image)
+            writer.writerow([f'img_{i}.png', 'ok', *range(i, i + len(TARGET_COLUMNS))])
+        # Arquivo corrompido e linha com erro de scoring
+        (tmp_path / 'broken.png').write_bytes(b'not an image')
+        writer.writerow(['broken.png', 'ok', *range(len(TARGET_COLUMNS))])
+        writer.writerow(['img_0.png', 'error', *([''] * len(TARGET_COLUMNS))])
+    return str(tmp_path)
+
+
+def test_shards_match_decoded_dataset(data_dir):
+    index = compile_shards(data_dir, image_size=32, shard_size=4, workers=2)
+    assert index['samples'] == 10
+    assert [shard['count'] for shard in index['shards']] == [4, 4, 2]
+    assert [os.path.basename(e['path']) for e in index['errors']] == ['broken.png']
+
+    decoded = SnpqimImageDataset.from_directory(data_dir, image_size=32)
+    sharded = ShardedDataset(os.path.join(data_dir, 'shards'))
+    assert len(sharded) == 10
+    # broken.png também fica de fora do dataset decodificado
+    assert decoded.paths == sharded.paths
+
+    for i in (0, 5, 9, -1):
+        expected = decoded[i]
+        item = sharded[i]
+        assert item['image'].shape == (3, 32, 32) and item['image'].dtype == torch.float32
+        assert torch.equal(item['image'], expected['image'])
+        assert torch.equal(item['targets'], expected['targets'])
+
+    # O pickle (workers do DataLoader) não leva os arrays
+    assert sharded._arrays is not None
+    assert pickle.loads(pickle.dumps(sharded))._arrays is None
+    with pytest.raises(IndexError):
+        sharded[10]
+
+
+def test_data_loaders_prefer_fresh_shards(data_dir):
+    shards_dir = os.path.join(data_dir, 'shards')
+    assert not shards_available(shards_dir)
+
+    compile_shards(data_dir, image_size=32, shard_size=4)
+    assert shards_available(shards_dir, 32, data_dir)
+    assert not shards_available(shards_dir, 64, data_dir)
+
+    train, val, test = get_data_loaders(
+        data_dir, batch_size=4, train_split=0.6, val_split=0.2, test_split=0.2,
+        num_workers=0, image_size=32
+    )
+    assert isinstance(train.dataset.dataset, ShardedDataset)
+    assert len(train.dataset) + len(val.dataset) + len(test.dataset) == 10
+
+    batch = next(iter(train))
+    targets = targets_to_dict(batch['targets'])
+    assert targets['global_score'].shape == (4, 1)
+    assert targets['dimension_scores'].shape == (4, 6)
+    assert targets['confidence'].shape == (4, 1)
+
+    # Índice de rótulos alterado: shards ficam desatualizados
+    labels = os.path.join(data_dir, 'labels.csv')
+    os.utime(labels, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert not shards_available(shards_dir, 32, data_dir)
+    sharded_splits = [loader.dataset.indices for loader in (train, val, test)]
+    train, val, test = get_data_loaders(
+        data_dir, batch_size=4, train_split=0.6, val_split=0.2, test_split=0.2,
+        num_workers=0, image_size=32
+    )
+    assert isinstance(train.dataset.dataset, SnpqimImageDataset)
+    # Mesmas amostras, mesmos splits (broken.png não desloca os índices)
+    assert [loader.dataset.indices for loader in (train, val, test)] == sharded_splits
+    for batch in train:
+        assert batch['image'].shape[1:] == (3, 32, 32)
+
+
+def test_exam_type_filters_labels_and_shards(tmp_path):
+    rng = np.random.default_rng(1)
+    with open(tmp_path / 'labels.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['path', 'exam_type', 'status', *TARGET_COLUMNS])
+        for i, exam_type in enumerate(['fundoscopy', 'oct', 'fundoscopy', 'oct', '']):
+            cv2.imwrite(str(tmp_path / f'img_{i}.png'), rng.integers(0, 255, (16, 16, 3), dtype=np.uint8))
+            writer.writerow([f'img_{i}.png', exam_type, 'ok', *([i] * len(TARGET_COLUMNS))])
+    data_dir = str(tmp_path)
+    shards_dir = os.path.join(data_dir, 'shards')
+
+    # Sem exam_type na linha: mantida (coluna opcional)
+    decoded = SnpqimImageDataset.from_directory(data_dir, image_size=16, exam_type='fundoscopy')
+    assert [os.path.basename(p) for p in decoded.paths] == ['img_0.png', 'img_2.png', 'img_4.png']
+
+    index = compile_shards(data_dir, image_size=16, exam_type='fundoscopy')
+    assert index['samples'] == 3 and index['exam_type'] == 'fundoscopy'
+    assert shards_available(shards_dir, 16, data_dir, 'fundoscopy')
+    assert not shards_available(shards_dir, 16, data_dir, 'oct')
+    assert not shards_available(shards_dir, 16, data_dir)
+
+    train, val, test = get_data_loaders(
+        data_dir, batch_size=2, num_workers=0, image_size=16, exam_type='oct'
+    )
+    assert isinstance(train.dataset.dataset, SnpqimImageDataset)
+    assert len(train.dataset) + len(val.dataset) + len(test.dataset) == 3
@@ -0,0 +1,89 @@
+"""
+Testes para a exportação dos scorers (ml.models.export) e o runtime dos
+artefatos (ml.scoring.exported_runtime)
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+import torch
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.models.export import ONNX_AVAILABLE, calibration_images, compare_with_eager, export_scorer
+from ml.models.quality_cnn import create_snpqim_model, save_scorer
+from ml.scoring.exported_runtime import ExportedScorer, is_exported
+from ml.scoring.fast_engine import FastQualityScorer
+from ml.scoring.wingsai_core import ANALYZER_VERSION
+from ml.training.metrics import METRIC_COLUMNS
+
+TINY_CONFIG = {'type': 'fast', 'params': {'width': 4}}
+IMAGE_SIZE = 32
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    torch.manual_seed(0)
+    path = str(tmp_path / 'fast.pt')
+    save_scorer(path, create_snpqim_model(TINY_CONFIG), TINY_CONFIG, image_size=IMAGE_SIZE,
+                metadata={'exam_types': ['fundoscopy'], 'analyzer_version': ANALYZER_VERSION})
+    return path
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    directory = tmp_path / 'images'
+    directory.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(6):
+        cv2.imwrite(str(directory / f'{i}.png'), rng.integers(0, 255, (48, 64, 3), dtype=np.uint8))
+    return str(directory)
+
+
+def test_torchscript_fp32_matches_eager(model_path, corpus, tmp_path):
+    output = str(tmp_path / 'fast.ts.pt')
+    info = export_scorer(model_path, output)
+    assert info['metadata']['export']['quantization'] == 'fp32'
+    assert is_exported(output) and not is_exported(model_path)
+
+    runtime = ExportedScorer(output)
+    assert runtime.image_size == IMAGE_SIZE and runtime.metadata['exam_types'] == ['fundoscopy']
+    assert runtime.predict(calibration_images(corpus, IMAGE_SIZE)).shape == (6, len(METRIC_COLUMNS))
+
+    eager = FastQualityScorer(model_path)
+    exported = FastQualityScorer(output)
+    assert exported.info()['runtime'] == 'torchscript'
+    assert exported.info()['parameters'] == eager.info()['parameters']
+
+    images = [np.random.default_rng(i).integers(0, 255, (40, 50, 3), dtype=np.uint8) for i in range(3)]
+    assert np.allclose(exported.predict(images), eager.predict(images), atol=1e-3)
+
+
+@pytest.mark.parametrize('quantization', ['dynamic', 'static'])
+def test_quantized_export(model_path, corpus, tmp_path, quantization):
+    output = str(tmp_path / f'fast_{quantization}.pt')
+    calibration = calibration_images(corpus, IMAGE_SIZE, samples=4)
+    info = export_scorer(model_path, output, quantization=quantization, calibration=calibration)
+    assert info['metadata']['export']['quantization'] == quantization
+    assert info['metadata']['export']['calibration_samples'] == (4 if quantization == 'static' else 0)
+
+    images = [np.random.default_rng(i).integers(0, 255, (40, 50, 3), dtype=np.uint8) for i in range(4)]
+    report = compare_with_eager(model_path, output, images, repeat=1)
+    assert report['export']['quantization'] == quantization
+    assert report['max_abs_diff'] < 5.0
+    assert report['agreement']['samples'] == 4
+    assert set(report['latency']) == {'eager_fp32', 'exported'}
+
+
+def test_invalid_export_options(model_path, tmp_path):
+    with pytest.raises(ValueError):
+        export_scorer(model_path, str(tmp_path / 'x.pt'), quantization='static')
+    with pytest.raises(ValueError):
+        export_scorer(model_path, str(tmp_path / 'x.pt'), export_format='tflite')
+    if not ONNX_AVAILABLE:
+        with pytest.raises(ImportError):
+            export_scorer(model_path, str(tmp_path / 'x.onnx'), export_format='onnx')
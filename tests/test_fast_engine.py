@@ -0,0 +1,229 @@
+"""
+Testes para o modelo rápido destilado (ml.models.quality_cnn, ml.scoring.fast_engine,
+ml.training.distillation) e a escolha de engine no backend
+"""
+
+import csv
+import io
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+import torch
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.data.dataset import TARGET_COLUMNS
+from ml.models.quality_cnn import (
+    SnpqimEnsembleModel,
+    SnpqimFastScorer,
+    create_snpqim_model,
+    load_scorer,
+    save_scorer,
+    stack_outputs
+)
+from ml.scoring.fast_engine import AgreementTracker, FastQualityScorer
+from ml.scoring.wingsai_core import ANALYZER_VERSION, DIMENSION_NAMES, WingsAIQualityAnalyzer
+
+TINY_CONFIG = {'type': 'fast', 'params': {'width': 4}}
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    torch.manual_seed(0)
+    path = tmp_path / 'fast.pt'
+    save_scorer(str(path), create_snpqim_model(TINY_CONFIG), TINY_CONFIG, image_size=32,
+                metadata={'analyzer_version': ANALYZER_VERSION, 'exam_types': ['fundoscopy'],
+                          'agreement': {'global_mae': 1.0, 'samples': 10}})
+    return str(path)
+
+
+def rgb_image(seed=0, shape=(60, 80, 3)):
+    return np.random.default_rng(seed).integers(0, 255, shape, dtype=np.uint8)
+
+
+class TestModels:
+
+    def test_output_format(self):
+        outputs = create_snpqim_model(TINY_CONFIG)(torch.randn(2, 3, 32, 32))
+        assert outputs['global_score'].shape == (2, 1)
+        assert outputs['dimension_scores'].shape == (2, len(DIMENSION_NAMES))
+        assert outputs['confidence'].shape == (2, 1)
+        stacked = stack_outputs(outputs)
+        assert stacked.shape == (2, len(TARGET_COLUMNS))
+        assert ((stacked >= 0) & (stacked <= 100)).all()
+
+    def test_ensemble_and_unknown_type(self):
+        ensemble = create_snpqim_model({'type': 'ensemble', 'params': {'members': [TINY_CONFIG, TINY_CONFIG]}})
+        assert isinstance(ensemble, SnpqimEnsembleModel) and len(ensemble.models) == 2
+        ensemble.eval()
+        images = torch.randn(1, 3, 32, 32)
+        expected = (stack_outputs(ensemble.models[0](images)) + stack_outputs(ensemble.models[1](images))) / 2
+        assert torch.allclose(stack_outputs(ensemble(images)), expected)
+
+        with pytest.raises(ValueError):
+            create_snpqim_model({'type': 'transformer'})
+
+    def test_scorer_roundtrip(self, model_path):
+        model, info = load_scorer(model_path)
+        assert isinstance(model, SnpqimFastScorer) and not model.training
+        assert info['image_size'] == 32 and info['metadata']['exam_types'] == ['fundoscopy']
+
+        reference = create_snpqim_model(TINY_CONFIG)
+        reference.load_state_dict(model.state_dict())
+        reference.eval()
+        images = torch.randn(2, 3, 32, 32)
+        assert torch.equal(stack_outputs(model(images)), stack_outputs(reference(images)))
+
+
+class TestFastQualityScorer:
+
+    def test_scores_follow_reference_rules(self, model_path):
+        engine = FastQualityScorer(model_path, max_batch_size=2)
+        images = [rgb_image(i) for i in range(3)]
+        scores = engine.score_images(images, 'fundoscopy', [{'filename': f'{i}.png'} for i in range(3)])
+
+        predictions = engine.predict(images)
+        rules = WingsAIQualityAnalyzer()
+        for score, row in zip(scores, predictions):
+            assert list(score.dimension_scores) == list(DIMENSION_NAMES)
+            assert score.confidence == pytest.approx(row[-1])
+            expected = rules.score_from_dimensions(score.dimension_scores, score.confidence)
+            assert score.global_score == pytest.approx(expected.global_score)
+            assert score.clinical_adequacy == expected.clinical_adequacy
+            assert score.recommendation_codes == expected.recommendation_codes
+            assert score.metadata['engine'] == 'fast'
+
+        # Batches divididos em max_batch_size dão o mesmo resultado que um a um
+        single = np.concatenate([engine.predict([image]) for image in images])
+        assert np.allclose(predictions, single, atol=1e-4)
+        assert engine.supports('fundoscopy') and not engine.supports('oct')
+
+    def test_agreement_tracker(self, model_path):
+        engine = FastQualityScorer(model_path)
+        tracker = AgreementTracker()
+        for i in range(4):
+            score = engine.score_image(rgb_image(i))
+            tracker.update(score, score)
+        summary = tracker.summary()
+        assert summary['samples'] == 4
+        assert summary['global_mae'] == pytest.approx(0.0, abs=1e-4)
+        assert summary['clinical_agreement_rate'] == 1.0
+
+
+def test_distillation_end_to_end(tmp_path, monkeypatch):
+    from ml.training.distillation import distill_fast_scorer
+
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    rng = np.random.default_rng(0)
+    with open(data_dir / 'labels.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['path', 'status', *TARGET_COLUMNS])
+        for i in range(12):
+            cv2.imwrite(str(data_dir / f'img_{i}.png'), rng.integers(0, 255, (40, 40, 3), dtype=np.uint8))
+            writer.writerow([f'img_{i}.png', 'ok', *rng.uniform(20, 90, len(TARGET_COLUMNS)).round(2)])
+
+    monkeypatch.chdir(tmp_path)  # log do trainer
+    output = tmp_path / 'models' / 'fast.pt'
+    metadata = distill_fast_scorer(
+        None, str(data_dir), str(output), image_size=32, num_epochs=2, batch_size=4,
+        model_config=TINY_CONFIG,
+        training_overrides={'train_split': 0.5, 'val_split': 0.25, 'test_split': 0.25}
+    )
+    assert metadata['analyzer_version'] == ANALYZER_VERSION
+    assert metadata['agreement']['samples'] == 3
+    assert 'global_mae' in metadata['agreement']
+
+    engine = FastQualityScorer(str(output))
+    assert engine.info()['offline_agreement'] == metadata['agreement']
+
+
+def wait_for_agreement(client, samples, timeout=10.0):
+    """Espera as comparações de concordância em segundo plano chegarem a `samples`"""
+    deadline = time.monotonic() + timeout
+    while True:
+        online = client.get('/api/v1/engines').json()['engines']['fast']['online_agreement']
+        if online['samples'] >= samples or time.monotonic() > deadline:
+            return online
+        time.sleep(0.02)
+
+
+def test_backend_engine_selection(model_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from backend import main
+
+    monkeypatch.setenv(main.FAST_MODEL_ENV_VAR, model_path)
+    monkeypatch.setenv(main.FAST_AGREEMENT_RATE_ENV_VAR, '1.0')
+    png = cv2.imencode('.png', rgb_image(shape=(64, 64, 3)))[1].tobytes()
+
+    def post(url, **data):
+        return client.post(url, files={'file': ('x.png', io.BytesIO(png), 'image/png')}, data=data)
+
+    with TestClient(main.app) as client:
+        fast = post('/api/v1/analyze', engine='fast')
+        assert fast.status_code == 200
+        assert fast.json()['result']['metadata']['engine'] == 'fast'
+        assert set(fast.json()['result']['dimension_scores']) == set(DIMENSION_NAMES)
+
+        assert post('/api/v1/analyze', engine='gpu').status_code == 400
+        assert post('/api/v1/analyze', engine='fast', exam_type='oct').status_code == 400
+
+        # Referência completa alimenta a concordância online
+        assert post('/api/v1/analyze').status_code == 200
+        assert wait_for_agreement(client, 1)['samples'] == 1
+        engines = client.get('/api/v1/engines').json()['engines']
+        assert engines['fast']['available']
+        # O forward da concordância passa pelo micro-batcher (fora do event loop)
+        assert main.app.state.batcher.metrics.snapshot()['images'] == 2
+        assert engines['fast']['offline_agreement']['global_mae'] == 1.0
+
+        batch = client.post('/api/v1/analyze/batch', data={'engine': 'fast'}, files=[
+            ('files', (f'{i}.png', io.BytesIO(png), 'image/png')) for i in range(3)
+        ])
+        assert batch.json()['statistics']['successful'] == 3
+
+        # Sem fields, recommendation_format=codes inclui os códigos no resumo do batch
+        codes = client.post('/api/v1/analyze/batch', data={'recommendation_format': 'codes'}, files=[
+            ('files', ('0.png', io.BytesIO(png), 'image/png'))
+        ])
+        assert 'recommendation_codes' in codes.json()['results'][0]
+
+    monkeypatch.delenv(main.FAST_MODEL_ENV_VAR)
+    with TestClient(main.app) as client:
+        assert post('/api/v1/analyze', engine='fast').status_code == 503
+
+
+def test_agreement_does_not_delay_reference(model_path, monkeypatch):
+    """A resposta de referência não espera o prazo do micro-batcher da concordância"""
+    from fastapi.testclient import TestClient
+    from backend import main
+
+    monkeypatch.setenv(main.FAST_MODEL_ENV_VAR, model_path)
+    monkeypatch.setenv(main.FAST_AGREEMENT_RATE_ENV_VAR, '1.0')
+    monkeypatch.setenv('WINGSAI_FAST_MAX_BATCH', '8')
+    monkeypatch.setenv('WINGSAI_FAST_MAX_WAIT_MS', '1000')
+    png = cv2.imencode('.png', rgb_image(shape=(64, 64, 3)))[1].tobytes()
+
+    with TestClient(main.app) as client:
+        batch = client.post('/api/v1/analyze/batch', files=[
+            ('files', (f'{i}.png', io.BytesIO(png), 'image/png')) for i in range(3)
+        ])
+        assert batch.json()['statistics']['successful'] == 3
+        # As três comparações ainda esperam o prazo de 1 s do micro-batcher
+        assert main.app.state.agreement.summary()['samples'] == 0
+        assert wait_for_agreement(client, 3)['samples'] == 3
+
+
+def test_agreement_rate_default(model_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from backend import main
+
+    monkeypatch.setenv(main.FAST_MODEL_ENV_VAR, model_path)
+    monkeypatch.delenv(main.FAST_AGREEMENT_RATE_ENV_VAR, raising=False)
+    with TestClient(main.app) as client:
+        assert client.get('/api/v1/engines').json()['engines']['fast']['agreement_rate'] == 0.05
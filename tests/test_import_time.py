@@ -0,0 +1,62 @@
+"""
+Testes de orçamento de import a frio do core WingsAI
+Orçamento documentado em docs/PERFORMANCE.md
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Custo próprio do core (sem numpy e cv2) em relação ao import de numpy + cv2:
+# relativo para não depender da velocidade da máquina
+IMPORT_OVERHEAD_RATIO = 1.0
+
+# Módulos que não podem ser carregados pelo import do core
+HEAVY_MODULES = ['torch', 'skimage', 'scipy']
+
+
+def _cold_import(module: str):
+    """Importa o módulo em um processo novo com -X importtime"""
+    code = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SRC_DIR, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip(), result.stderr
+
+
+@pytest.mark.parametrize("module", ['ml.scoring.wingsai_core', 'ml.scoring.snpqim_core'])
+def test_no_heavy_modules_on_import(module):
+    """torch/skimage/scipy só são importados no primeiro uso"""
+    loaded, _ = _cold_import(module)
+    assert loaded == '', f"Módulos pesados carregados no import: {loaded}"
+
+
+def _cumulative_ms(importtime: str, module: str) -> float:
+    """Tempo cumulativo de um módulo na saída de -X importtime"""
+    # Linha: "import time: <self us> | <cumulative us> | <indentação><módulo>"
+    match = re.search(rf'\|\s*(\d+)\s*\|\s*{re.escape(module)}\s*$', importtime, re.M)
+    assert match, importtime
+    return int(match.group(1)) / 1000
+
+
+def test_import_overhead_over_numpy_cv2():
+    """O core custa no máximo IMPORT_OVERHEAD_RATIO x o import de numpy + cv2"""
+    _, importtime = _cold_import('ml.scoring.wingsai_core')
+
+    baseline_ms = _cumulative_ms(importtime, 'numpy') + _cumulative_ms(importtime, 'cv2')
+    overhead_ms = _cumulative_ms(importtime, 'ml.scoring.wingsai_core') - baseline_ms
+
+    assert overhead_ms < IMPORT_OVERHEAD_RATIO * baseline_ms, (
+        f"Import de wingsai_core custou {overhead_ms:.0f} ms além de numpy + cv2 "
+        f"({baseline_ms:.0f} ms; limite: {IMPORT_OVERHEAD_RATIO}x)"
+    )
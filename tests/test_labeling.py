@@ -0,0 +1,105 @@
+"""
+Testes para a rotulagem incremental do corpus (ml.data.labeling)
+"""
+
+import os
+import shutil
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import ml.data.labeling as labeling
+from ml.data.dataset import TARGET_COLUMNS, load_label_index
+from ml.data.labeling import LabelingPipeline, build_label_index, latest_labels, relative_key
+from ml.scoring.bulk import iter_inputs
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Dataset com 4 imagens sintéticas e um arquivo corrompido em images/"""
+    images = tmp_path / "images"
+    images.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(4):
+        image = np.clip(0.5 + 0.1 * rng.standard_normal((96, 96, 3)), 0, 1)
+        cv2.imwrite(str(images / f"img_{i}.png"), (image * 255).astype(np.uint8))
+    (images / "corrupt.png").write_bytes(b"not an image")
+    return tmp_path
+
+
+def label(data_dir, **kwargs):
+    pipeline = LabelingPipeline(str(data_dir), workers=1, progress_interval=1e9, **kwargs)
+    return pipeline.run(iter_inputs(str(data_dir / "images")))
+
+
+def test_relative_key(tmp_path):
+    assert relative_key(str(tmp_path / "a" / "b.png"), str(tmp_path)) == "a/b.png"
+    outside = os.path.abspath(str(tmp_path / ".." / "x.png"))
+    assert relative_key(outside, str(tmp_path)) == outside
+
+
+def test_labels_feed_training_index(data_dir):
+    stats = label(data_dir)
+    assert (stats['labeled'], stats['errors'], stats['indexed']) == (4, 1, 5)
+
+    rows = {row['path']: row for row in pq.read_table(data_dir / "labels.parquet").to_pylist()}
+    assert set(rows) == {f"images/img_{i}.png" for i in range(4)} | {"images/corrupt.png"}
+    assert rows["images/corrupt.png"]['status'] == 'error'
+    assert len(rows["images/img_0.png"]['content_hash']) == 64
+
+    # Formato lido diretamente pelo dataset de treino (só linhas ok)
+    paths, targets = load_label_index(str(data_dir))
+    assert len(paths) == 4 and all(os.path.exists(p) for p in paths)
+    assert targets.shape == (4, len(TARGET_COLUMNS))
+    assert np.isfinite(targets).all()
+
+
+def test_incremental_runs(data_dir, monkeypatch):
+    label(data_dir)
+    index_mtime = os.stat(data_dir / "labels.parquet").st_mtime_ns
+
+    # Nada mudou: nenhuma leitura, índice intocado
+    stats = label(data_dir)
+    assert (stats['labeled'], stats['reused'], stats['unchanged']) == (0, 0, 5)
+    assert os.stat(data_dir / "labels.parquet").st_mtime_ns == index_mtime
+
+    # Cópia com outro nome reaproveita o rótulo; imagem alterada é re-rotulada
+    images = data_dir / "images"
+    shutil.copy(images / "img_0.png", images / "copy.png")
+    cv2.imwrite(str(images / "img_1.png"), np.full((64, 64, 3), 128, np.uint8))
+    stats = label(data_dir)
+    assert (stats['labeled'], stats['reused'], stats['unchanged']) == (1, 1, 4)
+
+    labels = latest_labels(str(data_dir))
+    assert labels["images/copy.png"]['global_score'] == labels["images/img_0.png"]['global_score']
+    assert labels["images/img_1.png"]['width'] == 64
+
+    # Nova versão do analyzer invalida todos os rótulos
+    monkeypatch.setattr(labeling, 'ANALYZER_VERSION', 'test-next')
+    stats = label(data_dir)
+    assert stats['labeled'] + stats['reused'] == 5 and stats['unchanged'] == 0
+
+    # Arquivo apagado do corpus sai do índice (mesmo sem linhas novas)
+    os.remove(images / "copy.png")
+    stats = label(data_dir)
+    assert (stats['labeled'], stats['removed'], stats['indexed']) == (0, 1, 5)
+    rows = pq.read_table(data_dir / "labels.parquet").column('path').to_pylist()
+    assert "images/copy.png" not in rows
+
+
+def test_sharded_jobs_cover_corpus(data_dir):
+    first = label(data_dir, shard_index=0, num_shards=2, build_index=False)
+    second = label(data_dir, shard_index=1, num_shards=2, build_index=False)
+    assert first['other_shards'] + second['other_shards'] == 5
+    assert first['labeled'] + second['labeled'] == 4
+
+    assert build_label_index(str(data_dir)) == 5
+    with pytest.raises(ValueError):
+        LabelingPipeline(str(data_dir), shard_index=2, num_shards=2)
@@ -0,0 +1,167 @@
+"""
+Testes para as loss functions do treino (ml.training.losses)
+"""
+
+import os
+import sys
+
+import pytest
+import torch
+import torch.nn.functional as F
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.training.losses import (
+    DimensionAwareLoss,
+    MultiTaskQualityLoss,
+    RobustQualityLoss,
+    SnpqimQualityLoss,
+    stack_dimension_scores,
+    total_loss
+)
+from ml.training.metrics import DIMENSION_NAMES
+
+
+def make_outputs(batch_size=8, seed=0, dimensions=DIMENSION_NAMES):
+    generator = torch.Generator().manual_seed(seed)
+
+    def column():
+        return (torch.rand(batch_size, 1, generator=generator, dtype=torch.float64) * 100).requires_grad_()
+
+    return {
+        'global_score': column(),
+        'dimension_scores': {name: column() for name in dimensions},
+        'confidence': column()
+    }
+
+
+def reference_snpqim_dimension_loss(predictions, targets):
+    """Laço por dimensão da implementação anterior"""
+    losses = []
+    for name, pred in predictions['dimension_scores'].items():
+        if name in targets['dimension_scores']:
+            loss = F.smooth_l1_loss(pred / 100.0, targets['dimension_scores'][name] / 100.0)
+            losses.append(loss * 1.5 if name in ('sharpness', 'clinical_adequacy') else loss)
+    return torch.stack(losses).mean()
+
+
+def reference_consistency_loss(predictions):
+    dim_mean = torch.stack(list(predictions['dimension_scores'].values())).mean()
+    return ((torch.abs(predictions['global_score'] - dim_mean) / 100.0) ** 2).mean()
+
+
+class TestStackDimensionScores:
+
+    def test_fixed_order_and_mask(self):
+        scores = {name: torch.full((2, 1), float(i)) for i, name in reversed(list(enumerate(DIMENSION_NAMES)))}
+        stacked, mask = stack_dimension_scores(scores)
+        assert stacked.shape == (2, 6) and mask is None
+        assert stacked[0].tolist() == [0, 1, 2, 3, 4, 5]
+
+        del scores['exposure']
+        stacked, mask = stack_dimension_scores(scores)
+        assert mask.tolist() == [True, False, True, True, True, True]
+
+        tensor = torch.zeros(3, 6)
+        assert stack_dimension_scores(tensor) == (tensor, None)
+
+
+class TestSnpqimQualityLoss:
+
+    @pytest.mark.parametrize('dimensions', [DIMENSION_NAMES, ('sharpness', 'contrast', 'artifacts')])
+    def test_matches_per_dimension_loop(self, dimensions):
+        predictions = make_outputs(seed=1, dimensions=dimensions)
+        targets = make_outputs(seed=2)
+        losses = SnpqimQualityLoss()(predictions, targets)
+
+        expected_dimension = reference_snpqim_dimension_loss(predictions, targets)
+        expected_consistency = reference_consistency_loss(predictions)
+        assert losses['dimension_loss'].item() == pytest.approx(expected_dimension.item(), rel=1e-12)
+        assert losses['consistency_loss'].item() == pytest.approx(expected_consistency.item(), rel=1e-12)
+
+        # Gradientes iguais aos do laço
+        losses['dimension_loss'].backward()
+        grads = [predictions['dimension_scores'][name].grad.clone() for name in dimensions]
+        for name in dimensions:
+            predictions['dimension_scores'][name].grad = None
+        expected_dimension.backward()
+        for grad, name in zip(grads, dimensions):
+            assert torch.allclose(grad, predictions['dimension_scores'][name].grad)
+
+    def test_stacked_input_equals_dict_input(self):
+        predictions = make_outputs(seed=3)
+        targets = make_outputs(seed=4)
+        loss = SnpqimQualityLoss()
+        from_dict = loss(predictions, targets)
+
+        stacked = lambda outputs: {**outputs, 'dimension_scores': stack_dimension_scores(outputs['dimension_scores'])[0]}
+        from_tensor = loss(stacked(predictions), stacked(targets))
+        for key, value in from_dict.items():
+            assert from_tensor[key].item() == pytest.approx(value.item(), rel=1e-12)
+
+    def test_missing_parts_use_zero(self):
+        predictions = {'global_score': torch.full((4, 1), 50.0)}
+        targets = {'global_score': torch.full((4, 1), 60.0)}
+        losses = SnpqimQualityLoss()(predictions, targets)
+        assert losses['dimension_loss'].item() == 0.0
+        assert losses['confidence_loss'].item() == 0.0
+        assert losses['total_loss'].item() == pytest.approx(0.4 * F.smooth_l1_loss(
+            torch.tensor(0.5), torch.tensor(0.6)).item())
+
+
+class TestOtherLosses:
+
+    def test_dimension_aware_matches_weighted_sum(self):
+        predictions = make_outputs(seed=5, dimensions=DIMENSION_NAMES[:4])
+        targets = make_outputs(seed=6)
+        loss = DimensionAwareLoss(exam_type='oct')
+        expected = sum(
+            weight * F.mse_loss(predictions['dimension_scores'][name] / 100.0,
+                                targets['dimension_scores'][name] / 100.0)
+            for name, weight in loss.dimension_weights.items()
+            if name in predictions['dimension_scores']
+        )
+        assert loss(predictions, targets).item() == pytest.approx(expected.item(), rel=1e-12)
+
+    def test_robust_and_multi_task(self):
+        predictions = make_outputs(seed=7)
+        targets = make_outputs(seed=8)
+        robust = RobustQualityLoss(alpha=0.05)
+        huber = lambda p, t: F.huber_loss(p / 100.0, t / 100.0, delta=0.05)
+        expected = 0.6 * huber(predictions['global_score'], targets['global_score']) + 0.4 * torch.stack([
+            huber(predictions['dimension_scores'][n], targets['dimension_scores'][n]) for n in DIMENSION_NAMES
+        ]).mean()
+        assert robust(predictions, targets).item() == pytest.approx(expected.item(), rel=1e-12)
+
+        multi_task = MultiTaskQualityLoss()(predictions, targets)
+        quality = SnpqimQualityLoss()(predictions, targets)['total_loss']
+        assert multi_task['total'].item() == pytest.approx(0.7 * quality.item(), rel=1e-12)
+
+    def test_buffers_follow_device(self):
+        # 'meta' simula um device não-CPU: tensores em devices diferentes falham no forward
+        device = torch.device('meta')
+        outputs = make_outputs()
+        predictions = {
+            'global_score': outputs['global_score'].detach().to(device),
+            'dimension_scores': {n: t.detach().to(device) for n, t in outputs['dimension_scores'].items()},
+            'confidence': outputs['confidence'].detach().to(device)
+        }
+        for loss in (SnpqimQualityLoss(device=device), DimensionAwareLoss(device=device),
+                     RobustQualityLoss(device=device)):
+            assert all(buffer.device == device for buffer in loss.buffers())
+            assert total_loss(loss(predictions, predictions)).device == device
+
+    def test_zero_loss_is_not_shared(self):
+        loss = SnpqimQualityLoss()
+        predictions = {'global_score': torch.full((2, 1), 50.0)}
+        first = loss(predictions, predictions)['confidence_loss']
+        first += 1.0
+        assert loss.zero.item() == 0.0
+        assert loss(predictions, predictions)['confidence_loss'].item() == 0.0
+
+        multi_task = MultiTaskQualityLoss()
+        total = multi_task({}, {})['total']
+        total += 1.0
+        assert multi_task.quality_loss.zero.item() == 0.0
+        assert multi_task({}, {})['total'].item() == 0.0
@@ -0,0 +1,28 @@
+"""
+Testes para as métricas do servidor (rótulos de endpoint no middleware)
+"""
+
+import os
+import sys
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.metrics import ServiceMetrics
+
+
+def test_unmatched_paths_share_one_label(monkeypatch):
+    monkeypatch.delenv(main.FAST_MODEL_ENV_VAR, raising=False)
+    monkeypatch.setattr(main, 'service_metrics', ServiceMetrics())
+
+    with TestClient(main.app) as client:
+        for path in ('/x1', '/x2', '/x3?a=1'):
+            assert client.get(path).status_code == 404
+        assert client.get('/health').status_code == 200
+        endpoints = client.get('/api/v1/metrics').json()['endpoints']
+
+    assert sorted(endpoints) == sorted([main.UNMATCHED_ROUTE_LABEL, '/health'])
+    assert endpoints[main.UNMATCHED_ROUTE_LABEL]['requests'] == 3
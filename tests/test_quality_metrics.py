@@ -0,0 +1,235 @@
+"""
+Testes para as métricas de avaliação do treino (ml.training.metrics)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+import torch
+from scipy.stats import pearsonr, spearmanr
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.training.metrics import (
+    DIMENSION_NAMES,
+    METRIC_COLUMNS,
+    ExponentialRealTimeMetrics,
+    FadexQualityMetrics,
+    RealTimeMetrics,
+    regression_metrics
+)
+
+
+def make_batch(rng: np.random.Generator, batch_size: int):
+    def column(scale=100.0):
+        # Arredonda para criar empates (Spearman com ranks médios)
+        return torch.from_numpy(np.round(rng.random((batch_size, 1)) * scale))
+
+    predictions = {
+        'global_score': column(),
+        'dimension_scores': {name: column() for name in DIMENSION_NAMES},
+        'confidence': column()
+    }
+    targets = {
+        'global_score': predictions['global_score'] + torch.from_numpy(rng.normal(0, 8, (batch_size, 1))),
+        'dimension_scores': {
+            name: value + torch.from_numpy(rng.normal(0, 5, (batch_size, 1)))
+            for name, value in predictions['dimension_scores'].items()
+        },
+        'confidence': predictions['confidence'] + torch.from_numpy(rng.normal(0, 5, (batch_size, 1)))
+    }
+    return predictions, targets
+
+
+def reference_metrics(pred: np.ndarray, target: np.ndarray):
+    """Implementação anterior (sklearn/scipy por coluna)"""
+    return {
+        'mae': mean_absolute_error(target, pred),
+        'mse': mean_squared_error(target, pred),
+        'rmse': np.sqrt(mean_squared_error(target, pred)),
+        'r2': r2_score(target, pred),
+        'pearson_corr': pearsonr(pred, target)[0],
+        'spearman_corr': spearmanr(pred, target)[0],
+        'mape': np.mean(np.abs((target - pred) / (target + 1e-8))) * 100,
+        'smape': np.mean(2 * np.abs(pred - target) / (np.abs(pred) + np.abs(target) + 1e-8)) * 100
+    }
+
+
+class TestRegressionMetrics:
+
+    def test_matches_sklearn_and_scipy(self):
+        rng = np.random.default_rng(0)
+        pred = np.round(rng.random((500, 3)) * 20)
+        target = pred + rng.normal(0, 3, pred.shape)
+        values = regression_metrics(torch.from_numpy(pred), torch.from_numpy(target))
+
+        for column in range(3):
+            expected = reference_metrics(pred[:, column], target[:, column])
+            for name, value in expected.items():
+                assert values[name][column].item() == pytest.approx(value, rel=1e-9, abs=1e-9), name
+
+    def test_constant_target_r2(self):
+        pred = torch.tensor([[1.0], [2.0]])
+        assert regression_metrics(pred, torch.ones(2, 1))['r2'].item() == 0.0
+        assert regression_metrics(torch.ones(2, 1), torch.ones(2, 1))['r2'].item() == 1.0
+
+
+class TestFadexQualityMetrics:
+
+    def test_buffers_grow_and_match_reference(self):
+        rng = np.random.default_rng(1)
+        metrics = FadexQualityMetrics(initial_capacity=16)
+        batches = [make_batch(rng, 20) for _ in range(5)]
+        for predictions, targets in batches:
+            metrics.update(predictions, targets)
+
+        assert metrics.predictions.shape == (100, len(METRIC_COLUMNS))
+        assert metrics.predictions.dtype == torch.float32
+
+        result = metrics.compute()
+        pred_dim = torch.cat([p['dimension_scores']['exposure'] for p, _ in batches]).float().numpy().ravel()
+        target_dim = torch.cat([t['dimension_scores']['exposure'] for _, t in batches]).float().numpy().ravel()
+        expected = reference_metrics(pred_dim.astype(np.float64), target_dim.astype(np.float64))
+        for name, value in expected.items():
+            assert result[f'dim_exposure_{name}'] == pytest.approx(value, rel=1e-6, abs=1e-6)
+
+        assert 'global_r2' in result and 'confidence_mae' in result
+        assert 'diagnostic_sensitivity' in result
+        assert 0 <= result['fadex_overall_score'] <= 100
+        assert all(isinstance(v, float) for v in result.values())
+
+        metrics.reset()
+        assert metrics.num_samples == 0 and metrics.compute() == {}
+
+    def test_partial_columns_are_ignored_where_missing(self):
+        rng = np.random.default_rng(2)
+        metrics = FadexQualityMetrics()
+        full_predictions, full_targets = make_batch(rng, 10)
+        metrics.update(full_predictions, full_targets)
+
+        # Batch sem dimensões nem confiança
+        metrics.update(
+            {'global_score': torch.full((5, 1), 50.0)},
+            {'global_score': torch.full((5, 1), 40.0)}
+        )
+
+        result = metrics.compute()
+        assert metrics.num_samples == 15
+        expected = mean_absolute_error(
+            full_targets['dimension_scores']['sharpness'].float().numpy().ravel(),
+            full_predictions['dimension_scores']['sharpness'].float().numpy().ravel()
+        )
+        assert result['dim_sharpness_mae'] == pytest.approx(expected, rel=1e-6)
+        assert np.isfinite(result['global_mae'])
+
+
+class TestStreamingMetrics:
+
+    def test_exact_metrics_match_buffered_and_memory_is_constant(self):
+        rng = np.random.default_rng(3)
+        buffered = FadexQualityMetrics()
+        streaming = FadexQualityMetrics(streaming=True)
+        sizes = None
+        for _ in range(10):
+            predictions, targets = make_batch(rng, 100)
+            buffered.update(predictions, targets)
+            streaming.update(predictions, targets)
+            state_sizes = [t.numel() for t in streaming.state.state_dict().values()]
+            assert sizes is None or state_sizes == sizes
+            sizes = state_sizes
+
+        expected = buffered.compute()
+        result = streaming.compute()
+        assert result.keys() == expected.keys()
+        for key, value in expected.items():
+            if 'spearman' in key:
+                assert result[key] == pytest.approx(value, abs=0.01), key
+            else:
+                # Buffers guardam float32; o estado streaming recebe float64
+                assert result[key] == pytest.approx(value, rel=1e-6, abs=1e-6), key
+
+        with pytest.raises(AttributeError):
+            streaming.predictions
+
+    def test_merge_and_state_dict(self):
+        rng = np.random.default_rng(4)
+        single = FadexQualityMetrics(streaming=True)
+        workers = [FadexQualityMetrics(streaming=True) for _ in range(3)]
+        for i in range(9):
+            predictions, targets = make_batch(rng, 7 + i)
+            single.update(predictions, targets)
+            workers[i % 3].update(predictions, targets)
+
+        # Estado serializado (como viria de outro processo)
+        restored = FadexQualityMetrics(streaming=True)
+        restored.state.load_state_dict(workers[2].state.state_dict())
+        restored.num_samples = workers[2].num_samples
+
+        workers[0].merge(workers[1])
+        workers[0].merge(restored)
+        assert workers[0].num_samples == single.num_samples
+
+        expected = single.compute()
+        for key, value in workers[0].compute().items():
+            assert value == pytest.approx(expected[key], rel=1e-9, abs=1e-9), key
+
+        with pytest.raises(ValueError):
+            workers[0].merge(FadexQualityMetrics())
+
+
+class TestRealTimeMetrics:
+
+    def test_ring_buffer_matches_recomputed_window(self):
+        rng = np.random.default_rng(5)
+        window = 32
+        metrics = RealTimeMetrics(window_size=window)
+        history = []
+        assert metrics.get_current_metrics() == {}
+
+        for i in range(200):
+            prediction = 50 + 30 * rng.random()
+            target = prediction + rng.normal(0, 5)
+            loss = rng.random()
+            metrics.update(prediction, target, loss)
+            history.append((prediction, target, loss))
+
+            if i % 13 == 0 and i > 0:
+                pred, targ, losses = map(np.array, zip(*history[-window:]))
+                current = metrics.get_current_metrics()
+                assert current['window_size'] == min(i + 1, window)
+                assert current['recent_mae'] == pytest.approx(mean_absolute_error(targ, pred), rel=1e-9)
+                assert current['recent_correlation'] == pytest.approx(pearsonr(pred, targ)[0], rel=1e-9)
+                assert current['recent_avg_loss'] == pytest.approx(losses.mean(), rel=1e-9)
+
+    def test_exponential_variant_matches_weighted_statistics(self):
+        rng = np.random.default_rng(6)
+        metrics = ExponentialRealTimeMetrics(window_size=20)
+        pred = 50 + 30 * rng.random(300)
+        targ = pred + rng.normal(0, 5, 300)
+        losses = rng.random(300)
+        for values in zip(pred, targ, losses):
+            metrics.update(*values)
+
+        # Pesos equivalentes (adjust=False): a(1-a)^k; a primeira leva o resto
+        alpha = metrics.alpha
+        weights = alpha * (1 - alpha) ** np.arange(299, -1, -1)
+        weights[0] = (1 - alpha) ** 299
+
+        def weighted_mean(values):
+            return np.sum(weights * values)
+
+        centered_pred = pred - weighted_mean(pred)
+        centered_targ = targ - weighted_mean(targ)
+        expected_corr = weighted_mean(centered_pred * centered_targ) / np.sqrt(
+            weighted_mean(centered_pred ** 2) * weighted_mean(centered_targ ** 2)
+        )
+
+        current = metrics.get_current_metrics()
+        assert current['recent_mae'] == pytest.approx(weighted_mean(np.abs(pred - targ)), rel=1e-9)
+        assert current['recent_avg_loss'] == pytest.approx(weighted_mean(losses), rel=1e-9)
+        assert current['recent_correlation'] == pytest.approx(expected_corr, rel=1e-6)
+        assert current['window_size'] == 20
@@ -0,0 +1,70 @@
+"""
+Testes para o catálogo localizado de recomendações
+"""
+
+import dataclasses
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.scoring.recommendation_catalog import (
+    CATALOGS,
+    RecommendationCode,
+    SUPPORTED_LOCALES,
+    recommendation_code_from_message,
+    render_recommendations,
+    resolve_locale
+)
+from ml.scoring.wingsai_core import analyze_image_quality
+
+
+def test_catalogs_cover_all_codes():
+    for locale in SUPPORTED_LOCALES:
+        assert set(CATALOGS[locale]) == set(RecommendationCode)
+
+
+def test_render_with_parameters():
+    codes = [RecommendationCode.CLINICAL_STANDARDS, RecommendationCode.MEETS_STANDARDS]
+
+    pt = render_recommendations(codes, 'oct', 'SNPQIM')
+    assert pt == [
+        "Imagem pode não atender padrões clínicos para oct - considere nova captura",
+        "Imagem atende aos padrões de qualidade SNPQIM"
+    ]
+    en = render_recommendations(codes, 'oct', 'SNPQIM', locale='en')
+    assert en[1] == "Image meets SNPQIM quality standards"
+
+
+def test_message_round_trip_all_locales():
+    for locale in SUPPORTED_LOCALES:
+        for code in RecommendationCode:
+            message = render_recommendations([code], 'fundoscopy', 'WingsAI', locale)[0]
+            assert recommendation_code_from_message(message) == code
+
+
+def test_resolve_locale():
+    assert resolve_locale(None) == 'pt-BR'
+    assert resolve_locale('pt-br') == 'pt-BR'
+    assert resolve_locale('en-US') == 'en'
+    with pytest.raises(ValueError):
+        resolve_locale('fr')
+
+
+def test_score_renders_on_request():
+    score = analyze_image_quality(np.zeros((64, 64, 3)), 'oct')
+
+    assert score.recommendations is None  # nada montado na análise
+    assert dataclasses.asdict(score)['recommendations'] is None
+    assert dataclasses.replace(score) == score
+    assert score.render_recommendations() == render_recommendations(score.recommendation_codes, 'oct')
+    assert score.render_recommendations('en') == \
+        render_recommendations(score.recommendation_codes, 'oct', locale='en')
+
+    # Mensagens já prontas (sem códigos) são devolvidas como estão
+    legacy = dataclasses.replace(score, recommendation_codes=None, recommendations=['texto'])
+    assert legacy.render_recommendations('en') == ['texto']
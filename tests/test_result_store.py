@@ -0,0 +1,134 @@
+"""
+Testes para o histórico colunar de scores (Arrow IPC particionado por data)
+"""
+
+import fcntl
+import os
+import sys
+import threading
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.scoring.result_store import ResultStore, daily_summary, load_scores, store_schema
+from ml.scoring.wingsai_core import analyze_image_quality
+
+
+@pytest.fixture(scope="module")
+def score():
+    rng = np.random.default_rng(0)
+    image = np.clip(0.5 + 0.1 * rng.standard_normal((128, 128, 3)), 0, 1)
+    return analyze_image_quality(image, 'fundoscopy', {'filename': 'a.png'})
+
+
+def test_append_flush_and_load(tmp_path, score):
+    store = ResultStore(str(tmp_path), flush_rows=2, compact_interval=0)
+    for _ in range(5):
+        store.append(score, exam_type='fundoscopy', shape=(128, 128, 3), seconds=0.1)
+    store.close()
+
+    table = load_scores(str(tmp_path))
+    assert table.num_rows == 5
+    assert table.column('path').to_pylist() == ['a.png'] * 5
+    assert table.column('source').to_pylist() == ['api'] * 5
+    assert table.column('dim_sharpness')[0].as_py() == pytest.approx(
+        score.dimension_scores['sharpness'], rel=1e-5
+    )
+    assert table.column('recommendation_codes')[0].as_py() == [
+        code.key for code in score.recommendation_codes
+    ]
+    # 2 + 2 + 1 registros
+    assert store.stats['files'] == 3
+
+
+def test_reads_files_with_previous_schema(tmp_path, score):
+    """Arquivos com recomendações em texto (schema anterior) seguem legíveis"""
+    import pyarrow as pa
+
+    store = ResultStore(str(tmp_path), compact_interval=0)
+    store.append(score)
+    store.close()
+    partition = next(tmp_path.glob("date=*"))
+
+    fields = [f for f in store_schema() if f.name != 'recommendation_codes']
+    old_schema = pa.schema(fields + [pa.field('recommendations', pa.list_(pa.string()))])
+    old = pa.Table.from_pylist([{
+        'path': 'old.png', 'status': 'ok', 'recommendations': ['texto'],
+        'timestamp': datetime.now(timezone.utc)
+    }], schema=old_schema)
+    with pa.OSFile(str(partition / "batch-0-0-0.arrow"), 'wb') as sink:
+        with pa.ipc.new_file(sink, old_schema) as writer:
+            writer.write_table(old)
+
+    table = load_scores(str(tmp_path))
+    assert table.num_rows == 2
+    assert sorted(table.column('recommendation_codes').to_pylist(), key=str)[0] is None
+
+    store = ResultStore(str(tmp_path), compact_interval=0)
+    assert store.compact(partition.name[len("date="):]) == 1
+    store.close()
+    assert load_scores(str(tmp_path)).num_rows == 2
+
+
+def test_compact_merges_partition(tmp_path, score):
+    store = ResultStore(str(tmp_path), flush_rows=1, compact_interval=0)
+    for _ in range(4):
+        store.append(score)
+    store.flush()
+
+    assert store.compact() == 0  # abaixo de compact_min_files
+    today = datetime.now(timezone.utc).date().isoformat()
+    assert store.compact(today) == 1
+    store.close()
+
+    files = list((tmp_path / f"date={today}").glob("*.arrow"))
+    assert len(files) == 1 and files[0].name.startswith("compacted-")
+    assert load_scores(str(tmp_path)).num_rows == 4
+
+
+def test_compact_waits_for_readers(tmp_path, score):
+    """Compactação não troca os arquivos enquanto uma consulta lê a partição"""
+    store = ResultStore(str(tmp_path), flush_rows=1, compact_interval=0)
+    for _ in range(3):
+        store.append(score)
+    store.flush()
+    today = datetime.now(timezone.utc).date().isoformat()
+    partition = tmp_path / f"date={today}"
+
+    with open(partition / ".read.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH)  # consulta em andamento
+        compaction = threading.Thread(target=store.compact, args=(today,))
+        compaction.start()
+        compaction.join(timeout=0.5)
+        assert compaction.is_alive()
+        assert sorted(f.name[:6] for f in partition.glob("*.arrow")) == ["batch-"] * 3
+
+    compaction.join()
+    store.close()
+    assert [f.name[:10] for f in partition.glob("*.arrow")] == ["compacted-"]
+    assert load_scores(str(tmp_path)).num_rows == 3
+
+
+def test_daily_summary_filters_dates(tmp_path, score):
+    store = ResultStore(str(tmp_path), compact_interval=0)
+    store.append(score, exam_type='fundoscopy')
+    store.append_record({
+        'path': 'old.png', 'exam_type': 'oct', 'status': 'error', 'error': 'x',
+        'timestamp': datetime(2024, 1, 2, tzinfo=timezone.utc)
+    }, source='bulk')
+    store.close()
+
+    days = daily_summary(str(tmp_path))
+    assert [(d['date'], d['exam_type']) for d in days][0] == ('2024-01-02', 'oct')
+    assert days[0]['errors'] == 1 and days[0]['count'] == 0
+    assert days[1]['count'] == 1
+    assert days[1]['mean_score'] == pytest.approx(score.global_score, rel=1e-5)
+
+    recent = daily_summary(str(tmp_path), start=date(2025, 1, 1))
+    assert len(recent) == 1 and recent[0]['exam_type'] == 'fundoscopy'
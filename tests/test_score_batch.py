@@ -0,0 +1,112 @@
+"""
+Testes para o lote compacto de scores e os códigos de recomendação
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.scoring.recommendation_catalog import (
+    RecommendationCode,
+    recommendation_code_from_message,
+    render_recommendations
+)
+from ml.scoring.score_batch import ScoreBatch
+from ml.scoring.snpqim_core import SnpqimQualityAnalyzer
+from ml.scoring.wingsai_core import WingsAIQualityAnalyzer, analyze_image_quality
+
+
+@pytest.fixture(scope="module")
+def scores():
+    rng = np.random.default_rng(0)
+    image = np.clip(0.5 + 0.1 * rng.standard_normal((128, 128, 3)), 0, 1)
+    return [
+        analyze_image_quality(image, 'fundoscopy'),
+        analyze_image_quality(image, 'oct'),
+        analyze_image_quality(np.zeros((64, 64, 3)), 'fundoscopy'),  # cascade
+        analyze_image_quality(image, 'oct', fields=['dimension_scores.sharpness']),
+    ]
+
+
+def test_recommendation_codes_match_messages(scores):
+    for score in scores[:3]:
+        messages = score.render_recommendations()
+        assert len(score.recommendation_codes) == len(messages)
+        assert [recommendation_code_from_message(m) for m in messages] == score.recommendation_codes
+    assert scores[2].recommendation_codes[0] == RecommendationCode.UNUSABLE_FRAME
+
+
+def test_recommendation_codes_exam_specific():
+    analyzer = WingsAIQualityAnalyzer()
+    good = {d: 100.0 for d in ('sharpness', 'exposure', 'contrast', 'noise_level', 'artifacts')}
+
+    assert analyzer._generate_recommendation_codes(
+        {**good, 'clinical_adequacy': 75.0}, 'fundoscopy'
+    ) == [RecommendationCode.FUNDUS_STRUCTURES]
+    assert analyzer._generate_recommendation_codes(
+        {**good, 'clinical_adequacy': 100.0}, 'oct'
+    ) == [RecommendationCode.MEETS_STANDARDS]
+
+
+def test_round_trip_scores(scores):
+    batch = ScoreBatch.from_scores(scores)
+    assert len(batch) == 4
+    assert batch.exam_types == ['fundoscopy', 'oct']
+
+    for original, restored in zip(scores, batch):
+        assert restored.exam_type == original.exam_type
+        assert restored.recommendation_codes == original.recommendation_codes
+        assert restored.render_recommendations() == original.render_recommendations()
+        assert restored.skipped_dimensions == original.skipped_dimensions
+        assert restored.ml_readiness == original.ml_readiness
+        assert restored.dimension_scores.keys() == original.dimension_scores.keys()
+        for name, value in original.dimension_scores.items():
+            assert restored.dimension_scores[name] == pytest.approx(value, rel=1e-6)
+
+    # Análise parcial: campos não pedidos continuam None
+    partial = batch[3]
+    assert partial.global_score is None and partial.recommendation_codes is None
+    assert np.isnan(batch.global_score[3])
+
+
+def test_round_trip_dicts(scores):
+    records = ScoreBatch.from_scores(scores).to_dicts()
+    restored = ScoreBatch.from_dicts(records)
+    assert restored.to_dicts() == records
+
+    # Formato antigo, só com as mensagens
+    legacy = [{**r, 'recommendation_codes': None} for r in records]
+    assert ScoreBatch.from_dicts(legacy).to_dicts() == records
+
+
+def test_round_trip_brand(scores):
+    rng = np.random.default_rng(1)
+    image = np.clip(0.5 + 0.1 * rng.standard_normal((128, 128, 3)), 0, 1)
+    snpqim = SnpqimQualityAnalyzer().analyze_image(image, 'fundoscopy')
+
+    batch = ScoreBatch.from_scores(scores + [snpqim])
+    assert batch.brands == ['WingsAI', 'SNPQIM']
+    assert batch.brand_codes.tolist() == [0, 0, 0, 0, 1]
+
+    for restored in (batch[-1], ScoreBatch.from_dicts(batch.to_dicts())[-1]):
+        assert restored.brand == 'SNPQIM'
+        assert restored.render_recommendations() == snpqim.render_recommendations()
+        assert render_recommendations([RecommendationCode.MEETS_STANDARDS], brand=restored.brand) == \
+            ['Imagem atende aos padrões de qualidade SNPQIM']
+
+
+def test_growth_and_columns(scores):
+    batch = ScoreBatch(capacity=1)
+    for _ in range(50):
+        batch.extend(scores)
+
+    assert len(batch) == 200
+    assert batch.dimensions.shape == (200, 6)
+    assert batch.dimension('sharpness').dtype == np.float32
+    assert batch[-1].dimension_scores.keys() == {'sharpness'}
+    assert batch.recommendation_codes(198) == scores[2].recommendation_codes
@@ -0,0 +1,36 @@
+"""
+Testes para o servidor pre-fork (cálculo de workers)
+"""
+
+import os
+import sys
+
+import pytest
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backend import server
+
+
+@pytest.mark.parametrize("cpus, quota, expected", [
+    (8, None, 8),   # Sem cota: uma por CPU
+    (8, 2.0, 2),    # Cota menor que as CPUs
+    (8, 1.5, 2),    # Cota fracionária arredonda para cima
+    (2, 16.0, 2),   # Cota maior que a afinidade
+    (4, 0.5, 1),    # Sempre ao menos um worker
+])
+def test_default_worker_count(monkeypatch, cpus, quota, expected):
+    monkeypatch.setattr(server, 'available_cpus', lambda: cpus)
+    monkeypatch.setattr(server, 'cpu_quota', lambda: quota)
+
+    assert server.default_worker_count() == expected
+
+
+def test_create_socket_is_inheritable():
+    sock = server.create_socket('127.0.0.1', 0)
+    try:
+        assert sock.get_inheritable()
+        assert sock.getsockname()[1] > 0
+    finally:
+        sock.close()
@@ -0,0 +1,96 @@
+"""
+Testes para o logging de steps sem sincronização (ml.training.step_logging)
+"""
+
+import os
+import sys
+
+import pytest
+import torch
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.training.step_logging import AsyncMetricsLogger, StepStatsAccumulator
+
+
+class TestStepStatsAccumulator:
+
+    def test_window_and_epoch_stats(self):
+        stats = StepStatsAccumulator()
+        losses = [0.5, 0.25, 1.0, 0.75]
+        for i, value in enumerate(losses):
+            stats.update(torch.tensor(value, requires_grad=True), lr=1e-3 if i < 3 else 5e-4)
+
+        window = stats.snapshot()
+        assert window.steps == 4
+        metrics = window.to_metrics()
+        assert metrics['batch_loss'] == pytest.approx(sum(losses) / 4)
+        assert metrics['batch_loss_min'] == 0.25
+        assert metrics['batch_loss_max'] == 1.0
+        assert metrics['learning_rate'] == 5e-4
+        assert metrics['learning_rate_min'] == 5e-4
+        assert metrics['learning_rate_max'] == 1e-3
+
+        # Nova janela vazia; época continua acumulando
+        assert stats.snapshot() is None
+        stats.update(torch.tensor(2.0), lr=5e-4)
+        assert stats.epoch_mean() == pytest.approx((sum(losses) + 2.0) / 5)
+        assert 'learning_rate_min' not in stats.snapshot().to_metrics()
+
+        stats.reset_epoch()
+        assert stats.epoch_mean() == 0.0
+
+    def test_snapshot_is_not_mutated_by_later_steps(self):
+        stats = StepStatsAccumulator()
+        stats.update(torch.tensor(1.0), lr=0.1)
+        window = stats.snapshot()
+        stats.update(torch.tensor(9.0), lr=0.1)
+        assert window.to_metrics()['batch_loss'] == 1.0
+
+
+    def test_accelerators_accumulate_in_float32(self):
+        # 'meta' simula um device não-CPU (MPS não tem float64)
+        device = torch.device('meta')
+        stats = StepStatsAccumulator(device)
+        stats.update(torch.tensor(1.0, dtype=torch.float32, device=device), lr=0.1)
+
+        assert stats.dtype == torch.float32
+        assert stats.snapshot().loss_stats.dtype == torch.float32
+        assert StepStatsAccumulator().dtype == torch.float64
+
+
+class TestAsyncMetricsLogger:
+
+    def test_writes_in_order_and_flushes(self):
+        written = []
+        metrics_logger = AsyncMetricsLogger(lambda metrics, step: written.append((step, metrics)))
+
+        stats = StepStatsAccumulator()
+        for step in range(1, 7):
+            stats.update(torch.tensor(float(step)), lr=0.01)
+            if step % 3 == 0:
+                metrics_logger.log_window(stats.snapshot(), step=step)
+        metrics_logger.log({'val_loss': torch.tensor(0.5)}, step=7)
+        metrics_logger.flush()
+
+        assert [step for step, _ in written] == [3, 6, 7]
+        assert written[0][1]['batch_loss'] == 2.0
+        assert written[1][1]['batch_loss'] == 5.0
+        assert written[2][1] == {'val_loss': 0.5}
+        assert metrics_logger.latest == {'val_loss': 0.5}
+        metrics_logger.close()
+
+    def test_sink_errors_do_not_stop_logging(self):
+        written = []
+
+        def sink(metrics, step):
+            if step == 1:
+                raise RuntimeError("tracker fora do ar")
+            written.append(step)
+
+        metrics_logger = AsyncMetricsLogger(sink)
+        metrics_logger.log({'a': 1.0}, step=1)
+        metrics_logger.log({'a': 2.0}, step=2)
+        metrics_logger.close()
+        assert written == [2]
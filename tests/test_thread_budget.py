@@ -0,0 +1,64 @@
+"""
+Testes para o orçamento de threads (OpenCV/BLAS/torch)
+"""
+
+import os
+import sys
+
+import cv2
+import pytest
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ml.scoring import thread_budget
+
+
+@pytest.fixture(autouse=True)
+def restore_threads(monkeypatch):
+    """Restaura variáveis de ambiente e threads do OpenCV após cada teste"""
+    for var in thread_budget.NATIVE_THREAD_ENV_VARS + (thread_budget.THREADS_ENV_VAR,):
+        monkeypatch.delenv(var, raising=False)
+    original = cv2.getNumThreads()
+    yield
+    cv2.setNumThreads(original)
+
+
+@pytest.mark.parametrize("workers, cpus, expected", [
+    (1, 8, 8),
+    (4, 8, 2),
+    (3, 8, 2),
+    (16, 8, 1),
+])
+def test_threads_per_worker(workers, cpus, expected):
+    assert thread_budget.threads_per_worker(workers, cpus) == expected
+
+
+def test_apply_thread_budget():
+    applied = thread_budget.apply_thread_budget(1)
+
+    assert applied['opencv'] == 1
+    assert cv2.getNumThreads() == 1
+    assert os.environ['OMP_NUM_THREADS'] == '1'
+    assert thread_budget.current_thread_settings()['budget'] == 1
+
+
+def test_warns_without_threadpoolctl(monkeypatch, caplog):
+    """Sem threadpoolctl, as variáveis de ambiente não limitam o BLAS já carregado"""
+    monkeypatch.setattr(thread_budget, 'THREADPOOLCTL_AVAILABLE', False)
+    monkeypatch.setattr(thread_budget, '_warned_blas', False)
+
+    with caplog.at_level('WARNING', logger=thread_budget.__name__):
+        applied = thread_budget.apply_thread_budget(1)
+        thread_budget.apply_thread_budget(1)
+
+    assert applied['blas'] is None
+    assert sum('threadpoolctl' in r.message for r in caplog.records) == 1
+
+
+def test_configure_from_env(monkeypatch):
+    assert thread_budget.configure_from_env() is None
+
+    monkeypatch.setenv(thread_budget.THREADS_ENV_VAR, '2')
+    assert thread_budget.configure_from_env() == 2
+    assert cv2.getNumThreads() == 2
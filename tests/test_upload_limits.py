@@ -0,0 +1,118 @@
+"""
+Testes para os limites de upload (cabeçalho de imagem e tamanho do corpo)
+"""
+
+import io
+import os
+import struct
+import sys
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backend.upload_limits import (
+    ImageHeaderError,
+    RequestSizeLimitMiddleware,
+    UploadLimits,
+    read_upload,
+    sniff_image_header
+)
+
+
+def encode(ext: str, width: int = 40, height: int = 30) -> bytes:
+    image = np.full((height, width, 3), 128, dtype=np.uint8)
+    return cv2.imencode(ext, image)[1].tobytes()
+
+
+def with_app_segment(jpeg: bytes, size: int) -> bytes:
+    """Insere um segmento APP1 grande (como EXIF) antes do SOF"""
+    payload = b'\x00' * size
+    segment = b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+    return jpeg[:2] + segment + jpeg[2:]
+
+
+class TestSniffImageHeader:
+
+    def test_png(self):
+        assert sniff_image_header(io.BytesIO(encode('.png'))) == ('png', 40, 30)
+
+    def test_jpeg(self):
+        assert sniff_image_header(io.BytesIO(encode('.jpg'))) == ('jpeg', 40, 30)
+
+    def test_jpeg_with_large_app_segment(self):
+        data = with_app_segment(encode('.jpg', 64, 48), 60000)
+        stream = io.BytesIO(data)
+        assert sniff_image_header(stream) == ('jpeg', 64, 48)
+        assert stream.tell() == 0
+
+    def test_other_formats_and_truncated(self):
+        assert sniff_image_header(io.BytesIO(b'GIF89a' + b'\x00' * 40)) is None
+        assert sniff_image_header(io.BytesIO(encode('.bmp'))) is None
+        with pytest.raises(ImageHeaderError):
+            sniff_image_header(io.BytesIO(encode('.jpg')[:20]))
+
+
+@pytest.fixture
+def client():
+    limits = UploadLimits(max_file_bytes=2000, max_request_bytes=50_000, max_image_pixels=10_000)
+    app = FastAPI()
+    app.add_middleware(RequestSizeLimitMiddleware, max_bytes=limits.max_request_bytes)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        contents = await read_upload(file, limits)
+        return {"bytes": len(contents)}
+
+    return TestClient(app)
+
+
+class TestUploadLimits:
+
+    def test_accepts_small_image(self, client):
+        data = encode('.png')
+        response = client.post("/upload", files={"file": ("a.png", data, "image/png")})
+        assert response.status_code == 200
+        assert response.json() == {"bytes": len(data)}
+
+    def test_rejects_large_file(self, client):
+        noisy = np.random.default_rng(0).integers(0, 255, (50, 50, 3), dtype=np.uint8)
+        data = cv2.imencode('.png', noisy)[1].tobytes()
+        assert len(data) > 2000
+        response = client.post("/upload", files={"file": ("a.png", data, "image/png")})
+        assert response.status_code == 413
+
+    def test_rejects_too_many_pixels_from_header(self, client):
+        data = encode('.png', 200, 100)  # 20k pixels, arquivo pequeno
+        response = client.post("/upload", files={"file": ("a.png", data, "image/png")})
+        assert response.status_code == 413
+        assert "200x100" in response.json()["detail"]
+
+    def test_other_formats_only_checked_by_size(self, client):
+        # Sem leitor de cabeçalho: passa pelo limite de bytes e o imdecode decide
+        small = encode('.bmp', 20, 20)
+        response = client.post("/upload", files={"file": ("a.bmp", small, "image/bmp")})
+        assert response.status_code == 200
+        large = encode('.bmp', 40, 30)
+        response = client.post("/upload", files={"file": ("b.bmp", large, "image/bmp")})
+        assert response.status_code == 413
+
+    def test_rejects_large_request_body(self, client):
+        response = client.post("/upload", files={"file": ("a.png", b"\x00" * 60_000, "image/png")})
+        assert response.status_code == 413
+
+    def test_rejects_large_chunked_body(self, client):
+        def chunks():
+            for _ in range(20):
+                yield b"\x00" * 10_000
+
+        response = client.post(
+            "/upload", content=chunks(),
+            headers={"content-type": "multipart/form-data; boundary=x"}
+        )
+        assert response.status_code == 413
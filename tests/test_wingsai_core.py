@@ -5,17 +5,23 @@ Valida funcionamento do algoritmo de scoring
 
 import pytest
 import numpy as np
+import cv2
 import sys
 import os
 
-# Adiciona src ao path
+# Adiciona src e scripts (geradores sintéticos) ao path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
+from create_test_images import TestImageGenerator
+from ml.scoring.recommendation_catalog import render_recommendations
 from ml.scoring.wingsai_core import (
     WingsAIQualityAnalyzer,
     analyze_image_quality,
     WingsAIScore,
-    QualityDimension
+    QualityDimension,
+    resolve_fields,
+    DIMENSION_NAMES
 )
 
 
@@ -74,7 +80,7 @@ class TestWingsAIQualityAnalyzer:
         assert score.ml_readiness in ['excellent', 'good', 'fair', 'poor']
         assert score.clinical_adequacy in ['diagnostic', 'screening', 'inadequate']
         assert len(score.dimension_scores) > 0
-        assert len(score.recommendations) > 0
+        assert len(score.render_recommendations()) > 0
 
     def test_analyze_low_quality_image(self, analyzer, sample_image_low_quality):
         """Testa análise de imagem de baixa qualidade"""
@@ -255,10 +261,8 @@ class TestWingsAIQualityAnalyzer:
             'clinical_adequacy': 70
         }
 
-        recommendations = analyzer._generate_recommendations(
-            poor_sharpness_scores,
-            'fundoscopy'
-        )
+        codes = analyzer._generate_recommendation_codes(poor_sharpness_scores, 'fundoscopy')
+        recommendations = render_recommendations(codes, 'fundoscopy', analyzer.BRAND_NAME)
 
         assert len(recommendations) > 0
         # Deve recomendar algo sobre nitidez
@@ -301,6 +305,257 @@ class TestWingsAIQualityAnalyzer:
         assert consistent_conf > inconsistent_conf
 
 
+class TestEarlyExitCascade:
+    """Testes para o cascade de saída antecipada"""
+
+    @pytest.fixture
+    def analyzer(self):
+        return WingsAIQualityAnalyzer()
+
+    def test_warmup_does_not_count_in_stats(self, analyzer):
+        """Warmup percorre os caminhos do scoring sem poluir as estatísticas"""
+        analyzer.warmup(size=128)
+
+        assert analyzer.get_cascade_stats()['analyzed'] == 0
+
+    @pytest.mark.parametrize("image, reason", [
+        (np.zeros((512, 512)), 'underexposed'),
+        (np.ones((512, 512)), 'overexposed'),
+        (np.ones((512, 512)) * 0.5, 'blank_frame'),
+    ])
+    def test_unusable_images_take_fast_path(self, analyzer, image, reason):
+        """Imagens inutilizáveis retornam score rápido com dimensões puladas"""
+        score = analyzer.analyze_image(image)
+
+        assert isinstance(score, WingsAIScore)
+        assert score.metadata['cascade_reason'] == reason
+        assert set(score.skipped_dimensions) == set(analyzer.CASCADE_SKIPPED_DIMENSIONS)
+        assert score.ml_readiness == 'poor'
+        assert score.clinical_adequacy == 'inadequate'
+        assert 0 <= score.global_score <= 100
+        assert len(score.dimension_scores) == 6
+
+    def test_fast_path_respects_fields(self, analyzer):
+        """Score rápido do cascade aplica a mesma projeção de fields"""
+        image = np.zeros((512, 512))
+
+        score = analyzer.analyze_image(image, fields=['dimension_scores.sharpness'])
+
+        assert score.metadata['cascade_reason'] == 'underexposed'
+        assert score.dimension_scores == {'sharpness': 0.0}
+        assert score.skipped_dimensions == ['sharpness']
+        assert score.global_score is None and score.confidence is None
+        assert score.ml_readiness is None and score.clinical_adequacy is None
+        assert score.recommendation_codes is None
+
+        full = analyzer.analyze_image(image)
+        partial = analyzer.analyze_image(image, fields=['global_score'])
+        assert partial.global_score == pytest.approx(full.global_score)
+        assert partial.recommendation_codes is None
+
+    def test_clipped_image_takes_fast_path(self, analyzer):
+        """Imagem quase toda clipada (metade preta, metade branca)"""
+        image = np.zeros((512, 512))
+        image[:, 256:] = 1.0
+
+        score = analyzer.analyze_image(image)
+
+        assert score.metadata['cascade_reason'] == 'clipped'
+
+    def test_normal_image_runs_full_analysis(self, analyzer):
+        """Imagem normal não dispara o cascade"""
+        np.random.seed(42)
+        image = np.random.rand(256, 256)
+        metadata = {'patient_id': 'TEST001'}
+
+        score = analyzer.analyze_image(image, metadata=metadata)
+
+        assert score.skipped_dimensions == []
+        assert score.metadata == metadata
+
+    def test_cascade_can_be_disabled(self):
+        """Com o cascade desligado a análise completa sempre roda"""
+        analyzer = WingsAIQualityAnalyzer(cascade_config={'enabled': False})
+        score = analyzer.analyze_image(np.zeros((128, 128)))
+
+        assert score.skipped_dimensions == []
+        assert 'cascade_reason' not in score.metadata
+
+    def test_cascade_stats(self, analyzer):
+        """Estatísticas contam disparos e tempo economizado"""
+        np.random.seed(42)
+        analyzer.analyze_image(np.random.rand(128, 128))
+        analyzer.analyze_image(np.zeros((128, 128)))
+        analyzer.analyze_image(np.ones((128, 128)))
+
+        stats = analyzer.get_cascade_stats()
+
+        assert stats['analyzed'] == 3
+        assert stats['triggered'] == 2
+        assert stats['reasons'] == {'underexposed': 1, 'overexposed': 1}
+        assert stats['trigger_rate'] == pytest.approx(2 / 3)
+        assert stats['estimated_seconds_saved'] >= 0
+
+    def test_cascade_stats_ignore_projected(self, analyzer):
+        """Análises com fields ficam fora da taxa de disparo, nos dois caminhos"""
+        np.random.seed(42)
+        analyzer.analyze_image(np.random.rand(128, 128))
+        analyzer.analyze_image(np.random.rand(128, 128), fields=['dimension_scores.exposure'])
+        analyzer.analyze_image(np.zeros((128, 128)), fields=['dimension_scores.exposure'])
+
+        stats = analyzer.get_cascade_stats()
+
+        assert stats['analyzed'] == 1 and stats['triggered'] == 0
+        assert stats['trigger_rate'] == 0.0
+        assert stats['projected'] == 2 and stats['projected_triggered'] == 1
+
+
+class TestSelectiveFields:
+    """Testes para análise seletiva via `fields`"""
+
+    ANALYSIS_METHODS = {
+        'sharpness': '_analyze_sharpness',
+        'exposure': '_analyze_exposure',
+        'contrast': '_analyze_contrast',
+        'noise_level': '_analyze_noise',
+        'artifacts': '_detect_artifacts',
+        'clinical_adequacy': '_assess_clinical_adequacy'
+    }
+
+    @pytest.fixture
+    def analyzer(self):
+        return WingsAIQualityAnalyzer()
+
+    @pytest.fixture
+    def image(self):
+        np.random.seed(7)
+        return np.clip(0.5 + 0.1 * np.random.randn(128, 128), 0, 1)
+
+    def _spy(self, analyzer, monkeypatch):
+        """Registra quais análises foram executadas"""
+        called = []
+        for dim, method_name in self.ANALYSIS_METHODS.items():
+            original = getattr(analyzer, method_name)
+
+            def wrapper(*args, _dim=dim, _original=original, **kwargs):
+                called.append(_dim)
+                return _original(*args, **kwargs)
+
+            monkeypatch.setattr(analyzer, method_name, wrapper)
+        return called
+
+    def test_resolve_fields_dependencies(self):
+        """Dependências são resolvidas automaticamente"""
+        dims, outputs = resolve_fields(['dimension_scores.sharpness'])
+        assert dims == {'sharpness'} and outputs == set()
+
+        dims, _ = resolve_fields(['dimension_scores.clinical_adequacy'])
+        assert dims == set(DIMENSION_NAMES)
+
+        dims, outputs = resolve_fields(['ml_readiness'])
+        assert dims == set(DIMENSION_NAMES)
+        assert outputs == {'ml_readiness', 'global_score'}
+
+    @pytest.mark.parametrize("fields", [
+        ['unknown'],
+        ['dimension_scores.unknown']
+    ])
+    def test_resolve_fields_invalid(self, fields):
+        with pytest.raises(ValueError):
+            resolve_fields(fields)
+
+    def test_only_requested_analyses_run(self, analyzer, image, monkeypatch):
+        """Análises não pedidas nunca executam"""
+        called = self._spy(analyzer, monkeypatch)
+
+        score = analyzer.analyze_image(
+            image, fields=['dimension_scores.sharpness', 'dimension_scores.artifacts']
+        )
+
+        assert sorted(called) == ['artifacts', 'sharpness']
+        assert set(score.dimension_scores) == {'sharpness', 'artifacts'}
+        assert score.global_score is None
+        assert score.recommendation_codes is None
+
+    def test_partial_matches_full(self, analyzer, image):
+        """Valores parciais são idênticos aos da análise completa"""
+        full = analyzer.analyze_image(image)
+        partial = analyzer.analyze_image(image, fields=['global_score', 'dimension_scores.noise_level'])
+
+        assert partial.global_score == pytest.approx(full.global_score)
+        assert partial.dimension_scores['noise_level'] == pytest.approx(
+            full.dimension_scores['noise_level']
+        )
+        assert partial.confidence is None
+        assert partial.ml_readiness is None
+
+    def test_fields_none_is_full_analysis(self, analyzer, image, monkeypatch):
+        called = self._spy(analyzer, monkeypatch)
+        score = analyzer.analyze_image(image)
+
+        assert sorted(called) == sorted(DIMENSION_NAMES)
+        assert score.recommendation_codes is not None
+
+
+class TestFundusStructures:
+    """Testes para detecção de estruturas do fundo de olho"""
+
+    @pytest.fixture
+    def analyzer(self):
+        return WingsAIQualityAnalyzer()
+
+    def _fundus(self, with_disc: bool = True, noise: float = 0.01) -> np.ndarray:
+        """Fundo sintético: vinheta, disco óptico (raio 40) e vasos lineares"""
+        np.random.seed(3)
+        h = w = 512
+        y, x = np.ogrid[:h, :w]
+        dist = np.sqrt((x - w // 2) ** 2 + (y - h // 2) ** 2)
+        image = 0.3 * (1 - dist / dist.max() * 0.5)
+        if with_disc:
+            image[(x - 336) ** 2 + (y - 206) ** 2 <= 40 ** 2] = 0.8
+        image = image.astype(np.float32)
+        for k in range(8):
+            cv2.line(image, (20, 40 + 55 * k), (490, 60 + 50 * k), 0.1, 3)
+        return np.clip(image + noise * np.random.randn(h, w), 0, 1).astype(np.float32)
+
+    def test_detects_disc_and_vessels(self, analyzer):
+        assert analyzer._detect_fundus_structures(self._fundus()) == 100.0
+
+    def test_no_disc(self, analyzer):
+        assert analyzer._detect_fundus_structures(self._fundus(with_disc=False)) == 70.0
+
+    @pytest.mark.parametrize("seed", [0, 1])
+    @pytest.mark.parametrize("quality", ['high', 'medium', 'low'])
+    def test_decisions_match_baseline(self, analyzer, tmp_path, quality, seed):
+        """Disco e vasos decididos como no HoughCircles/HoughLinesP originais (param2=30)"""
+        np.random.seed(seed)
+        generator = TestImageGenerator(output_dir=str(tmp_path))
+        image = analyzer._preprocess_image(generator.create_fundus_image((256, 256), quality))
+        image_u8 = (image * 255).astype(np.uint8)
+
+        circles = cv2.HoughCircles(
+            image_u8, cv2.HOUGH_GRADIENT, dp=1, minDist=100,
+            param1=50, param2=30, minRadius=20, maxRadius=100
+        )
+        lines = cv2.HoughLinesP(cv2.Canny(image_u8, 50, 150), 1, np.pi/180, threshold=50,
+                                minLineLength=30, maxLineGap=10)
+        has_vessels = lines is not None and len(lines) > 5
+
+        assert analyzer._has_optic_disc(image_u8) == (circles is not None)
+        assert analyzer._detect_fundus_structures(image) == \
+            50.0 + 30 * (circles is not None) + 20 * has_vessels
+
+    def test_shared_edges_match_baseline(self, analyzer):
+        """Bordas compartilhadas iguais às que nitidez e contraste calculavam"""
+        image = self._fundus(noise=0.03)
+        edges = analyzer._compute_edges(image)
+
+        baseline = cv2.Canny((image.astype(np.float64) * 255).astype(np.uint8), 50, 150)
+        assert np.array_equal(edges, baseline)
+        assert analyzer._analyze_sharpness(image, edges) == analyzer._analyze_sharpness(image)
+        assert analyzer._analyze_contrast(image, edges) == analyzer._analyze_contrast(image)
+
+
 class TestAnalyzeImageQuality:
     """Testes para a função helper analyze_image_quality"""
 
@@ -315,6 +570,17 @@ class TestAnalyzeImageQuality:
         assert score.global_score >= 0
         assert score.confidence >= 0
 
+    def test_torch_tensor_input(self):
+        """Tensores torch continuam aceitos (torch importado pelo chamador)"""
+        torch = pytest.importorskip("torch")
+        np.random.seed(42)
+        test_image = np.random.rand(128, 128).astype(np.float32)
+
+        from_tensor = analyze_image_quality(torch.from_numpy(test_image))
+        from_array = analyze_image_quality(test_image)
+
+        assert from_tensor.global_score == pytest.approx(from_array.global_score)
+
     def test_with_metadata(self):
         """Testa análise com metadata"""
         test_image = np.random.rand(512, 512)
@@ -329,6 +595,31 @@ class TestAnalyzeImageQuality:
         assert score.metadata == metadata
 
 
+class TestSnpqimAliases:
+    """Nomes SNPQIM usam o mesmo motor do WingsAI"""
+
+    def test_aliases_share_engine(self):
+        from ml.scoring import snpqim_core
+
+        assert snpqim_core.SnpqimScore is WingsAIScore
+        assert issubclass(snpqim_core.SnpqimQualityAnalyzer, WingsAIQualityAnalyzer)
+        assert snpqim_core.QualityDimension is QualityDimension
+
+    def test_same_scores_with_brand(self):
+        from ml.scoring.snpqim_core import SnpqimQualityAnalyzer
+
+        np.random.seed(11)
+        image = np.clip(0.5 + 0.1 * np.random.randn(128, 128), 0, 1)
+
+        wingsai = WingsAIQualityAnalyzer().analyze_image(image)
+        snpqim = SnpqimQualityAnalyzer().analyze_image(image)
+
+        assert snpqim.global_score == wingsai.global_score
+        assert snpqim.dimension_scores == wingsai.dimension_scores
+        assert [r.replace("SNPQIM", "WingsAI") for r in snpqim.render_recommendations()] == \
+            wingsai.render_recommendations()
+
+
 class TestQualityDimension:
     """Testes para enum QualityDimension"""
 
@@ -10,7 +10,7 @@ interface ImageUploadProps {
 }
 
 export default function ImageUpload({ onAnalysisComplete }: ImageUploadProps) {
-  const { t } = useLanguage()
+  const { t, language } = useLanguage()
   const [file, setFile] = useState<File | null>(null)
   const [preview, setPreview] = useState<string | null>(null)
   const [analyzing, setAnalyzing] = useState(false)
@@ -78,6 +78,7 @@ export default function ImageUpload({ onAnalysisComplete }: ImageUploadProps) {
     try {
       const analysisResult = await analyzeImage(file, {
         examType: 'fundoscopy',
+        locale: language,
       })
 
       setResult(analysisResult)
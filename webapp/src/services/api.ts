@@ -63,6 +63,7 @@ export async function analyzeImage(
     examType?: string;
     patientId?: string;
     examDate?: string;
+    locale?: string;
   }
 ): Promise<AnalysisResult> {
   try {
@@ -76,6 +77,10 @@ export async function analyzeImage(
     if (options?.examDate) {
       formData.append('exam_date', options.examDate);
     }
+    if (options?.locale) {
+      // Idioma das recomendações (renderizadas pela API)
+      formData.append('locale', options.locale);
+    }
 
     const response = await fetch(`${API_BASE_URL}/api/v1/analyze`, {
       method: 'POST',